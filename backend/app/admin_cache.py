@@ -0,0 +1,128 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from app.models.admin import AdminUser
+
+PENDING_KEY = "admin_cache_invalidate"
+
+
+class AdminPrincipalCache:
+    """
+    Krótkotrwały cache zweryfikowanych adminów (kolumny AdminUser) kluczowany polem sub tokena.
+    Podpis i ważność JWT sprawdzamy przy każdym żądaniu - cache oszczędza tylko zapytanie do bazy.
+    Zmiany AdminUser przez ORM (np. dezaktywacja, zmiana roli) usuwają wpisy od razu i po commicie;
+    zmiany z innych procesów (drugi worker, ręczny SQL) widać najpóźniej po ttl_seconds.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: int = 30):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def get(self, subject: str) -> Optional[AdminUser]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(subject)
+            if entry is None or time.monotonic() - entry[0] > self.ttl_seconds:
+                if entry is not None:
+                    del self._entries[subject]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(subject)
+            self.hits += 1
+            values = entry[1]
+        # świeża, niepodpięta do sesji kopia - endpoint może ją zmieniać bez wpływu na cache
+        return AdminUser(**values)
+
+    def set(self, subject: str, admin: AdminUser):
+        if not self.enabled:
+            return
+        values = {name: getattr(admin, name) for name in AdminUser.model_fields}
+        with self._lock:
+            self._entries[subject] = (time.monotonic(), values)
+            self._entries.move_to_end(subject)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, admin_id: Optional[int] = None):
+        """Usuwa wpisy danego admina (po id, bo zmiana może dotyczyć też username) albo wszystkie."""
+        with self._lock:
+            stale = [
+                subject for subject, (_, values) in self._entries.items()
+                if admin_id is None or values["id"] == admin_id
+            ]
+            for subject in stale:
+                del self._entries[subject]
+            self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "db_round_trips_saved": self.hits,
+                "invalidations": self.invalidations,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+            }
+
+
+admin_cache = AdminPrincipalCache(
+    max_entries=int(os.getenv("ADMIN_CACHE_SIZE", "1000")),
+    ttl_seconds=int(os.getenv("ADMIN_CACHE_TTL", "30")),
+)
+
+
+def _admin_changed(mapper, connection, target: AdminUser):
+    admin_cache.invalidate(target.id)
+    # drugie unieważnienie po commicie: żądanie obsłużone między flushem a commitem
+    # mogło zdążyć zapisać w cache jeszcze stary stan
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(PENDING_KEY, set()).add(target.id)
+
+
+event.listen(AdminUser, "after_update", _admin_changed)
+event.listen(AdminUser, "after_delete", _admin_changed)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _admin_bulk_statement(state):
+    # update(AdminUser) / delete(AdminUser) wykonane przez sesję omijają zdarzenia mappera
+    if (state.is_update or state.is_delete) and state.bind_mapper is not None \
+            and state.bind_mapper.class_ is AdminUser:
+        admin_cache.invalidate()
+        state.session.info.setdefault(PENDING_KEY, set()).add(None)
+
+
+@event.listens_for(Session, "after_commit")
+def _admin_committed(session):
+    for admin_id in session.info.pop(PENDING_KEY, ()):
+        admin_cache.invalidate(admin_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _admin_rolled_back(session):
+    session.info.pop(PENDING_KEY, None)
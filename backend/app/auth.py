@@ -2,10 +2,12 @@ from datetime import datetime, timedelta
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
-import bcrypt
-from sqlmodel import Session, select
-from app.db import get_engine, DATABASE_URL
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.admin_cache import admin_cache
+from app.db import get_async_session
 from app.models.admin import AdminUser
+from app.passwords import password_hasher
 
 SECRET_KEY = "properlytics-secret-key-change-in-production"
 ALGORITHM = "HS256"
@@ -14,12 +16,14 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 8
 security = HTTPBearer()
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+    return password_hasher.verify_sync(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-    return hashed.decode('utf-8')
+    return password_hasher.hash_sync(password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    # w puli bcrypt, poza pętlą zdarzeń; przy przeciążeniu 503
+    return await password_hasher.verify(plain_password, hashed_password)
 
 def create_access_token(data: dict) -> str:
     to_encode = data.copy()
@@ -27,12 +31,13 @@ def create_access_token(data: dict) -> str:
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
-def get_admin_by_username(session: Session, username: str):
+async def get_admin_by_username(session: AsyncSession, username: str):
     stmt = select(AdminUser).where(AdminUser.username == username)
-    return session.exec(stmt).first()
+    return (await session.exec(stmt)).first()
 
-def get_current_admin(
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+async def get_current_admin(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    session: AsyncSession = Depends(get_async_session),
 ) -> AdminUser:
     token = credentials.credentials
     try:
@@ -44,14 +49,17 @@ def get_current_admin(
     except JWTError as e:
         raise HTTPException(status_code=401, detail=f"Invalid token: {str(e)}")
 
-    engine = get_engine()
-    with Session(engine) as session:
-        admin = get_admin_by_username(session, username)
+    # sesja żądania jest współdzielona z endpointem (FastAPI rozwiązuje zależność raz na żądanie)
+    admin = admin_cache.get(username)
+    if admin is None:
+        admin = await get_admin_by_username(session, username)
         if admin is None:
             raise HTTPException(status_code=401, detail="Admin not found")
-        if not admin.is_active:
-            raise HTTPException(status_code=403, detail="Account disabled")
-        return admin
+        admin_cache.set(username, admin)
+
+    if not admin.is_active:
+        raise HTTPException(status_code=403, detail="Account disabled")
+    return admin
 
 def require_admin(admin: AdminUser = Depends(get_current_admin)) -> AdminUser:
     if admin.role not in ["admin", "superadmin"]:
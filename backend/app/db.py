@@ -1,25 +1,98 @@
 import os
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlmodel import SQLModel, create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./dev.db")
 
+# Pula połączeń (dotyczy PostgreSQL; SQLite ma własne pule SQLAlchemy)
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+# cache przygotowanych zapytań asyncpg na połączenie (0 wyłącza, np. za pgbouncerem w trybie transaction)
+STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
 connect_args = {}
 if DATABASE_URL.startswith("sqlite"):
     connect_args = {"check_same_thread": False}
 
+
+def pool_options(url: str) -> dict:
+    if url.startswith("sqlite"):
+        return {}
+    return {
+        "pool_size": POOL_SIZE,
+        "max_overflow": MAX_OVERFLOW,
+        "pool_timeout": POOL_TIMEOUT,
+        "pool_recycle": POOL_RECYCLE,
+    }
+
+
 engine = create_engine(
     DATABASE_URL,
     echo=False,
     pool_pre_ping=True,
     connect_args=connect_args,
+    **pool_options(DATABASE_URL),
 )
 
+
+def async_database_url(url: str) -> str:
+    """Ten sam adres bazy z asynchronicznym sterownikiem (asyncpg / aiosqlite)."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"Brak asynchronicznego sterownika dla bazy: {backend}")
+    parsed = parsed.set(drivername=ASYNC_DRIVERS[backend])
+    if backend == "postgresql":
+        parsed = parsed.update_query_dict({"prepared_statement_cache_size": str(STATEMENT_CACHE_SIZE)})
+    return parsed.render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or async_database_url(DATABASE_URL)
+
+_async_engine = None
+
+
 def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
+    # create_all pomija istniejące tabele razem z ich indeksami - dokładamy brakujące indeksy osobno
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
 
 def get_engine():
     return engine
 
+def get_async_engine():
+    # tworzony przy pierwszym użyciu, już wewnątrz pętli zdarzeń serwera
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = create_async_engine(
+            ASYNC_DATABASE_URL,
+            echo=False,
+            pool_pre_ping=True,
+            **pool_options(ASYNC_DATABASE_URL),
+        )
+    return _async_engine
+
 def get_session():
     with Session(engine) as session:
         yield session
+
+async def dispose_async_engine():
+    global _async_engine
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+
+async def get_async_session():
+    async with AsyncSession(get_async_engine(), expire_on_commit=False) as session:
+        yield session
@@ -0,0 +1,249 @@
+import asyncio
+import gc
+import multiprocessing
+import os
+import platform
+import signal
+import sys
+import sysconfig
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+import pandas as pd
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+# zestaw modeli procesu roboczego, ustawiany przez initializer puli
+_worker_models = None
+
+
+def _init_worker(model_set):
+    """
+    Start procesu roboczego. Modele przychodzą przez fork (bez pikli i ponownego ładowania z dysku),
+    więc proces od razu korzysta ze stron rodzica; rozgrzewka buduje leniwe explainery i przechodzi
+    po wszystkich modelach, zanim trafi pierwsze żądanie.
+    """
+    global _worker_models
+    from ml.batching import prediction_batcher
+    # wątek dyspozytora wsadów nie przechodzi przez fork; w procesie roboczym wiersze idą prosto do modelu
+    prediction_batcher.enabled = False
+    # Ctrl+C trafia do całej grupy procesów - sprzątaniem zajmuje się rodzic
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _worker_models = model_set
+    gc.freeze()
+
+    from ml.model_loader import VALIDATION_ROWS
+    for kind, model in model_set.models.items():
+        if model is None or kind not in VALIDATION_ROWS:
+            continue
+        model.predict(pd.DataFrame([VALIDATION_ROWS[kind]]))
+        model_set.explainer(kind)
+
+
+def _load_worker(models: Dict[str, Any], version: str):
+    """
+    Start procesu roboczego z forkservera (restart puli): modele przychodzą jako pikle i zestaw jest
+    składany na nowo, bo blokady i explainery rodzica nie przechodzą przez pikle. Tablice mapowane
+    z pliku (MODEL_SHARE_MODE) trafiają do procesu jako zwykłe kopie.
+    """
+    from ml.model_loader import make_model_set
+    _init_worker(make_model_set(models, version=version, lazy_explainers=True))
+
+
+def runtime_info() -> Dict[str, Any]:
+    """
+    Czy interpreter to build free-threaded i czy GIL jest faktycznie wyłączony. Import rozszerzenia C,
+    które nie deklaruje pracy bez GIL, włącza go z powrotem dla całego procesu (chyba że PYTHON_GIL=0).
+    """
+    return {
+        "python": platform.python_version(),
+        "free_threaded_build": bool(sysconfig.get_config_var("Py_GIL_DISABLED")),
+        "gil_enabled": sys._is_gil_enabled() if hasattr(sys, "_is_gil_enabled") else True,
+    }
+
+
+def _run_job(fn: Callable, args: tuple):
+    return fn(_worker_models, *args)
+
+
+def _ready() -> int:
+    return os.getpid()
+
+
+class InferencePool:
+    """
+    Predykcje i wyjaśnienia w puli procesów z modelami załadowanymi raz na proces (PREDICT_EXECUTOR=process).
+    Endpointy czekają asynchronicznie, więc praca modeli nie konkuruje o GIL z listami ogłoszeń i logowaniem.
+    Ponad max_pending zadań w toku kolejne dostają 503, zadanie dłuższe niż timeout - 504.
+    Po podmianie modeli (przeładowanie, rollback) pula startuje od nowa z nowym zestawem - wtedy już
+    przez forkserver, bo fork działającego serwera skopiowałby blokady trzymane przez jego wątki.
+
+    W trybie thread (domyślnym) zadanie wykonuje się w puli wątków FastAPI, jak dawne endpointy synchroniczne.
+    """
+
+    def __init__(self, mode: str = "thread", workers: int = 2, max_pending: int = 64, timeout_s: float = 30.0):
+        if mode not in ("thread", "process"):
+            raise ValueError(f"Nieznany tryb wykonywania predykcji: {mode} (dostępne: thread, process)")
+        self.mode = mode
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout_s = timeout_s
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.restarts = 0
+        self._in_flight = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._model_set = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode == "process"
+
+    def _spawn(self, model_set) -> ProcessPoolExecutor:
+        if threading.active_count() == 1:
+            # start serwera, zanim ruszą jego wątki: fork dziedziczy załadowane modele bez pikli
+            context, initializer, initargs = "fork", _init_worker, (model_set,)
+        else:
+            # działający serwer ma wątki (pętla, pule, harmonogram) - fork skopiowałby ich zajęte blokady
+            context, initializer, initargs = "forkserver", _load_worker, (model_set.models, model_set.version)
+        mp_context = multiprocessing.get_context(context)
+        if context == "forkserver":
+            # serwer forków importuje ciężkie moduły raz (bez startowania wątków), kolejne restarty są szybkie
+            mp_context.set_forkserver_preload(["app.inference", "ml.model_loader"])
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=mp_context,
+            initializer=initializer,
+            initargs=initargs,
+        )
+        # pula z forkiem uruchamia wszystkie procesy przy pierwszym zadaniu; czekamy, aż skończą rozgrzewkę
+        for future in [executor.submit(_ready) for _ in range(self.workers)]:
+            future.result()
+        return executor
+
+    def start(self, model_set):
+        if not self.enabled:
+            return
+        executor = self._spawn(model_set)
+        with self._lock:
+            old, self._executor, self._model_set = self._executor, executor, model_set
+        if old is not None:
+            # zadania w toku kończą się na starych modelach, jak przy ModelRegistry.current()
+            old.shutdown(wait=False)
+
+    def restart(self, model_set):
+        if not self.enabled:
+            return
+        self.start(model_set)
+        with self._lock:
+            self.restarts += 1
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _acquire(self):
+        with self._lock:
+            if self._in_flight >= self.max_pending:
+                self.rejected += 1
+                raise HTTPException(status_code=503, detail="Too many pending predictions", headers={"Retry-After": "1"})
+            self._in_flight += 1
+            return self._executor
+
+    def _release(self, future=None):
+        with self._lock:
+            self._in_flight -= 1
+            self.completed += 1
+
+    def _submit(self, executor: ProcessPoolExecutor, fn: Callable, args: tuple):
+        """
+        Zadanie w puli; miejsce w limicie max_pending zwalnia dopiero zakończenie zadania w procesie.
+        Po przekroczeniu czasu zadanie, które już się wykonuje, dalej zajmuje proces roboczy.
+        """
+        try:
+            future = executor.submit(_run_job, fn, args)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    async def run(self, fn: Callable, models, *args) -> Any:
+        """
+        fn(zestaw_modeli, *args) w procesie roboczym (albo w puli wątków z podanym zestawem `models`).
+        fn musi być funkcją z poziomu modułu, a argumenty i wynik - dać się zapiklować.
+        """
+        if not self.enabled:
+            return await run_in_threadpool(fn, models, *args)
+
+        executor = self._acquire()
+        if executor is None:
+            self._release()
+            raise HTTPException(status_code=503, detail="Inference workers not started")
+        future = self._submit(executor, fn, args)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout_s)
+        except asyncio.TimeoutError:
+            # anuluje tylko zadanie czekające w kolejce; wykonywane kończy się w procesie roboczym
+            future.cancel()
+            with self._lock:
+                self.timeouts += 1
+            raise HTTPException(status_code=504, detail="Prediction timed out")
+        except BrokenProcessPool:
+            # proces roboczy padł (np. OOM) - stawiamy pulę od nowa na tych samych modelach
+            threading.Thread(target=self._recover, args=(executor,), daemon=True).start()
+            raise HTTPException(status_code=503, detail="Inference workers restarting", headers={"Retry-After": "1"})
+
+    def run_sync(self, fn: Callable, models, *args) -> Any:
+        """Wersja blokująca dla wątków w tle (odroczone wyjaśnienia)."""
+        if not self.enabled:
+            return fn(models, *args)
+        executor = self._acquire()
+        if executor is None:
+            self._release()
+            raise RuntimeError("Procesy predykcji nie są uruchomione")
+        future = self._submit(executor, fn, args)
+        try:
+            return future.result(self.timeout_s)
+        except TimeoutError:
+            future.cancel()
+            with self._lock:
+                self.timeouts += 1
+            raise
+
+    def _recover(self, broken: ProcessPoolExecutor):
+        with self._lock:
+            if self._executor is not broken:
+                return
+            model_set = self._model_set
+        self.restart(model_set)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "workers": self.workers if self.enabled else None,
+                "max_pending": self.max_pending,
+                "timeout_s": self.timeout_s,
+                "in_flight": self._in_flight,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+                "restarts": self.restarts,
+                "model_version": self._model_set.version if self._model_set is not None else None,
+                "runtime": runtime_info(),
+            }
+
+
+inference_pool = InferencePool(
+    mode=os.getenv("PREDICT_EXECUTOR", "thread"),
+    workers=int(os.getenv("PREDICT_WORKERS", str(min(4, os.cpu_count() or 1)))),
+    max_pending=int(os.getenv("PREDICT_MAX_PENDING", "64")),
+    timeout_s=float(os.getenv("PREDICT_TIMEOUT_S", "30")),
+)
@@ -1,26 +1,50 @@
+import gc
+import os
+import threading
 import warnings
-import subprocess
-import sys
-from typing import Dict, Tuple, Any
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Literal, Optional, Tuple
 
 import pandas as pd
-from fastapi import FastAPI, HTTPException, Depends
+from pydantic import ValidationError
+from fastapi import FastAPI, HTTPException, Depends, Body, Query
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.db import create_db_and_tables, get_engine
+from app.db import create_db_and_tables, dispose_async_engine, get_engine
 from app.models.house import HouseInput
 from app.models.flat import FlatInput
 from app.models.plot import PlotInput
 from app.models.admin import AdminUser
 
-from ml.model_loader import load_models, ModelRegistry
-from ml.input_adapter import adapt_house_input, adapt_plot_input
+from ml.model_loader import (
+    load_model_set, load_models, build_explainer, promote_models, read_generation, rollback_model_files, ModelRegistry,
+)
+from ml.flat_components import compute_flat_components
+from ml.explanations import explanation_jobs
+from ml.prediction_cache import prediction_cache
+from ml.batching import prediction_batcher
+from ml.retraining import RetrainingJobs
+from ml.input_adapter import (
+    flat_row, house_row, plot_row,
+    adapt_flat_inputs, adapt_house_inputs, adapt_plot_inputs,
+)
+from app.admin_cache import admin_cache
 from app.auth import get_password_hash, require_admin
+from app.passwords import password_hasher
+from app.inference import inference_pool, runtime_info
 
 warnings.filterwarnings("ignore", category=UserWarning, module="sklearn")
 
 TOP_N_SHAP = 15
 
+# Tryb ładowania modeli przy wielu workerach uvicorna (ml.model_loader.SHARE_MODES):
+# none - każdy worker ma własną kopię, mmap/shm - workery mapują te same strony kompaktowych artefaktów
+MODEL_SHARE_MODE = os.getenv("MODEL_SHARE_MODE", "none")
+
+ExplainMode = Literal["none", "top", "full"]
+EXPLAIN_DESCRIPTION = "none - tylko cena, top - top_n cech SHAP, full - wszystkie cechy SHAP"
+DEFERRED_DESCRIPTION = "Zwraca cenę od razu, a wyjaśnienie liczy w tle (GET /predict/explanations/{id})"
+
 def clean_feature_name(name: str) -> str:
     return (
         name.replace("num__", "")
@@ -30,34 +54,52 @@ def clean_feature_name(name: str) -> str:
     )
 
 
-def compute_prediction_and_shap(pipeline, input_df: pd.DataFrame) -> Tuple[float, Dict[str, float]]:
-    """
-    Zwraca (predykcja, top_shap_dict). Jeśli nie da się policzyć SHAP, zwraca pusty dict.
-    """
-    prediction = pipeline.predict(input_df)[0]
-
+def get_preprocessor(pipeline):
     if not hasattr(pipeline, "named_steps"):
-        return round(float(prediction), 2), {}
-
+        return None
     # różne możliwe nazwy kroków w pipeline
-    preprocessor = (
+    return (
         pipeline.named_steps.get("preprocessing")
         or pipeline.named_steps.get("preprocessor")
         or pipeline.named_steps.get("preprocess")
     )
-    model = pipeline.named_steps.get("model")
 
-    if preprocessor is None or model is None:
-        return round(float(prediction), 2), {}
 
-    # SHAP ma sens głównie dla modeli drzewiastych
-    if not hasattr(model, "estimators_") and not hasattr(model, "tree_") and not hasattr(model, "get_booster"):
-        return round(float(prediction), 2), {}
+def compute_prediction(pipeline, input_df: pd.DataFrame) -> float:
+    return round(float(pipeline.predict(input_df)[0]), 2)
+
+
+def compute_row_prediction(pipeline, row: Dict[str, Any], encoder=None) -> float:
+    """
+    Cena dla wiersza po adaptacji wejścia. Z koderem cech (ModelSet.encoder) wiersz trafia prosto
+    do kroku "model" jako wektor NumPy, bez DataFrame i ColumnTransformera.
+    """
+    if encoder is None:
+        return compute_prediction(pipeline, pd.DataFrame([row]))
+    return round(float(pipeline.named_steps["model"].predict(encoder.encode(row))[0]), 2)
 
-    try:
-        import shap  # lazy import, żeby nie spowalniać startu API
-    except Exception:
-        return round(float(prediction), 2), {}
+
+def predict_price(models, kind: str, row: Dict[str, Any]) -> float:
+    """Cena z aktywnego zestawu modeli; przy PREDICT_BATCHING=1 wiersz czeka na wspólny wsad z innymi żądaniami."""
+    if prediction_batcher.enabled:
+        return round(prediction_batcher.predict(models.model(kind), models.encoder(kind), row), 2)
+    return compute_row_prediction(models.model(kind), row, models.encoder(kind))
+
+
+def compute_shap(pipeline, input_df: pd.DataFrame, explainer=None, top_n: Optional[int] = TOP_N_SHAP) -> Dict[str, float]:
+    """
+    Zwraca top_n największych (co do modułu) wartości SHAP albo wszystkie, gdy top_n=None.
+    Jeśli nie da się policzyć SHAP, zwraca pusty dict.
+    explainer to TreeExplainer zbudowany przy ładowaniu modeli (ModelRegistry); gdy go brak, jest budowany na miejscu.
+    """
+    preprocessor = get_preprocessor(pipeline)
+    if preprocessor is None:
+        return {}
+
+    if explainer is None:
+        explainer = build_explainer(pipeline)
+    if explainer is None:
+        return {}
 
     X_transformed = preprocessor.transform(input_df)
 
@@ -68,9 +110,8 @@ def compute_prediction_and_shap(pipeline, input_df: pd.DataFrame) -> Tuple[float
         feature_names = preprocessor.get_feature_names_out()
     except Exception:
         # fallback, jeśli preprocessor nie ma feature names
-        return round(float(prediction), 2), {}
+        return {}
 
-    explainer = shap.TreeExplainer(model)
     shap_values = explainer.shap_values(X_transformed)
 
     # shap_values może być listą albo tablicą
@@ -85,23 +126,61 @@ def compute_prediction_and_shap(pipeline, input_df: pd.DataFrame) -> Tuple[float
         for i in range(len(feature_names))
     }
 
-    shap_top = dict(
-        sorted(shap_dict.items(), key=lambda x: abs(x[1]), reverse=True)[:TOP_N_SHAP]
+    return dict(
+        sorted(shap_dict.items(), key=lambda x: abs(x[1]), reverse=True)[:top_n]
     )
 
-    return round(float(prediction), 2), shap_top
 
+def compute_prediction_and_shap(pipeline, input_df: pd.DataFrame, explainer=None, top_n: Optional[int] = TOP_N_SHAP) -> Tuple[float, Dict[str, float]]:
+    """
+    Zwraca (predykcja, top_shap_dict). Jeśli nie da się policzyć SHAP, zwraca pusty dict.
+    """
+    return compute_prediction(pipeline, input_df), compute_shap(pipeline, input_df, explainer, top_n)
 
-def _force_single_thread_for_flat():
-    try:
-        model = ModelRegistry.flat_model
-        if model and hasattr(model, "named_steps") and "model" in model.named_steps:
-            inner = model.named_steps["model"]
-            if hasattr(inner, "n_jobs"):
-                inner.n_jobs = 1
-                print("Model FLAT przestawiony na tryb API (n_jobs=1)")
-    except Exception as e:
-        print(f"Nie udało się przestawić n_jobs: {e}")
+
+def explain_row(models, kind: str, row: Dict[str, Any], limit: Optional[int], cena: float) -> Dict[str, Any]:
+    """Wyjaśnienie SHAP (a dla mieszkań także komponenty ceny) dla wiersza po adaptacji wejścia."""
+    pipeline = models.model(kind)
+    input_df = pd.DataFrame([row])
+    explanation = {"shap_values": compute_shap(pipeline, input_df, models.explainer(kind), limit)}
+    if kind == "flat":
+        explanation["components"] = compute_flat_components(pipeline, input_df, cena)
+    return explanation
+
+
+def predict_job(models, kind: str, row: Dict[str, Any], explain: str, limit: Optional[int]) -> Tuple[float, Dict[str, Any], str]:
+    """
+    Cena, wyjaśnienie (puste dla explain=none) i wersja modeli, na której je policzono.
+    Wykonywane przez app.inference: w puli wątków albo w procesie roboczym z własną kopią modeli.
+    """
+    cena = predict_price(models, kind, row)
+    explanation = {} if explain == "none" else explain_row(models, kind, row, limit, cena)
+    return cena, explanation, models.version
+
+
+async def run_prediction(models, kind: str, row: Dict[str, Any], explain: str, limit: Optional[int],
+                         deferred: bool) -> Tuple[float, Dict[str, Any], str]:
+    cena, explanation, version = await inference_pool.run(
+        predict_job, models, kind, row, "none" if deferred else explain, limit
+    )
+    if deferred:
+        explanation = explain_response(
+            lambda: inference_pool.run_sync(explain_row, models, kind, row, limit, cena), explain, deferred
+        )
+    return cena, explanation, version
+
+
+def explain_response(explain_fn: Callable[[], Dict[str, Any]], explain: str, deferred: bool) -> Dict[str, Any]:
+    """
+    Pola wyjaśnienia do odpowiedzi: nic (explain=none), wynik explain_fn()
+    albo identyfikator zadania liczonego w tle (deferred).
+    """
+    if explain == "none":
+        return {}
+    if deferred:
+        explanation_id = explanation_jobs.submit(explain_fn)
+        return {"explanation_id": explanation_id, "explanation_status": "pending"}
+    return explain_fn()
 
 
 def create_admin_user():
@@ -141,6 +220,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Routery
@@ -160,9 +240,27 @@ app.include_router(admin_listings_router)
 @app.on_event("startup")
 def startup_event():
     create_db_and_tables()
-    load_models()
-    _force_single_thread_for_flat()
+    model_set = load_models(share_mode=MODEL_SHARE_MODE)
+    if MODEL_SHARE_MODE != "none":
+        # obiekty z ładowania trafiają do stałej generacji GC, więc GC nie dotyka ich stron (przyjazne dla CoW)
+        gc.freeze()
+    # PREDICT_EXECUTOR=process: procesy robocze forkowane z już załadowanymi modelami
+    inference_pool.start(model_set)
+    runtime = runtime_info()
+    if runtime["free_threaded_build"] and runtime["gil_enabled"]:
+        print("Build free-threaded, ale GIL został włączony przez rozszerzenie C - predykcje w wątkach "
+              "nie będą równoległe. PYTHON_GIL=0 wymusza pracę bez GIL.")
     create_admin_user()
+    # wątek po starcie puli procesów: fork w inference_pool.start ma się odbyć, zanim ruszą inne wątki
+    threading.Thread(target=model_sync_loop, name="model-sync", daemon=True).start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    model_sync_stop.set()
+    retraining_jobs.shutdown()
+    inference_pool.shutdown()
+    await dispose_async_engine()
 
 
 @app.get("/")
@@ -175,31 +273,66 @@ def get_api_status():
     return {"message": "API działa poprawnie", "version": "v1"}
 
 
+@app.get("/api/v1/metrics")
+def get_api_metrics():
+    return {
+        "prediction_cache": prediction_cache.stats(),
+        "admin_principal_cache": admin_cache.stats(),
+        "password_hashing": password_hasher.stats(),
+        "prediction_batching": prediction_batcher.stats(),
+        "inference": inference_pool.stats(),
+    }
+
+
 @app.post(
     "/predict/house",
     summary="Predykcja ceny domu",
     description="Zwraca przewidywaną cenę domu oraz najważniejsze cechy wpływające na predykcję (SHAP)."
 )
-def predict_house(data: HouseInput):
-    pipeline = ModelRegistry.house_model
+async def predict_house(
+    data: HouseInput,
+    explain: ExplainMode = Query(default="top", description=EXPLAIN_DESCRIPTION),
+    top_n: int = Query(default=TOP_N_SHAP, ge=1, description="Liczba cech SHAP dla explain=top"),
+    deferred: bool = Query(default=False, description=DEFERRED_DESCRIPTION),
+):
+    models = ModelRegistry.current()
+    pipeline = models.model("house")
     if pipeline is None:
         raise HTTPException(status_code=503, detail="House model not loaded")
 
-    input_df = adapt_house_input(data)
+    row = house_row(data)
+    limit = top_n if explain == "top" else None
+
+    # odroczone wyjaśnienia omijają cache (odpowiedź zawiera id zadania w tle)
+    cache_key = None
+    if not deferred:
+        cache_key = prediction_cache.make_key("house", models.version, row, explain, limit)
+        cached = prediction_cache.get(cache_key)
+        if cached is not None:
+            return cached
 
     try:
-        cena, shap_values = compute_prediction_and_shap(pipeline, input_df)
+        cena, explanation, version = await run_prediction(models, "house", row, explain, limit, deferred)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
     margin = 0.05
-    return {
+    response = {
         "cena": cena,
         "price_min": round(cena * (1 - margin), 2),
         "price_max": round(cena * (1 + margin), 2),
-        "shap_values": shap_values,
-        "type": "house"
+        "shap_values": {},
+        "type": "house",
+        "model_version": version,
+        **explanation
     }
+    # proces roboczy w trakcie restartu puli może jeszcze liczyć starym zestawem - takiej odpowiedzi
+    # nie zapisujemy pod kluczem wersji z ModelRegistry
+    if cache_key and version == models.version:
+        prediction_cache.set(cache_key, response)
+    return response
 
 
 @app.post(
@@ -207,208 +340,55 @@ def predict_house(data: HouseInput):
     summary="Predykcja ceny mieszkania",
     description="Zwraca przewidywaną cenę mieszkania oraz najważniejsze cechy wpływające na predykcję (SHAP)."
 )
-def predict_flat(data: FlatInput):
-    model = ModelRegistry.flat_model
+async def predict_flat(
+    data: FlatInput,
+    explain: ExplainMode = Query(default="top", description=EXPLAIN_DESCRIPTION),
+    top_n: int = Query(default=TOP_N_SHAP, ge=1, description="Liczba cech SHAP dla explain=top"),
+    deferred: bool = Query(default=False, description=DEFERRED_DESCRIPTION),
+):
+    models = ModelRegistry.current()
+    model = models.model("flat")
     if model is None:
         raise HTTPException(status_code=503, detail="Flat model not loaded")
 
-    input_data = data.dict()
-    input_df = pd.DataFrame([input_data])
-
-    rename_dict = {
-        "year": "year_built",
-        "totalFloors": "floors_in_building",
-        "buildType": "building_type",
-        "material": "building_material",
-        "constructionStatus": "finishing",
-        "hasLift": "elevator",
-        "hasOutdoor": "balcony/garden",
-        "hasParking": "parking",
-        "province": "region"
-    }
-    input_df = input_df.rename(columns=rename_dict)
-
-    if "city" in input_df.columns:
-        input_df["city"] = input_df["city"].astype(str).str.strip().str.lower()
-
-    current_floor_int = input_data["floor"]
-    if current_floor_int > 10:
-        input_df["floor"] = "higher_10"
-    else:
-        input_df["floor"] = str(current_floor_int)
-
-    value_translation_map = {
-        
-        "district": "urban",
-        "gas": "gas",
-        "electric": "electrical",
-        "boiler": "boiler_room",
-
-        
-        "primary": "PRIMARY",
-        "secondary": "SECONDARY",
-
-       
-        "block": "block",
-        "tenement": "tenement",
-        "apartment": "apartment",
-        "house": "house",
-
-        
-        "brick": "brick",
-        "concrete_plate": "concrete_plate",
-        "concrete": "concrete",
-        "silikat": "silikat",
-        "breezeblock": "breezeblock",
-
-        
-        "ready_to_use": "ready_to_use",
-        "to_completion": "to_completion",
-        "to_renovation": "to_renovation",
-    }
-
-    cols_to_translate = ["heating", "market", "building_type", "building_material", "finishing"]
-    for col in cols_to_translate:
-        if col in input_df.columns:
-            val = input_df.iloc[0][col]
-            if val in value_translation_map:
-                input_df.at[0, col] = value_translation_map[val]
+    row = flat_row(data)
+    limit = top_n if explain == "top" else None
 
-    for col in ["elevator", "balcony/garden", "parking"]:
-        if col in input_df.columns:
-            input_df[col] = input_df[col].astype(int)
+    # odroczone wyjaśnienia omijają cache (odpowiedź zawiera id zadania w tle)
+    cache_key = None
+    if not deferred:
+        cache_key = prediction_cache.make_key("flat", models.version, row, explain, limit)
+        cached = prediction_cache.get(cache_key)
+        if cached is not None:
+            return cached
 
     try:
-        cena, shap_values = compute_prediction_and_shap(model, input_df)
+        cena, explanation, version = await run_prediction(models, "flat", row, explain, limit, deferred)
         base_prediction = cena
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Błąd predykcji: {e}")
-        print("Dane wejściowe do modelu:", input_df.to_dict(orient="records"))
+        print("Dane wejściowe do modelu:", [row])
         raise HTTPException(status_code=500, detail=f"Błąd modelu: {str(e)}")
 
-    components = []
-
-    def check_diff(col_name: str, target_val: Any, label_text: str):
-        if col_name not in input_df.columns:
-            return
-
-        temp_df = input_df.copy()
-        temp_df.at[0, col_name] = target_val
-
-        try:
-            new_price = model.predict(temp_df)[0]
-            diff = base_prediction - new_price
-            if abs(diff) > 0:
-                components.append({"name": label_text, "value": round(float(diff), 2)})
-        except Exception:
-            pass
-
-    
-    curr_heat = input_df.iloc[0]["heating"]
-    if curr_heat == "urban":
-        check_diff("heating", "electrical", "Ogrzewanie miejskie")
-    elif curr_heat == "electrical":
-        check_diff("heating", "urban", "Ogrzewanie elektryczne")
-    else:
-        check_diff("heating", "urban", "Ogrzewanie")
-
-    
-    curr_market = input_df.iloc[0]["market"]
-    if curr_market == "PRIMARY":
-        check_diff("market", "SECONDARY", "Rynek pierwotny")
-    else:
-        check_diff("market", "PRIMARY", "Rynek wtórny")
-
-    
-    curr_fin = input_df.iloc[0]["finishing"]
-    if curr_fin == "ready_to_use":
-        check_diff("finishing", "to_renovation", "Stan: pod klucz")
-    elif curr_fin == "to_renovation":
-        check_diff("finishing", "ready_to_use", "Stan: do remontu")
-    else:
-        check_diff("finishing", "ready_to_use", "Stan deweloperski")
-
-    
-    curr_mat = input_df.iloc[0]["building_material"]
-    mat_pl_names = {
-        "brick": "Cegła",
-        "concrete": "Beton",
-        "silikat": "Silikat",
-        "breezeblock": "Pustak",
-        "concrete_plate": "Wielka Płyta",
-        "other": "Inny"
-    }
-    label_mat = mat_pl_names.get(curr_mat, str(curr_mat))
-
-    if curr_mat == "concrete_plate":
-        check_diff("building_material", "brick", "Materiał: Wielka Płyta")
-    else:
-        check_diff("building_material", "concrete_plate", f"Materiał: {label_mat}")
-
-    
-    curr_floor_str = input_df.iloc[0]["floor"]
-    has_elevator = input_df.iloc[0]["elevator"]
-    optimal_floors = ["1", "2", "3"]
-
-    if curr_floor_str == "0":
-        check_diff("floor", "3", "Położenie: Parter")
-    elif curr_floor_str in optimal_floors:
-        check_diff("floor", "0", f"Piętro {curr_floor_str} (vs Parter)")
-    elif curr_floor_str in [str(i) for i in range(4, 11)]:
-        if has_elevator == 0:
-            check_diff("floor", "1", f"Piętro {curr_floor_str} bez windy")
-        else:
-            check_diff("floor", "0", f"Piętro {curr_floor_str} (z widokiem)")
-    elif curr_floor_str == "higher_10":
-        check_diff("floor", "3", "Apartament na szczycie (>10p)")
-
-    
-    curr_type = input_df.iloc[0]["building_type"]
-    if curr_type == "apartment":
-        check_diff("building_type", "block", "Typ: Apartamentowiec")
-    elif curr_type == "tenement":
-        check_diff("building_type", "block", "Typ: Kamienica")
-    elif curr_type == "house":
-        check_diff("building_type", "block", "Typ: Dom wielorodzinny")
-    elif curr_type == "block":
-        check_diff("building_type", "apartment", "Typ: Blok (vs Apartament)")
-
-    
-    curr_year = input_df.iloc[0]["year_built"]
-    if curr_year < 1945:
-        era_label = "Kamienica/Przedwojenne"
-    elif 1945 <= curr_year <= 1989:
-        era_label = "Budownictwo PRL"
-    elif 1990 <= curr_year <= 2012:
-        era_label = "Lata 90/2000"
-    else:
-        era_label = "Nowe Budownictwo"
-
-    is_modern = curr_year > 2012
-    if is_modern:
-        check_diff("year_built", 1980, f"Rok: {int(curr_year)} ({era_label})")
-    else:
-        check_diff("year_built", 2024, f"Rok: {int(curr_year)} ({era_label})")
-
-    if input_df.iloc[0]["elevator"] == 1:
-        check_diff("elevator", 0, "Winda")
-    if input_df.iloc[0]["balcony/garden"] == 1:
-        check_diff("balcony/garden", 0, "Balkon/Taras/Ogród")
-    if input_df.iloc[0]["parking"] == 1:
-        check_diff("parking", 0, "Miejsce parkingowe")
-
-    components.sort(key=lambda x: abs(x["value"]), reverse=True)
-
     margin = 0.05
-    return {
+    response = {
         "cena": cena,
-        "shap_values": shap_values,
+        "shap_values": {},
         "type": "flat",
+        "model_version": version,
         "predicted_price": round(float(base_prediction), 2),
         "price_min": round(float(base_prediction * (1 - margin)), 2),
         "price_max": round(float(base_prediction * (1 + margin)), 2),
-        "components": components
+        "components": [],
+        **explanation
     }
+    # proces roboczy w trakcie restartu puli może jeszcze liczyć starym zestawem - takiej odpowiedzi
+    # nie zapisujemy pod kluczem wersji z ModelRegistry
+    if cache_key and version == models.version:
+        prediction_cache.set(cache_key, response)
+    return response
 
 
 @app.post(
@@ -416,36 +396,258 @@ def predict_flat(data: FlatInput):
     summary="Predykcja ceny działki",
     description="Zwraca przewidywaną cenę działki oraz najważniejsze cechy wpływające na predykcję (SHAP)."
 )
-def predict_plot(data: PlotInput):
-    pipeline = ModelRegistry.plot_model
+async def predict_plot(
+    data: PlotInput,
+    explain: ExplainMode = Query(default="top", description=EXPLAIN_DESCRIPTION),
+    top_n: int = Query(default=TOP_N_SHAP, ge=1, description="Liczba cech SHAP dla explain=top"),
+    deferred: bool = Query(default=False, description=DEFERRED_DESCRIPTION),
+):
+    models = ModelRegistry.current()
+    pipeline = models.model("plot")
     if pipeline is None:
         raise HTTPException(status_code=503, detail="Plot model not loaded")
 
-    input_df = adapt_plot_input(data)
+    row = plot_row(data)
+    limit = top_n if explain == "top" else None
+
+    # odroczone wyjaśnienia omijają cache (odpowiedź zawiera id zadania w tle)
+    cache_key = None
+    if not deferred:
+        cache_key = prediction_cache.make_key("plot", models.version, row, explain, limit)
+        cached = prediction_cache.get(cache_key)
+        if cached is not None:
+            return cached
 
     try:
-        cena, shap_values = compute_prediction_and_shap(pipeline, input_df)
+        cena, explanation, version = await run_prediction(models, "plot", row, explain, limit, deferred)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
     margin = 0.05
-    return {
+    response = {
         "cena": cena,
         "price_min": round(cena * (1 - margin), 2),
         "price_max": round(cena * (1 + margin), 2),
-        "shap_values": shap_values,
-        "type": "plot"
+        "shap_values": {},
+        "type": "plot",
+        "model_version": version,
+        **explanation
+    }
+    # proces roboczy w trakcie restartu puli może jeszcze liczyć starym zestawem - takiej odpowiedzi
+    # nie zapisujemy pod kluczem wersji z ModelRegistry
+    if cache_key and version == models.version:
+        prediction_cache.set(cache_key, response)
+    return response
+
+
+@app.get(
+    "/predict/explanations/{explanation_id}",
+    summary="Odroczone wyjaśnienie predykcji",
+    description="Zwraca status i wynik wyjaśnienia SHAP zleconego przez deferred=true."
+)
+def get_explanation(explanation_id: str):
+    job = explanation_jobs.get(explanation_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Explanation not found")
+
+    response = {"explanation_id": job["id"], "explanation_status": job["status"]}
+    if job["status"] == "done":
+        response.update(job["result"])
+    elif job["status"] == "failed":
+        response["error"] = job["error"]
+    return response
+
+
+MAX_BATCH_SIZE = 5000
+
+
+def _validation_errors(exc: ValidationError):
+    return [
+        {"loc": list(err["loc"]), "msg": err["msg"], "type": err["type"]}
+        for err in exc.errors()
+    ]
+
+
+def predict_batch(pipeline, model_version: str, items: List[Dict[str, Any]], input_model, adapter, property_type: str):
+    """
+    Waliduje każdy element osobno, a wszystkie poprawne wiersze wycenia jednym wywołaniem predict.
+    """
+    if len(items) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(items)} items (max {MAX_BATCH_SIZE})"
+        )
+
+    results: List[Dict[str, Any]] = [{} for _ in items]
+    valid_inputs = []
+    valid_indices = []
+
+    for i, raw in enumerate(items):
+        try:
+            valid_inputs.append(input_model(**raw))
+            valid_indices.append(i)
+        except ValidationError as e:
+            results[i] = {"index": i, "errors": _validation_errors(e)}
+
+    if valid_inputs:
+        input_df = adapter(valid_inputs)
+        try:
+            predictions = pipeline.predict(input_df)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+        margin = 0.05
+        for i, prediction in zip(valid_indices, predictions):
+            cena = round(float(prediction), 2)
+            results[i] = {
+                "index": i,
+                "cena": cena,
+                "price_min": round(cena * (1 - margin), 2),
+                "price_max": round(cena * (1 + margin), 2),
+            }
+
+    return {
+        "type": property_type,
+        "model_version": model_version,
+        "count": len(items),
+        "errors_count": len(items) - len(valid_inputs),
+        "results": results,
     }
 
 
-@app.post("/admin/retrain")
+@app.post(
+    "/predict/house/batch",
+    summary="Wsadowa predykcja cen domów",
+    description="Wycenia listę domów jednym wywołaniem modelu. Błędy walidacji są zwracane osobno dla każdego elementu."
+)
+def predict_house_batch(items: List[Dict[str, Any]] = Body(...)):
+    models = ModelRegistry.current()
+    pipeline = models.model("house")
+    if pipeline is None:
+        raise HTTPException(status_code=503, detail="House model not loaded")
+    return predict_batch(pipeline, models.version, items, HouseInput, adapt_house_inputs, "house")
+
+
+@app.post(
+    "/predict/flat/batch",
+    summary="Wsadowa predykcja cen mieszkań",
+    description="Wycenia listę mieszkań jednym wywołaniem modelu. Błędy walidacji są zwracane osobno dla każdego elementu."
+)
+def predict_flat_batch(items: List[Dict[str, Any]] = Body(...)):
+    models = ModelRegistry.current()
+    pipeline = models.model("flat")
+    if pipeline is None:
+        raise HTTPException(status_code=503, detail="Flat model not loaded")
+    return predict_batch(pipeline, models.version, items, FlatInput, adapt_flat_inputs, "flat")
+
+
+@app.post(
+    "/predict/plot/batch",
+    summary="Wsadowa predykcja cen działek",
+    description="Wycenia listę działek jednym wywołaniem modelu. Błędy walidacji są zwracane osobno dla każdego elementu."
+)
+def predict_plot_batch(items: List[Dict[str, Any]] = Body(...)):
+    models = ModelRegistry.current()
+    pipeline = models.model("plot")
+    if pipeline is None:
+        raise HTTPException(status_code=503, detail="Plot model not loaded")
+    return predict_batch(pipeline, models.version, items, PlotInput, adapt_plot_inputs, "plot")
+
+
+@app.post("/admin/retrain", status_code=202)
 def retrain_models(admin: AdminUser = Depends(require_admin)):
-    run_retraining()
-    return {"status": "Modele wytrenowane i załadowane ponownie"}
+    job = retraining_jobs.enqueue()
+    return {"status": "Uczenie modeli zlecone", "job_id": job["id"], "job_status": job["status"]}
+
+
+@app.get("/admin/retrain/{job_id}")
+def get_retrain_job(job_id: str, admin: AdminUser = Depends(require_admin)):
+    job = retraining_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Retraining job not found")
+    return job
+
+
+@app.get("/admin/models")
+def get_model_versions(admin: AdminUser = Depends(require_admin)):
+    previous = ModelRegistry.previous()
+    return {
+        "active": ModelRegistry.current().info(),
+        "previous": previous.info() if previous else None,
+    }
+
+
+@app.post("/admin/models/rollback")
+def rollback_models(admin: AdminUser = Depends(require_admin)):
+    try:
+        # podmiana plików i generation.json - pozostałe workery cofają się same w sync_models
+        rollback_model_files()
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    model_set = sync_models()
+    return {"status": "Przywrócono poprzednią wersję modeli", "model_version": model_set.version}
+
+
+def reload_models():
+    model_set = load_models(share_mode=MODEL_SHARE_MODE)
+    inference_pool.restart(model_set)
+    prediction_cache.clear()
+    return model_set
+
+
+_sync_lock = threading.Lock()
+_failed_versions = set()
+
+
+def sync_models():
+    """
+    Dogania wersję modeli z models/generation.json (nowe uczenie albo rollback zlecony w dowolnym workerze).
+    Rollback do zestawu trzymanego w pamięci jest natychmiastowy; w pozostałych przypadkach modele
+    są ładowane z dysku. Wersja, której nie udało się załadować, nie jest ponawiana.
+    """
+    with _sync_lock:
+        generation = read_generation()
+        current = ModelRegistry.current()
+        if generation is None or generation["version"] in (current.version, *_failed_versions):
+            return current
+
+        previous = ModelRegistry.previous()
+        if previous is not None and previous.version == generation["version"]:
+            model_set = ModelRegistry.rollback()
+            inference_pool.restart(model_set)
+            prediction_cache.clear()
+            return model_set
+        try:
+            return reload_models()
+        except Exception as e:
+            print(f"Nie udało się załadować modeli w wersji {generation['version']}: {e}")
+            _failed_versions.add(generation["version"])
+            return current
+
+
+def publish_models(staging_dir: Path):
+    """Komplet z uczenia: sprawdzenie (ładowanie i wiersze kontrolne), przeniesienie do models, przeładowanie."""
+    # niepoprawny model przerywa zadanie, zanim cokolwiek trafi do katalogu obsługującego ruch
+    load_model_set(staging_dir)
+    promote_models(staging_dir)
+    return sync_models()
+
+
+# co ile sekund worker sprawdza wersję modeli i kolejkę uczenia
+MODEL_SYNC_INTERVAL_S = float(os.getenv("MODEL_SYNC_INTERVAL_S", "5"))
+model_sync_stop = threading.Event()
+
+
+def model_sync_loop():
+    while not model_sync_stop.wait(MODEL_SYNC_INTERVAL_S):
+        try:
+            retraining_jobs.poll()
+            sync_models()
+        except Exception as e:
+            print("Błąd synchronizacji modeli:", e)
 
 
-def run_retraining():
-    subprocess.run([sys.executable, "ml/train_flats.py"], check=True)
-    subprocess.run([sys.executable, "ml/train_houses.py"], check=True)
-    subprocess.run([sys.executable, "ml/train_plots.py"], check=True)
-    load_models()
+# np. RETRAIN_CRON="0 3 * * *" - codzienne uczenie o 3:00 (harmonogram działa tylko w procesie prowadzącym)
+retraining_jobs = RetrainingJobs(on_success=publish_models, cron=os.getenv("RETRAIN_CRON"))
@@ -0,0 +1,21 @@
+from typing import List, Literal, Optional
+from pydantic import BaseModel, Field
+
+
+class BulkAction(BaseModel):
+    """Wybór ogłoszeń dla akcji masowych: lista id albo filtry (all=True wybiera wszystkie ogłoszenia typu)."""
+    ids: Optional[List[int]] = Field(default=None, max_length=100000)
+    status: Optional[Literal["active", "inactive"]] = None
+    is_verified: Optional[bool] = None
+    city: Optional[str] = None
+    province: Optional[str] = None
+    price_min: Optional[float] = None
+    price_max: Optional[float] = None
+    all: bool = False
+
+    # stan docelowy dla verify (is_verified) i deactivate (nieaktywne = True)
+    value: bool = True
+
+    def has_selection(self) -> bool:
+        filters = [self.status, self.is_verified, self.city, self.province, self.price_min, self.price_max]
+        return self.all or self.ids is not None or any(f is not None for f in filters)
@@ -1,17 +1,29 @@
 from typing import Optional
 from datetime import datetime
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field
 
 class FlatListing(SQLModel, table=True):
+    # kolejność publicznej listy (app/routers/pagination.py) i filtry po mieście/województwie;
+    # INCLUDE pozwala PostgreSQL sprawdzać filtry zakresowe bez czytania tabeli
+    __table_args__ = (
+        Index("ix_flatlisting_feed", "is_active", "is_verified", "created_at", "id",
+              postgresql_include=["price_offer", "area", "rooms"]),
+        Index("ix_flatlisting_city_feed", "city", "is_active", "is_verified", "created_at", "id",
+              postgresql_include=["price_offer", "area", "rooms"]),
+        Index("ix_flatlisting_province_feed", "province", "is_active", "is_verified", "created_at", "id",
+              postgresql_include=["price_offer", "area", "rooms"]),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
 
     title: str
     description: str = ""
-    price_offer: float
+    price_offer: float = Field(index=True)
     phone_number: str = ""
     photos_url: str = ""
 
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
     is_active: bool = True
 
     is_verified: bool = False
@@ -0,0 +1,71 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict
+
+import bcrypt
+from fastapi import HTTPException
+
+
+class PasswordHasher:
+    """
+    bcrypt w osobnej, ograniczonej puli wątków. bcrypt zwalnia GIL, więc wątki wystarczają,
+    a pętla zdarzeń i pula wątków FastAPI (endpointy synchroniczne, np. predykcje) nie czekają na logowania.
+    Ponad max_pending równoczesnych operacji kolejne dostają od razu 503 zamiast ustawiać się w kolejce.
+    """
+
+    def __init__(self, rounds: int = 12, workers: int = 2, max_pending: int = 32):
+        self.rounds = rounds
+        self.workers = workers
+        self.max_pending = max_pending
+        self.completed = 0
+        self.rejected = 0
+        self._in_flight = 0
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+
+    def hash_sync(self, password: str) -> str:
+        salt = bcrypt.gensalt(rounds=self.rounds)
+        return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
+
+    @staticmethod
+    def verify_sync(password: str, hashed_password: str) -> bool:
+        return bcrypt.checkpw(password.encode("utf-8"), hashed_password.encode("utf-8"))
+
+    async def _run(self, fn, *args):
+        with self._lock:
+            if self._in_flight >= self.max_pending:
+                self.rejected += 1
+                raise HTTPException(status_code=503, detail="Too many concurrent logins", headers={"Retry-After": "1"})
+            self._in_flight += 1
+        try:
+            return await asyncio.wrap_future(self._pool.submit(fn, *args))
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self.completed += 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.hash_sync, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(self.verify_sync, password, hashed_password)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "rounds": self.rounds,
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "in_flight": self._in_flight,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+
+
+password_hasher = PasswordHasher(
+    rounds=int(os.getenv("BCRYPT_ROUNDS", "12")),
+    workers=int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1)))),
+    max_pending=int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32")),
+)
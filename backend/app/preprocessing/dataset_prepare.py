@@ -63,6 +63,8 @@ def rename_columns(df):
 
 def clean_domy():
     df = pd.read_csv("otodom_domy.csv")
+    # scrapery dopisują zmienione ogłoszenia na końcu pliku - zostaje najnowsza wersja
+    df = df.drop_duplicates(subset="link", keep="last")
 
     df["Cena"] = df["Cena"].apply(clean_price)
     df["Powierzchnia domu"] = df["Powierzchnia domu"].apply(clean_area)
@@ -79,6 +81,8 @@ def clean_domy():
 
 def clean_mieszkania():
     df = pd.read_csv("otodom_mieszkania.csv")
+    # scrapery dopisują zmienione ogłoszenia na końcu pliku - zostaje najnowsza wersja
+    df = df.drop_duplicates(subset="link", keep="last")
 
     df["Cena"] = df["Cena"].apply(clean_price)
     df["Powierzchnia"] = df["Powierzchnia"].apply(clean_area)
@@ -95,6 +99,8 @@ def clean_mieszkania():
 
 def clean_dzialki():
     df = pd.read_csv("otodom_dzialki.csv")
+    # scrapery dopisują zmienione ogłoszenia na końcu pliku - zostaje najnowsza wersja
+    df = df.drop_duplicates(subset="link", keep="last")
 
     df["Cena"] = df["Cena"].apply(clean_price)
     df["Powierzchnia"] = df["Powierzchnia"].apply(clean_area)
@@ -1,10 +1,18 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlmodel import Session, select, delete
+import csv
+import io
+import json
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import asc, desc, literal, union_all, update
+from sqlmodel import select, delete
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.db import get_session
+from app.db import get_async_session
 from app.auth import require_admin
 from app.models.admin import AdminUser
+from app.models.bulk import BulkAction
+from app.routers.listing_import import import_listings
 
 router = APIRouter(prefix="/admin/listings", tags=["Admin Listings"])
 
@@ -23,21 +31,45 @@ def get_model_class(type_name: str):
     return getattr(module, class_name)
 
 
-@router.get("")
-def list_listings(
-    type: str = Query(default="all", description="Filter by type: flat, house, plot, or all"),
-    status: Optional[str] = Query(default=None, description="Filter by status: active, inactive"),
-    is_verified: Optional[bool] = Query(default=None, description="Filter by verification status"),
-    admin: AdminUser = Depends(require_admin),
-    session: Session = Depends(get_session),
-):
-    results = []
+# kolumny tabeli w panelu admina; każda gałąź UNION ALL wybiera tylko je
+OVERVIEW_COLUMNS = ["id", "type", "title", "price", "city", "is_verified", "is_active", "created_at"]
+SORT_FIELDS = {"created_at", "price", "title", "city", "id"}
+DEFAULT_ADMIN_PAGE_SIZE = 100
+MAX_ADMIN_PAGE_SIZE = 1000
+STREAM_CHUNK = 1000
 
-    types_to_query = ["flat", "house", "plot"] if type == "all" else [type]
 
-    for t in types_to_query:
+def overview_query(
+    types: List[str],
+    status: Optional[str],
+    is_verified: Optional[bool],
+    city: Optional[str],
+    q: Optional[str],
+    price_min: Optional[float],
+    price_max: Optional[float],
+    sort: str = "created_at",
+    order: str = "desc",
+    top_n: Optional[int] = None,
+):
+    """
+    Jedno zapytanie UNION ALL po tabelach ogłoszeń z filtrami dodanymi w każdej gałęzi (tam działają indeksy).
+    top_n (offset + limit strony) przycina każdą gałąź już posortowaną, więc zewnętrzne sortowanie
+    scala najwyżej len(types) * top_n wierszy zamiast całych tabel.
+    """
+    direction = desc if order == "desc" else asc
+    branches = []
+    for t in types:
         model_class = get_model_class(t)
-        stmt = select(model_class)
+        stmt = select(
+            model_class.id.label("id"),
+            literal(t).label("type"),
+            model_class.title.label("title"),
+            model_class.price_offer.label("price"),
+            model_class.city.label("city"),
+            model_class.is_verified.label("is_verified"),
+            model_class.is_active.label("is_active"),
+            model_class.created_at.label("created_at"),
+        )
 
         if status == "active":
             stmt = stmt.where(model_class.is_active == True)
@@ -46,102 +78,176 @@ def list_listings(
 
         if is_verified is not None:
             stmt = stmt.where(model_class.is_verified == is_verified)
+        if city:
+            stmt = stmt.where(model_class.city == city)
+        if q:
+            stmt = stmt.where(model_class.title.ilike(f"%{q}%"))
+        if price_min is not None:
+            stmt = stmt.where(model_class.price_offer >= price_min)
+        if price_max is not None:
+            stmt = stmt.where(model_class.price_offer <= price_max)
 
-        items = session.exec(stmt).all()
-        for item in items:
-            results.append({
-                "id": item.id,
-                "type": t,
-                "title": item.title,
-                "price": item.price_offer,
-                "city": item.city,
-                "is_verified": item.is_verified,
-                "is_active": item.is_active,
-                "created_at": item.created_at.isoformat() if item.created_at else None,
-            })
+        if top_n is not None:
+            sort_column = model_class.price_offer if sort == "price" else getattr(model_class, sort)
+            branch = stmt.order_by(direction(sort_column), direction(model_class.id)).limit(top_n).subquery()
+            stmt = select(*branch.c)
+        branches.append(stmt)
 
-    return results
+    return union_all(*branches).subquery("listings")
+
+
+def overview_row(row) -> dict:
+    item = dict(row._mapping)
+    item["created_at"] = item["created_at"].isoformat() if item["created_at"] else None
+    return item
+
+
+async def stream_overview(engine, stmt, fmt: str):
+    """Generator odpowiedzi strumieniowej; ma własną sesję, bo działa już po wyjściu z endpointu."""
+    async with AsyncSession(engine) as session:
+        rows = await session.stream(stmt, execution_options={"yield_per": STREAM_CHUNK})
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=OVERVIEW_COLUMNS)
+            writer.writeheader()
+            async for chunk in rows.partitions():
+                for row in chunk:
+                    writer.writerow(overview_row(row))
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+            yield buffer.getvalue()
+        else:
+            async for chunk in rows.partitions():
+                yield "".join(json.dumps(overview_row(row), ensure_ascii=False) + "\n" for row in chunk)
+
+
+@router.get("")
+async def list_listings(
+    type: str = Query(default="all", description="Filter by type: flat, house, plot, or all"),
+    status: Optional[str] = Query(default=None, description="Filter by status: active, inactive"),
+    is_verified: Optional[bool] = Query(default=None, description="Filter by verification status"),
+    city: Optional[str] = Query(default=None, description="Filter by exact city name"),
+    q: Optional[str] = Query(default=None, description="Search in title"),
+    price_min: Optional[float] = Query(default=None, ge=0),
+    price_max: Optional[float] = Query(default=None, ge=0),
+    sort: str = Query(default="created_at", description=f"Sort by: {', '.join(sorted(SORT_FIELDS))}"),
+    order: Literal["asc", "desc"] = Query(default="desc"),
+    limit: Optional[int] = Query(default=None, ge=1, le=MAX_ADMIN_PAGE_SIZE, description=f"Page size (default {DEFAULT_ADMIN_PAGE_SIZE}; streams are unlimited by default)"),
+    offset: int = Query(default=0, ge=0),
+    format: Literal["json", "ndjson", "csv"] = Query(default="json", description="json, or a streamed ndjson / csv export"),
+    admin: AdminUser = Depends(require_admin),
+    session: AsyncSession = Depends(get_async_session),
+):
+    if sort not in SORT_FIELDS:
+        raise HTTPException(status_code=400, detail=f"Invalid sort field: {sort}")
+
+    if format == "json":
+        limit = limit or DEFAULT_ADMIN_PAGE_SIZE
+
+    types_to_query = ["flat", "house", "plot"] if type == "all" else [type]
+    listings = overview_query(
+        types_to_query, status, is_verified, city, q, price_min, price_max,
+        sort=sort, order=order, top_n=offset + limit if limit else None,
+    )
+
+    direction = desc if order == "desc" else asc
+    stmt = select(*listings.c).order_by(
+        direction(listings.c[sort]), direction(listings.c.type), direction(listings.c.id)
+    ).offset(offset)
+    if limit:
+        stmt = stmt.limit(limit)
+
+    if format == "json":
+        return [overview_row(row) for row in await session.exec(stmt)]
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        stream_overview(session.bind, stmt, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="listings.{format}"'},
+    )
 
 
 @router.get("/{type}/{listing_id}")
-def get_listing(
+async def get_listing(
     type: str,
     listing_id: int,
     admin: AdminUser = Depends(require_admin),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
     model_class = get_model_class(type)
-    item = session.get(model_class, listing_id)
+    item = await session.get(model_class, listing_id)
     if not item:
         raise HTTPException(status_code=404, detail="Listing not found")
     return item
 
 
 @router.patch("/{type}/{listing_id}/verify")
-def toggle_verify(
+async def toggle_verify(
     type: str,
     listing_id: int,
     admin: AdminUser = Depends(require_admin),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
     model_class = get_model_class(type)
-    item = session.get(model_class, listing_id)
+    item = await session.get(model_class, listing_id)
     if not item:
         raise HTTPException(status_code=404, detail="Listing not found")
 
     item.is_verified = not item.is_verified
     session.add(item)
-    session.commit()
-    session.refresh(item)
+    await session.commit()
+    await session.refresh(item)
     return {"status": "ok", "is_verified": item.is_verified}
 
 
 @router.patch("/{type}/{listing_id}/deactivate")
-def toggle_deactivate(
+async def toggle_deactivate(
     type: str,
     listing_id: int,
     admin: AdminUser = Depends(require_admin),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
     model_class = get_model_class(type)
-    item = session.get(model_class, listing_id)
+    item = await session.get(model_class, listing_id)
     if not item:
         raise HTTPException(status_code=404, detail="Listing not found")
 
     item.is_active = not item.is_active
     session.add(item)
-    session.commit()
-    session.refresh(item)
+    await session.commit()
+    await session.refresh(item)
     return {"status": "ok", "is_active": item.is_active}
 
 
 @router.delete("/{type}/{listing_id}")
-def delete_listing(
+async def delete_listing(
     type: str,
     listing_id: int,
     admin: AdminUser = Depends(require_admin),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
     model_class = get_model_class(type)
-    item = session.get(model_class, listing_id)
+    item = await session.get(model_class, listing_id)
     if not item:
         raise HTTPException(status_code=404, detail="Listing not found")
 
-    session.delete(item)
-    session.commit()
+    await session.delete(item)
+    await session.commit()
     return {"status": "deleted"}
 
 
 @router.patch("/{type}/{listing_id}")
-def update_listing(
+async def update_listing(
     type: str,
     listing_id: int,
     data: dict,
     admin: AdminUser = Depends(require_admin),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
     model_class = get_model_class(type)
-    item = session.get(model_class, listing_id)
+    item = await session.get(model_class, listing_id)
     if not item:
         raise HTTPException(status_code=404, detail="Listing not found")
 
@@ -152,6 +258,105 @@ def update_listing(
         setattr(item, k, v)
 
     session.add(item)
-    session.commit()
-    session.refresh(item)
+    await session.commit()
+    await session.refresh(item)
     return item
+
+
+@router.post("/{type}/import")
+async def import_listings_stream(
+    type: str,
+    request: Request,
+    format: Literal["csv", "ndjson"] = Query(default="ndjson", description="Body format: CSV with a header row, or NDJSON"),
+    admin: AdminUser = Depends(require_admin),
+    session: AsyncSession = Depends(get_async_session),
+):
+    model_class = get_model_class(type)
+    return await import_listings(request.stream(), format, model_class, type, session)
+
+
+# asyncpg przyjmuje najwyżej 32767 parametrów na zapytanie, a IN (...) wiąże osobny parametr na każde id
+BULK_ID_CHUNK = 10000
+
+
+def id_chunks(selection: BulkAction) -> List[Optional[List[int]]]:
+    """Id z wyboru w paczkach po BULK_ID_CHUNK (bez powtórzeń); [None], gdy wybór idzie tylko filtrami."""
+    if selection.ids is None:
+        return [None]
+    ids = list(dict.fromkeys(selection.ids))
+    return [ids[i:i + BULK_ID_CHUNK] for i in range(0, len(ids), BULK_ID_CHUNK)] or [[]]
+
+
+def bulk_condition(model_class, selection: BulkAction, ids: Optional[List[int]] = None):
+    if not selection.has_selection():
+        raise HTTPException(status_code=400, detail="Podaj ids, filtry albo all=true")
+
+    conditions = []
+    if ids is not None:
+        conditions.append(model_class.id.in_(ids))
+    if selection.status == "active":
+        conditions.append(model_class.is_active == True)
+    elif selection.status == "inactive":
+        conditions.append(model_class.is_active == False)
+    if selection.is_verified is not None:
+        conditions.append(model_class.is_verified == selection.is_verified)
+    if selection.city:
+        conditions.append(model_class.city == selection.city)
+    if selection.province:
+        conditions.append(model_class.province == selection.province)
+    if selection.price_min is not None:
+        conditions.append(model_class.price_offer >= selection.price_min)
+    if selection.price_max is not None:
+        conditions.append(model_class.price_offer <= selection.price_max)
+    return conditions
+
+
+async def bulk_execute(session: AsyncSession, model_class, selection: BulkAction, make_stmt) -> int:
+    """Jedno UPDATE/DELETE na paczkę id, wszystkie w jednej transakcji; zwraca łączną liczbę wierszy."""
+    total = 0
+    for ids in id_chunks(selection):
+        stmt = make_stmt().where(*bulk_condition(model_class, selection, ids))
+        result = await session.exec(stmt.execution_options(synchronize_session=False))
+        total += result.rowcount
+    await session.commit()
+    return total
+
+
+async def bulk_update(session: AsyncSession, model_class, selection: BulkAction, **values) -> int:
+    return await bulk_execute(session, model_class, selection, lambda: update(model_class).values(**values))
+
+
+@router.post("/{type}/bulk/verify")
+async def bulk_verify(
+    type: str,
+    selection: BulkAction,
+    admin: AdminUser = Depends(require_admin),
+    session: AsyncSession = Depends(get_async_session),
+):
+    model_class = get_model_class(type)
+    updated = await bulk_update(session, model_class, selection, is_verified=selection.value)
+    return {"status": "ok", "updated": updated, "is_verified": selection.value}
+
+
+@router.post("/{type}/bulk/deactivate")
+async def bulk_deactivate(
+    type: str,
+    selection: BulkAction,
+    admin: AdminUser = Depends(require_admin),
+    session: AsyncSession = Depends(get_async_session),
+):
+    model_class = get_model_class(type)
+    updated = await bulk_update(session, model_class, selection, is_active=not selection.value)
+    return {"status": "ok", "updated": updated, "is_active": not selection.value}
+
+
+@router.post("/{type}/bulk/delete")
+async def bulk_delete(
+    type: str,
+    selection: BulkAction,
+    admin: AdminUser = Depends(require_admin),
+    session: AsyncSession = Depends(get_async_session),
+):
+    model_class = get_model_class(type)
+    deleted = await bulk_execute(session, model_class, selection, lambda: delete(model_class))
+    return {"status": "deleted", "deleted": deleted}
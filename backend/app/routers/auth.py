@@ -1,8 +1,8 @@
 from fastapi import APIRouter, HTTPException, Depends
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from pydantic import BaseModel
-from app.db import get_session
-from app.auth import verify_password, create_access_token, get_admin_by_username, get_current_admin
+from app.db import get_async_session
+from app.auth import verify_password_async, create_access_token, get_admin_by_username, get_current_admin
 from app.models.admin import AdminUser
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
@@ -21,11 +21,11 @@ class AdminMeResponse(BaseModel):
     role: str
 
 @router.post("/login", response_model=TokenResponse)
-def login(request: LoginRequest, session: Session = Depends(get_session)):
-    admin = get_admin_by_username(session, request.username)
+async def login(request: LoginRequest, session: AsyncSession = Depends(get_async_session)):
+    admin = await get_admin_by_username(session, request.username)
     if not admin:
         raise HTTPException(status_code=401, detail="Invalid credentials")
-    if not verify_password(request.password, admin.hashed_password):
+    if not await verify_password_async(request.password, admin.hashed_password):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     if not admin.is_active:
         raise HTTPException(status_code=403, detail="Account disabled")
@@ -1,36 +1,44 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.db import get_session
+from app.db import get_async_session
 from app.models.listing_house import HouseListing
 from app.auth import require_admin
 from app.models.admin import AdminUser
+from app.routers.pagination import (
+    CURSOR_DESCRIPTION, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, ListingFilters, keyset_page_async, listing_filters_with_rooms
+)
 
 router = APIRouter(prefix="/api/listings/houses", tags=["Listings (Houses)"])
 
 @router.post("", response_model=HouseListing)
-def create_listing(listing: HouseListing, session: Session = Depends(get_session)):
+async def create_listing(listing: HouseListing, session: AsyncSession = Depends(get_async_session)):
     session.add(listing)
-    session.commit()
-    session.refresh(listing)
+    await session.commit()
+    await session.refresh(listing)
     return listing
 
 @router.get("", response_model=List[HouseListing])
-def list_listings(session: Session = Depends(get_session)):
-    stmt = select(HouseListing).where(HouseListing.is_active == True).order_by(HouseListing.is_verified.desc(), HouseListing.created_at.desc())
-    return session.exec(stmt).all()
+async def list_listings(
+    response: Response,
+    filters: ListingFilters = Depends(listing_filters_with_rooms),
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    session: AsyncSession = Depends(get_async_session),
+):
+    return await keyset_page_async(session, HouseListing, filters, cursor, limit, response)
 
 @router.get("/{listing_id}", response_model=HouseListing)
-def get_listing(listing_id: int, session: Session = Depends(get_session)):
-    listing = session.get(HouseListing, listing_id)
+async def get_listing(listing_id: int, session: AsyncSession = Depends(get_async_session)):
+    listing = await session.get(HouseListing, listing_id)
     if not listing:
         raise HTTPException(status_code=404, detail="Listing not found")
     return listing
 
 @router.patch("/{listing_id}", response_model=HouseListing)
-def update_listing(listing_id: int, data: HouseListing, admin: AdminUser = Depends(require_admin), session: Session = Depends(get_session)):
-    listing = session.get(HouseListing, listing_id)
+async def update_listing(listing_id: int, data: HouseListing, admin: AdminUser = Depends(require_admin), session: AsyncSession = Depends(get_async_session)):
+    listing = await session.get(HouseListing, listing_id)
     if not listing:
         raise HTTPException(status_code=404, detail="Listing not found")
 
@@ -39,16 +47,16 @@ def update_listing(listing_id: int, data: HouseListing, admin: AdminUser = Depen
         setattr(listing, k, v)
 
     session.add(listing)
-    session.commit()
-    session.refresh(listing)
+    await session.commit()
+    await session.refresh(listing)
     return listing
 
 @router.delete("/{listing_id}")
-def delete_listing(listing_id: int, admin: AdminUser = Depends(require_admin), session: Session = Depends(get_session)):
-    listing = session.get(HouseListing, listing_id)
+async def delete_listing(listing_id: int, admin: AdminUser = Depends(require_admin), session: AsyncSession = Depends(get_async_session)):
+    listing = await session.get(HouseListing, listing_id)
     if not listing:
         raise HTTPException(status_code=404, detail="Listing not found")
     listing.is_active = False
     session.add(listing)
-    session.commit()
+    await session.commit()
     return {"status": "ok"}
\ No newline at end of file
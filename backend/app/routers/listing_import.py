@@ -0,0 +1,193 @@
+"""
+Masowy import ogłoszeń ze strumienia CSV / NDJSON.
+
+Treść żądania czytamy kawałkami, każdy wiersz walidujemy polami modelu tabeli, a poprawne wiersze
+wstawiamy paczkami jednym INSERT ... executemany na paczkę (każda paczka to osobna transakcja).
+Błędne wiersze nie przerywają importu - trafiają do raportu z numerem linii.
+"""
+import csv
+import json
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from pydantic import ValidationError, create_model
+from pydantic.fields import FieldInfo
+from sqlalchemy import insert
+from sqlalchemy.exc import DBAPIError
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+IMPORT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+IMPORT_MAX_LINE_BYTES = 1024 * 1024
+
+
+async def iter_lines(chunks: AsyncIterator[bytes], max_line_bytes: int = IMPORT_MAX_LINE_BYTES) -> AsyncIterator[Optional[bytes]]:
+    """
+    Surowe linie (bez \r\n); dekodowanie należy do obsługi pojedynczego wiersza.
+    Linia dłuższa niż max_line_bytes daje None, a jej reszta jest pomijana do najbliższego \n,
+    więc w pamięci nigdy nie leży więcej niż jedna linia w limicie plus kawałek strumienia.
+    """
+    buffer = b""
+    skipping = False
+    async for chunk in chunks:
+        if skipping:
+            newline = chunk.find(b"\n")
+            if newline < 0:
+                continue
+            chunk = chunk[newline + 1:]
+            skipping = False
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield None if len(line) > max_line_bytes else line.rstrip(b"\r")
+        if len(buffer) > max_line_bytes:
+            yield None
+            buffer = b""
+            skipping = True
+    if buffer:
+        yield buffer.rstrip(b"\r")
+
+
+def decode_line(line: bytes) -> str:
+    try:
+        return line.decode("utf-8-sig", errors="strict")
+    except UnicodeDecodeError as e:
+        raise ValueError(f"Niepoprawne UTF-8 w bajcie {e.start}: {e.reason}") from None
+
+
+@lru_cache(maxsize=None)
+def row_schema(model):
+    """
+    Zwykły model pydantic z polami tabeli (bez id). Walidacja modelu tabeli SQLModel przechodzi
+    przez instrumentację ORM przy każdym polu i jest ~30x wolniejsza, a do INSERT wystarczy słownik.
+    """
+    fields = {
+        name: (field.annotation, FieldInfo.merge_field_infos(field))
+        for name, field in model.model_fields.items()
+        if name != "id"
+    }
+    return create_model(f"{model.__name__}ImportRow", **fields)
+
+
+def validation_errors(exc: ValidationError) -> List[Dict[str, Any]]:
+    return [
+        {"loc": list(err["loc"]), "msg": err["msg"], "type": err["type"]}
+        for err in exc.errors()
+    ]
+
+
+def parse_line(line: str, fmt: str, header: Optional[List[str]]) -> Dict[str, Any]:
+    if fmt == "ndjson":
+        raw = json.loads(line)
+        if not isinstance(raw, dict):
+            raise ValueError("Wiersz NDJSON musi być obiektem JSON")
+        return raw
+
+    values = next(csv.reader([line]))
+    if len(values) != len(header):
+        raise ValueError(f"Oczekiwano {len(header)} kolumn, jest {len(values)}")
+    # puste pola CSV traktujemy jak brak wartości, żeby zadziałały domyślne z modelu
+    return {k: v for k, v in zip(header, values) if v != ""}
+
+
+async def insert_batch(session: AsyncSession, model, rows: List[Dict[str, Any]]):
+    await session.exec(insert(model.__table__), params=rows)
+    await session.commit()
+
+
+class ImportReport:
+    def __init__(self, listing_type: str):
+        self.listing_type = listing_type
+        self.inserted = 0
+        self.errors_count = 0
+        self.errors: List[Dict[str, Any]] = []
+
+    def error(self, line: int, errors: List[Dict[str, Any]]):
+        self.errors_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "errors": errors})
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "type": self.listing_type,
+            "inserted": self.inserted,
+            "errors_count": self.errors_count,
+            "errors": self.errors,
+        }
+
+
+async def import_listings(
+    chunks: AsyncIterator[bytes],
+    fmt: str,
+    model,
+    listing_type: str,
+    session: AsyncSession,
+    batch_size: int = IMPORT_BATCH_SIZE,
+    max_line_bytes: int = IMPORT_MAX_LINE_BYTES,
+) -> Dict[str, Any]:
+    """
+    Numery linii w raporcie liczone są od 1 (w CSV linia 1 to nagłówek).
+    Wiersze CSV nie mogą zawierać znaków nowej linii w polach - do takich danych służy NDJSON.
+    Linia dłuższa niż max_line_bytes trafia do raportu jako błąd i jest pomijana bez wczytywania jej w całości.
+    """
+    report = ImportReport(listing_type)
+    schema = row_schema(model)
+    imported_at = datetime.now(timezone.utc)
+    header: Optional[List[str]] = None
+    batch: List[Dict[str, Any]] = []
+    batch_lines: List[int] = []
+
+    async def flush():
+        try:
+            await insert_batch(session, model, batch)
+            report.inserted += len(batch)
+        except DBAPIError as e:
+            await session.rollback()
+            message = [{"loc": [], "msg": str(e.orig), "type": "db_error"}]
+            for line_no in batch_lines:
+                report.error(line_no, message)
+        batch.clear()
+        batch_lines.clear()
+
+    line_no = 0
+    async for raw_line in iter_lines(chunks, max_line_bytes):
+        line_no += 1
+        if raw_line is None:
+            report.error(line_no, [{"loc": [], "msg": f"Linia dłuższa niż {max_line_bytes} bajtów", "type": "line_too_long"}])
+            if fmt == "csv" and header is None:
+                break
+            continue
+        if not raw_line.strip():
+            continue
+        if fmt == "csv" and header is None:
+            try:
+                header = next(csv.reader([decode_line(raw_line)]))
+            except ValueError as e:
+                # bez nagłówka nie da się przypisać kolumn żadnemu wierszowi
+                report.error(line_no, [{"loc": [], "msg": str(e), "type": "parse_error"}])
+                break
+            continue
+
+        try:
+            raw = parse_line(decode_line(raw_line), fmt, header)
+            raw.pop("id", None)
+            raw.setdefault("created_at", imported_at)
+            row = schema.model_validate(raw).model_dump()
+        except ValidationError as e:
+            report.error(line_no, validation_errors(e))
+            continue
+        except ValueError as e:
+            report.error(line_no, [{"loc": [], "msg": str(e), "type": "parse_error"}])
+            continue
+
+        if row["created_at"].tzinfo is None:
+            row["created_at"] = row["created_at"].replace(tzinfo=timezone.utc)
+        batch.append(row)
+        batch_lines.append(line_no)
+        if len(batch) >= batch_size:
+            await flush()
+
+    if batch:
+        await flush()
+    return report.as_dict()
@@ -0,0 +1,120 @@
+"""
+Stronicowanie kursorem (keyset) i filtry publicznych list ogłoszeń.
+
+Lista jest sortowana po (is_verified, created_at, id) malejąco. Kursor to zakodowana trójka
+tych wartości z ostatniego wiersza strony, a kolejna strona zaczyna się od wierszy "mniejszych"
+od niej - zapytanie idzie po indeksie *_feed modelu zamiast liczyć OFFSET.
+Kursor następnej strony zwracamy w nagłówku X-Next-Cursor, więc treść odpowiedzi zostaje listą.
+"""
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, Query, Response
+from sqlalchemy import tuple_
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+CURSOR_DESCRIPTION = f"Kursor z nagłówka {NEXT_CURSOR_HEADER} poprzedniej strony; brak = pierwsza strona."
+
+
+@dataclass
+class ListingFilters:
+    city: Optional[str] = None
+    province: Optional[str] = None
+    price_min: Optional[float] = None
+    price_max: Optional[float] = None
+    area_min: Optional[float] = None
+    area_max: Optional[float] = None
+    rooms_min: Optional[int] = None
+    rooms_max: Optional[int] = None
+
+    def apply(self, stmt, model):
+        conditions = [
+            (self.city, lambda v: model.city == v),
+            (self.province, lambda v: model.province == v),
+            (self.price_min, lambda v: model.price_offer >= v),
+            (self.price_max, lambda v: model.price_offer <= v),
+            (self.area_min, lambda v: model.area >= v),
+            (self.area_max, lambda v: model.area <= v),
+            (self.rooms_min, lambda v: model.rooms >= v),
+            (self.rooms_max, lambda v: model.rooms <= v),
+        ]
+        for value, condition in conditions:
+            if value is not None:
+                stmt = stmt.where(condition(value))
+        return stmt
+
+
+def listing_filters(
+    city: Optional[str] = Query(None, description="Dokładna nazwa miasta"),
+    province: Optional[str] = Query(None, description="Województwo"),
+    price_min: Optional[float] = Query(None, ge=0),
+    price_max: Optional[float] = Query(None, ge=0),
+    area_min: Optional[float] = Query(None, ge=0),
+    area_max: Optional[float] = Query(None, ge=0),
+) -> ListingFilters:
+    return ListingFilters(city, province, price_min, price_max, area_min, area_max)
+
+
+def listing_filters_with_rooms(
+    city: Optional[str] = Query(None, description="Dokładna nazwa miasta"),
+    province: Optional[str] = Query(None, description="Województwo"),
+    price_min: Optional[float] = Query(None, ge=0),
+    price_max: Optional[float] = Query(None, ge=0),
+    area_min: Optional[float] = Query(None, ge=0),
+    area_max: Optional[float] = Query(None, ge=0),
+    rooms_min: Optional[int] = Query(None, ge=0),
+    rooms_max: Optional[int] = Query(None, ge=0),
+) -> ListingFilters:
+    return ListingFilters(city, province, price_min, price_max, area_min, area_max, rooms_min, rooms_max)
+
+
+def encode_cursor(listing) -> str:
+    raw = json.dumps([bool(listing.is_verified), listing.created_at.isoformat(), listing.id])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[bool, datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        is_verified, created_at, listing_id = json.loads(base64.urlsafe_b64decode(padded))
+        created_at = datetime.fromisoformat(created_at)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Niepoprawny kursor")
+    # created_at zapisujemy w UTC; bazy bez stref czasowych zwracają je jako naiwne
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return bool(is_verified), created_at, int(listing_id)
+
+
+def keyset_statement(model, filters: ListingFilters, cursor: Optional[str], limit: int):
+    stmt = filters.apply(select(model).where(model.is_active == True), model)
+    if cursor:
+        stmt = stmt.where(tuple_(model.is_verified, model.created_at, model.id) < tuple_(*decode_cursor(cursor)))
+    # jeden wiersz ponad limit mówi, czy istnieje następna strona
+    return stmt.order_by(model.is_verified.desc(), model.created_at.desc(), model.id.desc()).limit(limit + 1)
+
+
+def finish_page(rows, limit: int, response: Response):
+    rows = list(rows)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1])
+    return rows
+
+
+def keyset_page(session: Session, model, filters: ListingFilters, cursor: Optional[str], limit: int, response: Response):
+    rows = session.exec(keyset_statement(model, filters, cursor, limit)).all()
+    return finish_page(rows, limit, response)
+
+
+async def keyset_page_async(session: AsyncSession, model, filters: ListingFilters, cursor: Optional[str], limit: int, response: Response):
+    rows = (await session.exec(keyset_statement(model, filters, cursor, limit))).all()
+    return finish_page(rows, limit, response)
@@ -0,0 +1,121 @@
+"""
+Przegląd ogłoszeń w panelu admina (GET /admin/listings) na zasianych tabelach: dawne podejście
+(trzy zapytania z pełnymi obiektami ORM + słowniki w pętli) kontra jedno zapytanie UNION ALL
+ze stronicowaniem w SQL i eksport strumieniowy NDJSON/CSV.
+
+    python -m benchmarks.bench_admin_overview [wierszy_na_typ]
+
+BENCH_DATABASE_URL jak w benchmarks.bench_listings.
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import Session, SQLModel, create_engine, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.db import async_database_url
+
+from app.routers.admin_listings import get_model_class, list_listings
+
+from benchmarks.bench_listings import seed_listings
+from benchmarks.common import measure
+
+
+def peak_rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+
+
+def old_overview(session: Session):
+    results = []
+    for t in ["flat", "house", "plot"]:
+        model_class = get_model_class(t)
+        for item in session.exec(select(model_class)).all():
+            results.append({
+                "id": item.id, "type": t, "title": item.title, "price": item.price_offer, "city": item.city,
+                "is_verified": item.is_verified, "is_active": item.is_active,
+                "created_at": item.created_at.isoformat() if item.created_at else None,
+            })
+    return results
+
+
+def overview(loop, session: AsyncSession, **params):
+    defaults = dict(
+        type="all", status=None, is_verified=None, city=None, q=None, price_min=None, price_max=None,
+        sort="created_at", order="desc", limit=None, offset=0, format="json", admin=None,
+    )
+    return loop.run_until_complete(list_listings(**{**defaults, **params}, session=session))
+
+
+def drain(loop, response) -> int:
+    async def consume():
+        size = 0
+        async for chunk in response.body_iterator:
+            size += len(chunk)
+        return size
+    return loop.run_until_complete(consume())
+
+
+def main(rows_per_type: str = "300000"):
+    rows_per_type = int(rows_per_type)
+    url = os.getenv("BENCH_DATABASE_URL") or f"sqlite:///{tempfile.mkdtemp()}/listings.db"
+    engine = create_engine(url)
+    SQLModel.metadata.create_all(engine)
+
+    start = time.perf_counter()
+    for kind in ["flat", "house", "plot"]:
+        model = get_model_class(kind)
+        with engine.begin() as conn:
+            conn.execute(model.__table__.delete())
+        seed_listings(engine, model, kind, rows_per_type)
+    report = {"rows_per_type": rows_per_type, "seed_s": round(time.perf_counter() - start, 1)}
+
+    loop = asyncio.new_event_loop()
+    async_engine = create_async_engine(async_database_url(url))
+    session = AsyncSession(async_engine)
+    report["page_newest"] = measure(lambda: overview(loop, session), repeats=20)
+    report["page_by_price_offset_5000"] = measure(
+        lambda: overview(loop, session, sort="price", order="asc", offset=5000), repeats=10
+    )
+    report["page_filtered"] = measure(
+        lambda: overview(loop, session, status="active", city="Gdańsk", price_min=500000), repeats=20
+    )
+
+    rss = peak_rss_mb()
+    start = time.perf_counter()
+    size = drain(loop, overview(loop, session, format="ndjson"))
+    report["ndjson_stream_all"] = {
+        "s": round(time.perf_counter() - start, 2), "mb": round(size / 2 ** 20, 1),
+        "peak_rss_growth_mb": round(peak_rss_mb() - rss, 1),
+    }
+    start = time.perf_counter()
+    size = drain(loop, overview(loop, session, format="csv"))
+    report["csv_stream_all"] = {
+        "s": round(time.perf_counter() - start, 2), "mb": round(size / 2 ** 20, 1),
+        "peak_rss_growth_mb": round(peak_rss_mb() - rss, 1),
+    }
+
+    with Session(engine) as sync_session:
+        start = time.perf_counter()
+        count = len(old_overview(sync_session))
+        report["old_all_orm"] = {
+            "s": round(time.perf_counter() - start, 2), "rows": count,
+            "peak_rss_growth_mb": round(peak_rss_mb() - rss, 1),
+        }
+
+    loop.run_until_complete(session.close())
+    loop.run_until_complete(async_engine.dispose())
+    loop.close()
+
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
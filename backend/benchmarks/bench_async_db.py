@@ -0,0 +1,144 @@
+"""
+Test obciążeniowy publicznej listy mieszkań: ścieżka synchroniczna (Session + pula wątków FastAPI)
+kontra asynchroniczna (AsyncSession z app.db, jak w routerach) przy równoległych odczytach.
+
+    python -m benchmarks.bench_async_db [liczba_wierszy] [żądań_na_poziom]
+
+Serwer uvicorn (jeden worker) startuje w osobnym procesie z DATABASE_URL wskazującym na zasianą bazę,
+więc obie ścieżki używają pul skonfigurowanych w app.db (DB_POOL_SIZE, DB_MAX_OVERFLOW, ...).
+BENCH_DATABASE_URL jak w benchmarks.bench_listings; BENCH_CONCURRENCY zmienia poziomy równoległości.
+"""
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Optional
+
+import httpx
+import numpy as np
+from fastapi import Depends, FastAPI, Query, Response
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.models.listing_flat import FlatListing
+from app.routers.pagination import DEFAULT_PAGE_SIZE, ListingFilters, keyset_page, listing_filters_with_rooms
+
+from benchmarks.bench_listings import CITIES, seed_listings
+
+DEFAULT_CONCURRENCY = "1,8,32,128"
+
+
+def bench_app() -> FastAPI:
+    """Fabryka aplikacji dla uvicorn --factory: prawdziwy router (async) + jego synchroniczny odpowiednik."""
+    from app.db import get_session
+    from app.routers import flat_listings
+
+    app = FastAPI()
+    app.include_router(flat_listings.router)
+
+    @app.get("/sync/flats")
+    def list_flats_sync(
+        response: Response,
+        filters: ListingFilters = Depends(listing_filters_with_rooms),
+        cursor: Optional[str] = Query(None),
+        limit: int = Query(DEFAULT_PAGE_SIZE),
+        session: Session = Depends(get_session),
+    ):
+        return keyset_page(session, FlatListing, filters, cursor, limit, response)
+
+    return app
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(
+    url: str, port: int, app: str = "benchmarks.bench_async_db:bench_app", ready_path: str = "/api/listings/flats"
+) -> subprocess.Popen:
+    """Uruchamia fabrykę aplikacji w uvicorn z DATABASE_URL=url i czeka, aż ready_path odpowie."""
+    env = {**os.environ, "DATABASE_URL": url}
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--factory",
+         "--port", str(port), "--log-level", "warning", "--no-access-log"],
+        env=env,
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}{ready_path}", params={"limit": 1}).raise_for_status()
+            return proc
+        except httpx.TransportError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("Serwer benchmarku nie wystartował")
+
+
+async def load(base_url: str, path: str, concurrency: int, total: int) -> dict:
+    rng = random.Random(0)
+    params = [{"city": CITIES[rng.randrange(len(CITIES))][0], "limit": DEFAULT_PAGE_SIZE} for _ in range(total)]
+    latencies = []
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        queue = iter(params)
+
+        async def worker():
+            nonlocal errors
+            for p in queue:
+                start = time.perf_counter()
+                res = await client.get(path, params=p)
+                latencies.append((time.perf_counter() - start) * 1000)
+                if res.status_code != 200:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "req_per_s": round(total / elapsed, 1),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 2),
+        "errors": errors,
+    }
+
+
+def main(rows: str = "200000", requests_per_level: str = "2000"):
+    rows, requests_per_level = int(rows), int(requests_per_level)
+    levels = [int(c) for c in os.getenv("BENCH_CONCURRENCY", DEFAULT_CONCURRENCY).split(",")]
+    url = os.getenv("BENCH_DATABASE_URL") or f"sqlite:///{tempfile.mkdtemp()}/listings.db"
+
+    engine = create_engine(url)
+    SQLModel.metadata.create_all(engine, tables=[FlatListing.__table__])
+    with engine.begin() as conn:
+        conn.execute(FlatListing.__table__.delete())
+    seed_listings(engine, FlatListing, "flat", rows)
+    engine.dispose()
+
+    report = {"rows": rows, "requests_per_level": requests_per_level, "database": url.split(":", 1)[0]}
+    port = free_port()
+    proc = start_server(url, port)
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        for concurrency in levels:
+            report[f"concurrency_{concurrency}"] = {
+                name: asyncio.run(load(base_url, path, concurrency, requests_per_level))
+                for name, path in [("sync", "/sync/flats"), ("async", "/api/listings/flats")]
+            }
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
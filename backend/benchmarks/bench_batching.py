@@ -0,0 +1,73 @@
+"""
+Równoległe predykcje pojedynczych wierszy: każde żądanie osobno kontra PredictionBatcher (ml/batching.py).
+N wątków (jak wątki puli FastAPI) wycenia w pętli wiersze z danych; mierzymy przepustowość,
+opóźnienie żądania i osiągnięte rozmiary wsadów.
+
+    python -m benchmarks.bench_batching [flat|house|plot] [liczba_drzew]
+"""
+import json
+import sys
+import threading
+import time
+
+import numpy as np
+
+from ml.batching import PredictionBatcher
+from ml.feature_encoder import CompiledEncoder
+from ml.forest_engine import compile_pipeline
+
+from benchmarks.common import load_training_frame, train_pipeline
+
+DURATION_S = 4.0
+CONCURRENCY = (1, 8, 32)
+
+
+def run_load(predict, rows, threads: int) -> dict:
+    latencies = [[] for _ in range(threads)]
+    stop = time.perf_counter() + DURATION_S
+
+    def worker(i):
+        j = i
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            predict(rows[j % len(rows)])
+            latencies[i].append((time.perf_counter() - start) * 1000)
+            j += threads
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    samples = np.concatenate([np.array(l) for l in latencies])
+    return {
+        "req_s": round(len(samples) / DURATION_S, 1),
+        "p50_ms": round(float(np.percentile(samples, 50)), 2),
+        "p99_ms": round(float(np.percentile(samples, 99)), 2),
+    }
+
+
+def main(kind: str = "flat", n_estimators: str = "400"):
+    pipe = train_pipeline(kind, n_estimators=int(n_estimators))
+    encoder = CompiledEncoder.from_preprocessor(pipe.named_steps["preprocessing"])
+    X, _ = load_training_frame(kind)
+    rows = X.sample(500, random_state=0).to_dict(orient="records")
+
+    report = {}
+    for engine, pipeline in (("sklearn", pipe), ("numpy", compile_pipeline(pipe))):
+        for threads in CONCURRENCY:
+            single = lambda row: pipeline.named_steps["model"].predict(encoder.encode(row))[0]
+            report[f"{engine}_single_c{threads}"] = run_load(single, rows, threads)
+
+            batcher = PredictionBatcher(enabled=True, max_batch_size=32, max_wait_ms=3)
+            report[f"{engine}_batched_c{threads}"] = {
+                **run_load(lambda row: batcher.predict(pipeline, encoder, row), rows, threads),
+                "avg_batch_size": batcher.stats()["avg_batch_size"],
+                "queue_delay_p50_ms": batcher.stats()["queue_delay_ms"]["p50"],
+            }
+
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,100 @@
+"""
+Masowy import ogłoszeń (app/routers/listing_import.py) kontra tworzenie po jednym
+(jak POST /api/listings/flats) oraz masowa weryfikacja jednym UPDATE kontra session.get + commit na id.
+
+    python -m benchmarks.bench_bulk_import [liczba_wierszy]
+
+BENCH_DATABASE_URL jak w benchmarks.bench_listings.
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import Session, SQLModel, create_engine, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.db import async_database_url
+
+from app.models.bulk import BulkAction
+from app.models.listing_flat import FlatListing
+from app.routers.admin_listings import bulk_update
+from app.routers.listing_import import import_listings
+
+from benchmarks.bench_listings import listing_rows
+
+
+async def body_chunks(payload: bytes, chunk_size: int = 64 * 1024):
+    for start in range(0, len(payload), chunk_size):
+        yield payload[start:start + chunk_size]
+
+
+async def bulk_import(url: str, payload: bytes):
+    engine = create_async_engine(async_database_url(url))
+    async with AsyncSession(engine) as session:
+        result = await import_listings(body_chunks(payload), "ndjson", FlatListing, "flat", session)
+    await engine.dispose()
+    return result
+
+
+async def bulk_verify(url: str, ids):
+    engine = create_async_engine(async_database_url(url))
+    async with AsyncSession(engine) as session:
+        updated = await bulk_update(session, FlatListing, BulkAction(ids=ids), is_verified=True)
+    await engine.dispose()
+    return updated
+
+
+def main(rows: str = "20000"):
+    rows = int(rows)
+    url = os.getenv("BENCH_DATABASE_URL") or f"sqlite:///{tempfile.mkdtemp()}/listings.db"
+    engine = create_engine(url)
+    SQLModel.metadata.create_all(engine, tables=[FlatListing.__table__])
+    with engine.begin() as conn:
+        conn.execute(FlatListing.__table__.delete())
+
+    data = [{**row, "created_at": row["created_at"].isoformat()} for row in listing_rows("flat", rows)]
+    payload = "\n".join(json.dumps(row, ensure_ascii=False) for row in data).encode("utf-8")
+    report = {"rows": rows, "payload_mb": round(len(payload) / 2 ** 20, 1)}
+
+    start = time.perf_counter()
+    result = asyncio.run(bulk_import(url, payload))
+    elapsed = time.perf_counter() - start
+    report["bulk_import"] = {"s": round(elapsed, 2), "rows_per_s": round(result["inserted"] / elapsed)}
+
+    # po jednym: walidacja + session.add + commit na wiersz (jak publiczny POST)
+    one_by_one = min(rows, 2000)
+    with Session(engine) as session:
+        start = time.perf_counter()
+        for row in data[:one_by_one]:
+            listing = FlatListing.model_validate(row)
+            session.add(listing)
+            session.commit()
+        elapsed = time.perf_counter() - start
+        report["one_by_one_create"] = {"rows": one_by_one, "s": round(elapsed, 2), "rows_per_s": round(one_by_one / elapsed)}
+
+    with Session(engine) as session:
+        ids = session.exec(select(FlatListing.id).limit(rows // 2)).all()
+
+        start = time.perf_counter()
+        updated = asyncio.run(bulk_verify(url, ids))
+        report["bulk_verify"] = {"rows": updated, "ms": round((time.perf_counter() - start) * 1000, 1)}
+
+        sample = ids[:one_by_one]
+        start = time.perf_counter()
+        for listing_id in sample:
+            item = session.get(FlatListing, listing_id)
+            item.is_verified = not item.is_verified
+            session.add(item)
+            session.commit()
+        elapsed = time.perf_counter() - start
+        report["one_by_one_verify"] = {"rows": len(sample), "s": round(elapsed, 2), "rows_per_s": round(len(sample) / elapsed)}
+
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
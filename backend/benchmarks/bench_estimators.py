@@ -0,0 +1,57 @@
+"""
+Porównanie estymatorów z ml/estimators.py na tym samym podziale danych: czas uczenia,
+opóźnienie predykcji (1 wiersz / 1000 wierszy), rozmiar pliku modelu i MAE/RMSE/R2.
+Te same pola zapisują skrypty ml/train_*.py w reports/*_metrics.json.
+
+    python -m benchmarks.bench_estimators [flat|house|plot]
+"""
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
+
+from ml.estimators import ESTIMATORS, make_estimator, make_preprocessor, serving_metrics
+
+from benchmarks.common import load_training_frame
+
+
+def main(kind: str = "flat"):
+    X, y = load_training_frame(kind)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    categorical = X.select_dtypes(include=["object", "string"]).columns
+    numerical = X.select_dtypes(exclude=["object", "string"]).columns
+    tmp = Path(tempfile.mkdtemp())
+
+    report = {}
+    for name in ESTIMATORS:
+        pipe = Pipeline([
+            ("preprocessing", make_preprocessor(numerical, categorical, name)),
+            ("model", make_estimator(name)),
+        ])
+        start = time.perf_counter()
+        pipe.fit(X_train, y_train)
+        fit_time = time.perf_counter() - start
+
+        y_pred = pipe.predict(X_test)
+        path = tmp / f"{name}.joblib"
+        joblib.dump(pipe, path)
+        report[name] = {
+            "MAE": float(mean_absolute_error(y_test, y_pred)),
+            "RMSE": float(np.sqrt(mean_squared_error(y_test, y_pred))),
+            "R2": float(r2_score(y_test, y_pred)),
+            "fit_time_s": round(fit_time, 2),
+            **serving_metrics(pipe, X_test, path),
+        }
+
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,72 @@
+"""
+Koszt zamiany jednego żądania na wektor cech: pd.DataFrame + ColumnTransformer kontra CompiledEncoder
+(ml/feature_encoder.py), w mikrosekundach, oraz cała predykcja z lasem sklearn i CompiledForest.
+Zgodność sprawdzana na wierszach z danych treningowych.
+
+    python -m benchmarks.bench_feature_encoder [flat|house|plot] [liczba_drzew]
+"""
+import json
+import sys
+
+import numpy as np
+import pandas as pd
+
+from app.main import compute_row_prediction
+from app.models.flat import FlatInput
+from app.models.house import HouseInput
+from app.models.plot import PlotInput
+from ml.feature_encoder import CompiledEncoder
+from ml.forest_engine import compile_pipeline
+from ml.input_adapter import flat_row, house_row, plot_row
+
+from benchmarks.common import SAMPLE_INPUTS, load_training_frame, measure, train_pipeline
+
+INPUTS = {
+    "flat": (FlatInput, flat_row),
+    "house": (HouseInput, house_row),
+    "plot": (PlotInput, plot_row),
+}
+
+
+def us(stats: dict) -> dict:
+    return {key.replace("_ms", "_us"): round(value * 1000, 1) for key, value in stats.items()}
+
+
+def main(kind: str = "flat", n_estimators: str = "100"):
+    pipe = train_pipeline(kind, n_estimators=int(n_estimators))
+    preprocessor = pipe.named_steps["preprocessing"]
+    encoder = CompiledEncoder.from_preprocessor(preprocessor)
+
+    X, _ = load_training_frame(kind)
+    sample = X.sample(min(2000, len(X)), random_state=0)
+    records = sample.to_dict(orient="records")
+    expected = preprocessor.transform(sample)
+    expected = expected.toarray() if hasattr(expected, "toarray") else expected
+    max_abs_diff = float(np.max(np.abs(encoder.encode_rows(records) - expected)))
+
+    input_model, to_row = INPUTS[kind]
+    data = input_model(**SAMPLE_INPUTS[kind])
+    row = to_row(data)
+    compiled = compile_pipeline(pipe)
+
+    report = {
+        "features": encoder.n_features,
+        "parity_rows": len(records),
+        "max_abs_diff": max_abs_diff,
+        "encode": {
+            "pandas_transform": us(measure(lambda: preprocessor.transform(pd.DataFrame([to_row(data)])), repeats=500)),
+            "compiled_encoder": us(measure(lambda: encoder.encode(to_row(data)), repeats=500)),
+        },
+        "predict": {
+            "pandas_sklearn": us(measure(lambda: compute_row_prediction(pipe, to_row(data)), repeats=200)),
+            "encoder_sklearn": us(measure(lambda: compute_row_prediction(pipe, to_row(data), encoder), repeats=200)),
+            "pandas_numpy_forest": us(measure(lambda: compute_row_prediction(compiled, to_row(data)), repeats=200)),
+            "encoder_numpy_forest": us(measure(lambda: compute_row_prediction(compiled, to_row(data), encoder), repeats=200)),
+        },
+    }
+    assert compute_row_prediction(compiled, row, encoder) == compute_row_prediction(pipe, row)
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
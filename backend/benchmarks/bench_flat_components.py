@@ -0,0 +1,47 @@
+"""
+Porównanie liczenia "components" dla /predict/flat: dawna pętla (osobne predict
+na każdy wariant) kontra jedna ramka ze wszystkimi wariantami.
+
+    python -m benchmarks.bench_flat_components
+"""
+import json
+
+from app.models.flat import FlatInput
+from ml.flat_components import compute_flat_components, flat_counterfactuals
+from ml.input_adapter import adapt_flat_input
+
+from benchmarks.common import SAMPLE_INPUTS, measure, train_pipeline
+
+
+def components_loop(model, input_df, base_prediction):
+    components = []
+    for col_name, target_val, label_text in flat_counterfactuals(input_df.iloc[0].to_dict()):
+        temp_df = input_df.copy()
+        temp_df.at[0, col_name] = target_val
+        diff = base_prediction - model.predict(temp_df)[0]
+        if abs(diff) > 0:
+            components.append({"name": label_text, "value": round(float(diff), 2)})
+    components.sort(key=lambda x: abs(x["value"]), reverse=True)
+    return components
+
+
+def main():
+    model = train_pipeline("flat")
+    input_df = adapt_flat_input(FlatInput(**SAMPLE_INPUTS["flat"]))
+    base_prediction = round(float(model.predict(input_df)[0]), 2)
+
+    loop_result = components_loop(model, input_df, base_prediction)
+    batched_result = compute_flat_components(model, input_df, base_prediction)
+    assert loop_result == batched_result, "Wyniki obu metod się różnią"
+
+    report = {
+        "variants": len(flat_counterfactuals(input_df.iloc[0].to_dict())),
+        "loop": measure(lambda: components_loop(model, input_df, base_prediction)),
+        "batched": measure(lambda: compute_flat_components(model, input_df, base_prediction)),
+    }
+    report["speedup_p50"] = round(report["loop"]["p50_ms"] / report["batched"]["p50_ms"], 2)
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main()
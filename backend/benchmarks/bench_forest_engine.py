@@ -0,0 +1,62 @@
+"""
+Predykcja lasu: RandomForestRegressor.predict kontra CompactForest (ml/serving_artifact.py)
+i CompiledForest (ml/forest_engine.py) dla 1, 10 i 1000 wierszy.
+Osobno sam las (na już przetworzonym wejściu) i cały pipeline z preprocessingiem.
+
+    python -m benchmarks.bench_forest_engine [flat|house|plot] [liczba_drzew]
+"""
+import json
+import sys
+import time
+
+import numpy as np
+
+from ml.forest_engine import compile_forest, compile_pipeline
+from ml.serving_artifact import CompactForest, CompactPipeline, flatten_forest
+
+from benchmarks.common import load_training_frame, measure, train_pipeline
+
+ROW_COUNTS = (1, 10, 1000)
+
+
+def main(kind: str = "flat", n_estimators: str = "400"):
+    pipe = train_pipeline(kind, n_estimators=int(n_estimators))
+    forest = pipe.named_steps["model"]
+    preprocessor = pipe.named_steps["preprocessing"]
+
+    start = time.perf_counter()
+    compiled_pipe = compile_pipeline(pipe)
+    compile_ms = (time.perf_counter() - start) * 1000
+    compact = CompactForest(flatten_forest(forest))
+    engines = {
+        "sklearn": (forest, pipe),
+        "compact": (compact, CompactPipeline(preprocessor, compact)),
+        "numpy": (compiled_pipe.named_steps["model"], compiled_pipe),
+    }
+
+    X, _ = load_training_frame(kind)
+    sample = X.sample(max(ROW_COUNTS), random_state=0)
+    report = {
+        "trees": compile_forest(forest).n_trees,
+        "depth": compiled_pipe.metadata["depth"],
+        "compile_ms": round(compile_ms, 1),
+        "results": {},
+    }
+    for n_rows in ROW_COUNTS:
+        rows = sample.head(n_rows)
+        transformed = preprocessor.transform(rows)
+        reference = pipe.predict(rows)
+        repeats = 100 if n_rows < 1000 else 10
+        for name, (model, pipeline) in engines.items():
+            max_rel_diff = float(np.max(np.abs(pipeline.predict(rows) - reference) / np.abs(reference)))
+            report["results"][f"{name}_{n_rows}"] = {
+                "forest": measure(lambda: model.predict(transformed), repeats=repeats),
+                "pipeline": measure(lambda: pipeline.predict(rows), repeats=repeats),
+                "max_rel_diff": max_rel_diff,
+            }
+
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,72 @@
+"""
+Przepustowość predykcji w wątkach (jak pula wątków FastAPI) przy 1-16 wątkach: sama cena (explain=none)
+i cena z SHAP (explain=top), silnik lasu sklearn i numpy. Porównanie interpretera z GIL i free-threaded:
+
+    python -m benchmarks.bench_free_threading [interpreter ...]
+
+Bez argumentów mierzy bieżący interpreter; z argumentami (np. python3.14 python3.14t) uruchamia
+pomiar w każdym z nich (zależności z requirements.txt muszą być w nich zainstalowane).
+Dla build free-threaded warto ustawić PYTHON_GIL=0 - inaczej rozszerzenie C SHAP włącza GIL z powrotem.
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import BASE_DIR
+
+THREADS = (1, 2, 4, 8, 16)
+REQUESTS = {"none": 400, "top": 80}
+
+
+def measure_interpreter(n_estimators: int = 100) -> dict:
+    from app.inference import runtime_info
+    from app.main import predict_job
+    from app.models.flat import FlatInput
+    from ml.forest_engine import compile_pipeline
+    from ml.input_adapter import flat_row
+    from ml.model_loader import make_model_set
+
+    from benchmarks.bench_login import FLAT_PAYLOAD
+    from benchmarks.common import train_pipeline
+
+    pipe = train_pipeline("flat", n_estimators=n_estimators)
+    # wiersze jak po walidacji w endpoincie, każdy z inną powierzchnią
+    rows = [flat_row(FlatInput(**{**FLAT_PAYLOAD, "area": 20 + i * 0.65})) for i in range(200)]
+
+    report = {**runtime_info(), "cpus": os.cpu_count(), "results": {}}
+    for engine, pipeline in (("sklearn", pipe), ("numpy", compile_pipeline(pipe))):
+        models = make_model_set({"flat": pipeline})
+        for explain, total in REQUESTS.items():
+            reference = [predict_job(models, "flat", row, explain, 15)[:2] for row in rows[:10]]
+            for threads in THREADS:
+                with ThreadPoolExecutor(max_workers=threads) as pool:
+                    start = time.perf_counter()
+                    results = list(pool.map(lambda i: predict_job(models, "flat", rows[i % len(rows)], explain, 15),
+                                            range(total)))
+                    elapsed = time.perf_counter() - start
+                # wyniki z wielu wątków muszą być identyczne z sekwencyjnymi
+                assert [r[:2] for r in results[:10]] == reference
+                report["results"][f"{engine}_explain_{explain}_t{threads}"] = round(total / elapsed, 1)
+    return report
+
+
+def main(*interpreters):
+    if not interpreters:
+        print(json.dumps(measure_interpreter(), indent=4))
+        return
+
+    report = {}
+    for interpreter in interpreters:
+        out = subprocess.run(
+            [interpreter, "-m", "benchmarks.bench_free_threading"],
+            cwd=BASE_DIR, capture_output=True, text=True, check=True,
+        ).stdout
+        report[interpreter] = json.loads(out[out.index("{"):])
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
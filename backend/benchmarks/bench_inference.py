@@ -0,0 +1,138 @@
+"""
+Opóźnienia GET /api/listings/flats przy nasyconych predykcjach: predykcje w puli wątków FastAPI
+(PREDICT_EXECUTOR=thread) kontra w puli procesów roboczych (PREDICT_EXECUTOR=process, app/inference.py).
+
+    python -m benchmarks.bench_inference [sekund_na_scenariusz] [klientów_predykcji] [klientów_list]
+
+Dla każdego trybu osobny serwer uvicorn (jeden worker) na tymczasowej bazie SQLite z ogłoszeniami,
+z modelem mieszkań wytrenowanym przez benchmarks.common.train_pipeline. Predykcje idą z explain=top
+(las + SHAP), każda z inną powierzchnią, żeby nie trafiać w cache. PREDICT_WORKERS przechodzi do serwera.
+"""
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import httpx
+import joblib
+import numpy as np
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.models.admin import AdminUser
+from app.models.listing_flat import FlatListing
+from app.passwords import PasswordHasher
+from ml.model_loader import ModelRegistry, make_model_set, prepare_for_serving
+
+from benchmarks.bench_async_db import free_port, start_server
+from benchmarks.bench_listings import CITIES, seed_listings
+from benchmarks.bench_login import FLAT_PAYLOAD
+from benchmarks.common import train_pipeline
+
+
+def bench_app():
+    """Aplikacja z app.main z modelem mieszkań z BENCH_FLAT_MODEL zamiast plików z katalogu models."""
+    import app.main as main_module
+
+    def load_bench_models(share_mode: str = "none"):
+        model = prepare_for_serving(joblib.load(os.environ["BENCH_FLAT_MODEL"]))
+        return ModelRegistry.activate(make_model_set({"flat": model}))
+
+    main_module.load_models = load_bench_models
+    return main_module.app
+
+
+async def predictions(client: httpx.AsyncClient, deadline: float, latencies: list, statuses: dict, rng: random.Random):
+    while time.perf_counter() < deadline:
+        payload = {**FLAT_PAYLOAD, "area": round(rng.uniform(20, 150), 2)}
+        start = time.perf_counter()
+        res = await client.post("/predict/flat", params={"explain": "top"}, json=payload)
+        statuses[res.status_code] = statuses.get(res.status_code, 0) + 1
+        if res.status_code == 200:
+            latencies.append((time.perf_counter() - start) * 1000)
+        else:
+            await asyncio.sleep(0.05)
+
+
+async def listings(client: httpx.AsyncClient, deadline: float, latencies: list, rng: random.Random):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        res = await client.get("/api/listings/flats", params={"city": rng.choice(CITIES)[0], "limit": 20})
+        res.raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+        # klient przeglądający listę, a nie pętla bez przerwy
+        await asyncio.sleep(0.02)
+
+
+def percentiles(samples: list) -> dict:
+    if not samples:
+        return {"count": 0}
+    return {
+        "count": len(samples),
+        "p50_ms": round(float(np.percentile(samples, 50)), 2),
+        "p99_ms": round(float(np.percentile(samples, 99)), 2),
+    }
+
+
+async def scenario(base_url: str, seconds: float, predict_clients: int, listing_clients: int) -> dict:
+    predict_latencies, listing_latencies, statuses = [], [], {}
+    rng = random.Random(0)
+    limits = httpx.Limits(max_connections=predict_clients + listing_clients)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        deadline = time.perf_counter() + seconds
+        tasks = [predictions(client, deadline, predict_latencies, statuses, rng) for _ in range(predict_clients)]
+        tasks += [listings(client, deadline, listing_latencies, rng) for _ in range(listing_clients)]
+        await asyncio.gather(*tasks)
+
+    result = {"listings": percentiles(listing_latencies)}
+    if predict_clients:
+        result["predictions"] = {**percentiles(predict_latencies), "per_s": round(len(predict_latencies) / seconds, 1),
+                                 "statuses": statuses}
+    return result
+
+
+def main(seconds: str = "20", predict_clients: str = "16", listing_clients: str = "4"):
+    seconds, predict_clients, listing_clients = float(seconds), int(predict_clients), int(listing_clients)
+    workdir = tempfile.mkdtemp()
+    url = f"sqlite:///{workdir}/bench.db"
+    os.environ["BENCH_FLAT_MODEL"] = f"{workdir}/flat.joblib"
+    joblib.dump(train_pipeline("flat"), os.environ["BENCH_FLAT_MODEL"])
+
+    engine = create_engine(url)
+    SQLModel.metadata.create_all(engine)
+    seed_listings(engine, FlatListing, "flat", 50000)
+    with Session(engine) as session:
+        # konto "admin" zakładamy sami, żeby start aplikacji nie hashował hasła deweloperskiego
+        session.add(AdminUser(
+            username="admin", hashed_password=PasswordHasher(rounds=4).hash_sync("admin"),
+            created_at=datetime.now(timezone.utc),
+        ))
+        session.commit()
+    engine.dispose()
+
+    report = {"seconds": seconds, "predict_clients": predict_clients, "listing_clients": listing_clients,
+              "cpus": os.cpu_count()}
+    for mode in ("thread", "process"):
+        os.environ["PREDICT_EXECUTOR"] = mode
+        port = free_port()
+        proc = start_server(url, port, app="benchmarks.bench_inference:bench_app")
+        try:
+            base_url = f"http://127.0.0.1:{port}"
+            asyncio.run(scenario(base_url, min(seconds, 5), predict_clients, 0))  # rozgrzewka
+            report[mode] = {
+                "listings_only": asyncio.run(scenario(base_url, seconds, 0, listing_clients)),
+                "mixed": asyncio.run(scenario(base_url, seconds, predict_clients, listing_clients)),
+                "server_inference": httpx.get(f"{base_url}/api/v1/metrics").json()["inference"],
+            }
+        finally:
+            proc.terminate()
+            proc.wait()
+
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,139 @@
+"""
+Publiczna lista mieszkań na tabeli z N ogłoszeniami (domyślnie 1 000 000): dawne zapytanie
+bez limitu kontra strony kursora (app/routers/pagination.py), z indeksami *_feed i bez nich.
+
+    python -m benchmarks.bench_listings [liczba_wierszy]
+
+Domyślnie SQLite w pliku tymczasowym; BENCH_DATABASE_URL pozwala wskazać np. PostgreSQL
+(tabela flatlisting jest wtedy czyszczona przed zasiewem).
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from fastapi import Response
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.models.listing_flat import FlatListing
+from app.routers.pagination import NEXT_CURSOR_HEADER, ListingFilters, keyset_page
+
+from benchmarks.common import measure
+
+CITIES = [
+    ("Warszawa", "mazowieckie"), ("Kraków", "malopolskie"), ("Wrocław", "dolnoslaskie"),
+    ("Poznań", "wielkopolskie"), ("Gdańsk", "pomorskie"), ("Łódź", "lodzkie"),
+    ("Lublin", "lubelskie"), ("Katowice", "slaskie"), ("Szczecin", "zachodniopomorskie"),
+    ("Białystok", "podlaskie"),
+]
+
+
+def listing_rows(kind: str, n: int, seed: int = 0):
+    """Losowe wiersze tabeli ogłoszeń danego typu (flat / house / plot), gotowe do insert()."""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for i in range(n):
+        city, province = CITIES[rng.randrange(len(CITIES))]
+        area = round(rng.uniform(20, 150), 1)
+        row = {
+            "title": f"Ogłoszenie {kind} {i}", "description": "", "phone_number": "", "photos_url": "",
+            "price_offer": round(area * rng.uniform(7000, 20000), -3), "area": area,
+            "city": city, "district": "", "province": province,
+            "created_at": start + timedelta(seconds=rng.randrange(60 * 60 * 24 * 700)),
+            "is_active": rng.random() > 0.1, "is_verified": rng.random() < 0.05,
+        }
+        if kind == "flat":
+            row.update({
+                "rooms": rng.randint(1, 6), "floor": rng.randint(0, 10), "totalFloors": 10,
+                "hasLift": 1, "hasOutdoor": 0, "hasParking": 0, "sold_price": None,
+            })
+        elif kind == "house":
+            row.update({
+                "rooms": rng.randint(2, 8), "plot_area": round(rng.uniform(300, 2000), 1), "floors": rng.randint(1, 3),
+                "hasGarage": rng.randint(0, 1), "hasGarden": 1,
+            })
+        if kind in ("flat", "house"):
+            row.update({
+                "year": rng.randint(1950, 2025), "buildType": "block", "material": "brick",
+                "heating": "urban", "market": "secondary", "constructionStatus": "ready_to_use",
+            })
+        else:
+            row.update({
+                "plot_type": "building", "has_electricity": 1, "has_water": 1, "has_gas": 0,
+                "has_sewage": 0, "access_road": "asphalt", "is_fenced": 0,
+            })
+        yield row
+
+
+def seed_listings(engine, model, kind: str, n: int, chunk: int = 50000):
+    """Wstawia n losowych ogłoszeń paczkami (executemany na poziomie Core, bez obiektów ORM)."""
+    table = model.__table__
+    rows = listing_rows(kind, n)
+    with engine.begin() as conn:
+        while True:
+            batch = [row for _, row in zip(range(chunk), rows)]
+            if not batch:
+                break
+            conn.execute(table.insert(), batch)
+
+
+def run_queries(engine) -> dict:
+    results = {}
+    with Session(engine) as session:
+        def page(filters: ListingFilters, cursor=None):
+            response = Response()
+            keyset_page(session, FlatListing, filters, cursor, 50, response)
+            return response.headers.get(NEXT_CURSOR_HEADER)
+
+        # kursor strony nr 200 (10 000 wierszy w głąb)
+        deep_cursor = None
+        for _ in range(200):
+            deep_cursor = page(ListingFilters(), deep_cursor)
+
+        results["first_page"] = measure(lambda: page(ListingFilters()), repeats=30)
+        results["page_200"] = measure(lambda: page(ListingFilters(), deep_cursor), repeats=30)
+        results["city"] = measure(lambda: page(ListingFilters(city="Gdańsk")), repeats=30)
+        results["city_price_rooms"] = measure(
+            lambda: page(ListingFilters(city="Gdańsk", price_min=500000, price_max=900000, rooms_min=3)), repeats=30
+        )
+        results["province_area"] = measure(
+            lambda: page(ListingFilters(province="slaskie", area_min=80, area_max=120)), repeats=30
+        )
+    return results
+
+
+def main(rows: str = "1000000"):
+    rows = int(rows)
+    url = os.getenv("BENCH_DATABASE_URL") or f"sqlite:///{tempfile.mkdtemp()}/listings.db"
+    engine = create_engine(url)
+    SQLModel.metadata.create_all(engine, tables=[FlatListing.__table__])
+    with engine.begin() as conn:
+        conn.execute(FlatListing.__table__.delete())
+
+    start = time.perf_counter()
+    seed_listings(engine, FlatListing, "flat", rows)
+    report = {"rows": rows, "seed_s": round(time.perf_counter() - start, 1)}
+
+    with Session(engine) as session:
+        old = select(FlatListing).where(FlatListing.is_active == True).order_by(
+            FlatListing.is_verified.desc(), FlatListing.created_at.desc()
+        )
+        report["unpaginated_all"] = measure(lambda: session.exec(old).all(), repeats=1, warmup=0)
+        session.expunge_all()
+
+    report["with_indexes"] = run_queries(engine)
+
+    for index in FlatListing.__table__.indexes:
+        index.drop(engine)
+    report["without_indexes"] = run_queries(engine)
+    for index in FlatListing.__table__.indexes:
+        index.create(engine)
+
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
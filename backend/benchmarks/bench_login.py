@@ -0,0 +1,148 @@
+"""
+Logowania pod obciążeniem mieszanym: opóźnienia POST /predict/flat same, z równoległymi logowaniami
+po staremu (bcrypt.checkpw w endpoincie synchronicznym, w puli wątków FastAPI) i przez POST /auth/login
+(pula bcrypt z app.passwords z limitem równoległości).
+
+    python -m benchmarks.bench_login [sekund_na_scenariusz] [klientów_predykcji] [klientów_logowania]
+
+Serwer uvicorn (jeden worker) startuje w osobnym procesie na tymczasowej bazie SQLite, z modelem mieszkań
+wytrenowanym przez benchmarks.common.train_pipeline. BCRYPT_ROUNDS i PASSWORD_HASH_WORKERS przechodzą
+do serwera bez zmian.
+"""
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import bcrypt
+import httpx
+import joblib
+import numpy as np
+from fastapi import Depends, HTTPException
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.models.admin import AdminUser
+from app.passwords import PasswordHasher
+from ml.model_loader import ModelRegistry, make_model_set, prepare_for_serving
+
+from benchmarks.bench_async_db import free_port, start_server
+from benchmarks.common import train_pipeline
+
+USERNAME, PASSWORD = "bench", "bench-password"
+FLAT_PAYLOAD = {
+    "area": 55, "rooms": 2, "floor": 3, "totalFloors": 5, "year": 2015,
+    "buildType": "block", "material": "brick", "heating": "gas", "market": "secondary",
+    "constructionStatus": "ready_to_use", "hasLift": 1, "hasOutdoor": 0, "hasParking": 1,
+    "city": "krakow", "district": "", "province": "malopolskie",
+}
+
+
+def bench_app():
+    """Aplikacja z app.main + dawny, synchroniczny endpoint logowania do porównania."""
+    from sqlmodel import select
+
+    import app.main as main_module
+    from app.db import get_session
+    from app.main import app
+    from app.routers.auth import LoginRequest
+
+    def load_bench_models(share_mode: str = "none"):
+        model = prepare_for_serving(joblib.load(os.environ["BENCH_FLAT_MODEL"]))
+        ModelRegistry.activate(make_model_set({"flat": model}))
+
+    main_module.load_models = load_bench_models
+
+    @app.post("/bench/login_inline")
+    def login_inline(request: LoginRequest, session: Session = Depends(get_session)):
+        admin = session.exec(select(AdminUser).where(AdminUser.username == request.username)).first()
+        if not admin or not bcrypt.checkpw(request.password.encode("utf-8"), admin.hashed_password.encode("utf-8")):
+            raise HTTPException(status_code=401, detail="Invalid credentials")
+        return {"status": "ok"}
+
+    return app
+
+
+async def predictions(client: httpx.AsyncClient, deadline: float, latencies: list, rng: random.Random):
+    while time.perf_counter() < deadline:
+        # inna powierzchnia w każdym żądaniu, żeby nie trafiać w cache predykcji
+        payload = {**FLAT_PAYLOAD, "area": round(rng.uniform(20, 150), 2)}
+        start = time.perf_counter()
+        res = await client.post("/predict/flat", params={"explain": "none"}, json=payload)
+        res.raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+
+
+async def logins(client: httpx.AsyncClient, path: str, deadline: float, counts: dict):
+    while time.perf_counter() < deadline:
+        res = await client.post(path, json={"username": USERNAME, "password": PASSWORD})
+        counts[res.status_code] = counts.get(res.status_code, 0) + 1
+
+
+async def scenario(base_url: str, seconds: float, predict_clients: int, login_clients: int, login_path):
+    latencies, counts = [], {}
+    rng = random.Random(0)
+    limits = httpx.Limits(max_connections=predict_clients + login_clients)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        deadline = time.perf_counter() + seconds
+        tasks = [predictions(client, deadline, latencies, rng) for _ in range(predict_clients)]
+        if login_path:
+            tasks += [logins(client, login_path, deadline, counts) for _ in range(login_clients)]
+        start = time.perf_counter()
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+
+    result = {
+        "predict_req_per_s": round(len(latencies) / elapsed, 1),
+        "predict_p50_ms": round(float(np.percentile(latencies, 50)), 2),
+        "predict_p99_ms": round(float(np.percentile(latencies, 99)), 2),
+    }
+    if login_path:
+        result["logins_per_s"] = round(counts.get(200, 0) / elapsed, 2)
+        result["login_status_counts"] = counts
+    return result
+
+
+def main(seconds: str = "20", predict_clients: str = "8", login_clients: str = "16"):
+    seconds, predict_clients, login_clients = float(seconds), int(predict_clients), int(login_clients)
+    workdir = tempfile.mkdtemp()
+    url = f"sqlite:///{workdir}/bench.db"
+    os.environ["BENCH_FLAT_MODEL"] = f"{workdir}/flat.joblib"
+    joblib.dump(train_pipeline("flat"), os.environ["BENCH_FLAT_MODEL"])
+    engine = create_engine(url)
+    SQLModel.metadata.create_all(engine)
+    hasher = PasswordHasher(rounds=int(os.getenv("BCRYPT_ROUNDS", "12")))
+    with Session(engine) as session:
+        for username in (USERNAME, "admin"):
+            # konto "admin" zakładamy sami, żeby start aplikacji nie hashował hasła deweloperskiego
+            session.add(AdminUser(
+                username=username, hashed_password=hasher.hash_sync(PASSWORD),
+                created_at=datetime.now(timezone.utc),
+            ))
+        session.commit()
+    engine.dispose()
+
+    report = {
+        "seconds": seconds, "predict_clients": predict_clients, "login_clients": login_clients,
+        "bcrypt_rounds": hasher.rounds, "cpus": os.cpu_count(),
+    }
+    port = free_port()
+    proc = start_server(url, port, app="benchmarks.bench_login:bench_app", ready_path="/")
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        asyncio.run(scenario(base_url, min(seconds, 5), predict_clients, 0, None))  # rozgrzewka
+        for name, path in [("predict_only", None), ("logins_inline", "/bench/login_inline"), ("logins_pool", "/auth/login")]:
+            report[name] = asyncio.run(scenario(base_url, seconds, predict_clients, login_clients, path))
+        report["server_password_hashing"] = httpx.get(f"{base_url}/api/v1/metrics").json()["password_hashing"]
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,93 @@
+"""
+Pełny pipeline (joblib.dump) kontra kompaktowy artefakt (ml/serving_artifact.py):
+rozmiar pliku, czas ładowania, RSS procesu po załadowaniu i po predykcji, zgodność predykcji.
+
+    python -m benchmarks.bench_serving_artifact [flat|house|plot]
+"""
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+from ml.serving_artifact import export_serving_artifact, load_serving_artifact
+
+from benchmarks.common import BASE_DIR, load_training_frame, measure, train_pipeline
+
+# Mierzone w osobnym procesie, żeby RSS nie zawierał modelu wytrenowanego w benchmarku
+LOAD_PROBE = """
+import json, sys, time
+import joblib, pandas as pd
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+
+from ml.serving_artifact import load_serving_artifact
+
+kind, path, rows_path = sys.argv[1], sys.argv[2], sys.argv[3]
+rows = pd.read_pickle(rows_path)
+before = rss_mb()
+start = time.perf_counter()
+model = load_serving_artifact(path, mmap_mode="r") if kind == "compact" else joblib.load(path)
+load_s = time.perf_counter() - start
+after_load = rss_mb()
+model.predict(rows)
+after_predict = rss_mb()
+print(json.dumps({
+    "load_ms": round(load_s * 1000, 1),
+    "rss_load_mb": round(after_load - before, 1),
+    "rss_after_predict_mb": round(after_predict - before, 1),
+}))
+"""
+
+
+def probe(kind: str, path: Path, rows_path: Path) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", LOAD_PROBE, kind, str(path), str(rows_path)],
+        cwd=BASE_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main(kind: str = "flat"):
+    pipe = train_pipeline(kind)
+    X, _ = load_training_frame(kind)
+    rows = X.sample(200, random_state=0)
+    single = rows.head(1)
+    reference = pipe.predict(rows)
+
+    tmp = Path(tempfile.mkdtemp())
+    rows_path = tmp / "rows.pkl"
+    rows.to_pickle(rows_path)
+
+    variants = {
+        "pipeline": ("pipeline", tmp / "pipeline.joblib", lambda p: joblib.dump(pipe, p)),
+        "pipeline_compress3": ("pipeline", tmp / "pipeline_z3.joblib", lambda p: joblib.dump(pipe, p, compress=3)),
+        "compact": ("compact", tmp / "compact.serving.joblib", lambda p: export_serving_artifact(pipe, p)),
+        "compact_100_trees": ("compact", tmp / "compact100.serving.joblib", lambda p: export_serving_artifact(pipe, p, max_trees=100)),
+    }
+
+    report = {}
+    for name, (loader, path, dump) in variants.items():
+        dump(path)
+        model = load_serving_artifact(path) if loader == "compact" else joblib.load(path)
+        predictions = model.predict(rows)
+        report[name] = {
+            "size_mb": round(path.stat().st_size / 2 ** 20, 2),
+            **probe(loader, path, rows_path),
+            "max_abs_diff": float(np.max(np.abs(predictions - reference))),
+            "max_rel_diff": float(np.max(np.abs(predictions - reference) / np.abs(reference))),
+            "predict_1_row": measure(lambda: model.predict(single), repeats=30),
+        }
+
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,30 @@
+"""
+Koszt SHAP na żądanie: TreeExplainer budowany przy każdym wywołaniu kontra zbudowany raz (ModelRegistry).
+
+    python -m benchmarks.bench_shap_explainer
+"""
+import json
+
+from app.main import compute_prediction_and_shap
+from app.models.house import HouseInput
+from ml.input_adapter import adapt_house_input
+from ml.model_loader import build_explainer
+
+from benchmarks.common import SAMPLE_INPUTS, measure, train_pipeline
+
+
+def main():
+    pipeline = train_pipeline("house")
+    input_df = adapt_house_input(HouseInput(**SAMPLE_INPUTS["house"]))
+    explainer = build_explainer(pipeline)
+
+    report = {
+        "per_request_explainer": measure(lambda: compute_prediction_and_shap(pipeline, input_df), repeats=20),
+        "cached_explainer": measure(lambda: compute_prediction_and_shap(pipeline, input_df, explainer), repeats=20),
+        "explainer_build": measure(lambda: build_explainer(pipeline), repeats=10),
+    }
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main()
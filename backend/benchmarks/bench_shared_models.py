@@ -0,0 +1,97 @@
+"""
+Pamięć N workerów z tym samym modelem w trybach MODEL_SHARE_MODE (none / mmap / shm).
+Każdy worker to osobny proces (jak workery uvicorna), który ładuje model i robi predykcję.
+RSS liczy strony współdzielone w każdym procesie osobno, PSS dzieli je między procesy,
+więc suma PSS to faktyczny koszt pamięci wszystkich workerów.
+
+    python -m benchmarks.bench_shared_models [flat|house|plot] [liczba_workerów]
+"""
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import joblib
+
+from ml.model_loader import MODEL_FILES
+from ml.serving_artifact import export_serving_artifact, serving_artifact_path
+
+from benchmarks.common import BASE_DIR, load_training_frame, train_pipeline
+
+WORKER = """
+import sys, time
+from pathlib import Path
+import pandas as pd
+import ml.model_loader as model_loader
+
+path, mode, rows_path, shm_dir = Path(sys.argv[1]), sys.argv[2], sys.argv[3], Path(sys.argv[4])
+model = model_loader.load_model_file(path, model_format="pipeline", share_mode=mode, shm_dir=shm_dir)
+model.predict(pd.read_pickle(rows_path))
+print("ready", flush=True)
+time.sleep(3600)
+"""
+
+
+def smaps_rollup(pid: int) -> dict:
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                values[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return values
+
+
+def measure_mode(mode: str, model_path: Path, rows_path: Path, shm_dir: Path, workers: int) -> dict:
+    procs = [
+        subprocess.Popen(
+            [sys.executable, "-c", WORKER, str(model_path), mode, str(rows_path), str(shm_dir)],
+            cwd=BASE_DIR, stdout=subprocess.PIPE, text=True
+        )
+        for _ in range(workers)
+    ]
+    try:
+        for p in procs:
+            p.stdout.readline()
+        time.sleep(0.5)
+        stats = [smaps_rollup(p.pid) for p in procs]
+    finally:
+        for p in procs:
+            p.kill()
+            p.wait()
+
+    return {
+        "rss_total_mb": round(sum(s["Rss"] for s in stats), 1),
+        "pss_total_mb": round(sum(s["Pss"] for s in stats), 1),
+        "shared_per_worker_mb": round(sum(s.get("Shared_Clean", 0) + s.get("Shared_Dirty", 0) for s in stats) / workers, 1),
+        "private_per_worker_mb": round(sum(s.get("Private_Clean", 0) + s.get("Private_Dirty", 0) for s in stats) / workers, 1),
+    }
+
+
+def main(kind: str = "flat", workers: str = "4"):
+    workers = int(workers)
+    pipe = train_pipeline(kind)
+    X, _ = load_training_frame(kind)
+
+    tmp = Path(tempfile.mkdtemp())
+    model_path = tmp / MODEL_FILES[kind]
+    joblib.dump(pipe, model_path)
+    export_serving_artifact(pipe, serving_artifact_path(model_path))
+    rows_path = tmp / "rows.pkl"
+    X.sample(50, random_state=0).to_pickle(rows_path)
+    shm_dir = Path("/dev/shm") / f"properlytics-bench-{tmp.name}"
+
+    report = {"workers": workers}
+    for mode in ("none", "mmap", "shm"):
+        report[mode] = measure_mode(mode, model_path, rows_path, shm_dir, workers)
+    print(json.dumps(report, indent=4))
+
+    for f in shm_dir.glob("*"):
+        f.unlink()
+    shm_dir.rmdir()
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
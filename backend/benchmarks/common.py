@@ -0,0 +1,124 @@
+"""
+Wspólne narzędzia do benchmarków. Uruchamiane z katalogu backend, np.:
+
+    python -m benchmarks.bench_flat_components
+"""
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.impute import SimpleImputer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+DATA_FILES = {
+    "flat": "clean_mieszkania.csv",
+    "house": "clean_domy.csv",
+    "plot": "clean_dzialki.csv",
+}
+
+ALLOWED_COLUMNS = {
+    "flat": [
+        "area", "rooms", "floor", "floors_in_building", "year_built",
+        "building_type", "building_material", "heating", "market", "finishing",
+        "elevator", "balcony/garden", "parking", "city", "district", "region",
+    ],
+    "house": [
+        "area", "plot_area", "rooms", "floors", "year_built", "building_type",
+        "building_material", "heating", "finishing", "parking", "city", "district", "region",
+    ],
+    "plot": [
+        "area", "plot_type", "purpose", "access_road", "utilities", "city", "district", "region",
+    ],
+}
+
+
+def data_dir() -> Path:
+    env = os.getenv("PROPERLYTICS_DATA_DIR")
+    if env:
+        return Path(env)
+    local = BASE_DIR.parent / "data"
+    return local if local.exists() else Path("/data")
+
+
+def load_training_frame(kind: str):
+    df = pd.read_csv(data_dir() / DATA_FILES[kind])
+    df = df[[c for c in ALLOWED_COLUMNS[kind] + ["price"] if c in df.columns]]
+    df = df.dropna(subset=["price"])
+    return df.drop(columns=["price"]), df["price"]
+
+
+def train_pipeline(kind: str, n_estimators: int = 400, max_depth: int = 30, n_jobs: int = -1) -> Pipeline:
+    """Pipeline o tej samej budowie co w ml/train_*.py, trenowany na danych z CSV."""
+    X, y = load_training_frame(kind)
+
+    categorical = X.select_dtypes(include=["object", "string"]).columns
+    numerical = X.select_dtypes(exclude=["object", "string"]).columns
+
+    preprocessor = ColumnTransformer(
+        transformers=[
+            ("num", Pipeline([("imputer", SimpleImputer(strategy="median"))]), numerical),
+            ("cat", Pipeline([
+                ("imputer", SimpleImputer(strategy="most_frequent")),
+                ("onehot", OneHotEncoder(handle_unknown="ignore"))
+            ]), categorical)
+        ]
+    )
+    model = RandomForestRegressor(
+        n_estimators=n_estimators,
+        max_depth=max_depth,
+        random_state=42,
+        n_jobs=n_jobs
+    )
+    pipe = Pipeline([("preprocessing", preprocessor), ("model", model)])
+    pipe.fit(X, y)
+    pipe.named_steps["model"].n_jobs = 1
+    return pipe
+
+
+def measure(fn, repeats: int = 50, warmup: int = 3) -> dict:
+    """Czas pojedynczego wywołania fn w milisekundach: p50, p99, średnia."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples = np.array(samples)
+    return {
+        "p50_ms": round(float(np.percentile(samples, 50)), 3),
+        "p99_ms": round(float(np.percentile(samples, 99)), 3),
+        "mean_ms": round(float(samples.mean()), 3),
+    }
+
+
+SAMPLE_INPUTS = {
+    "flat": {
+        "area": 55, "rooms": 2, "floor": 3, "totalFloors": 5, "year": 2015,
+        "buildType": "block", "material": "brick", "heating": "gas",
+        "market": "secondary", "constructionStatus": "ready_to_use",
+        "hasLift": 1, "hasOutdoor": 1, "hasParking": 1,
+        "city": "krakow", "district": "", "province": "malopolskie",
+    },
+    "house": {
+        "areaHouse": 120, "areaPlot": 600, "rooms": 4, "floors": 2, "year": 2010,
+        "buildType": "detached", "constructionStatus": "ready_to_use", "market": "secondary",
+        "material": "brick", "roofType": "diagonal",
+        "hasGarage": 1, "hasBasement": 0, "hasGas": 1, "hasSewerage": 1, "isHardAccess": 0,
+        "fenceType": "", "heatingType": "gas",
+        "city": "warszawa", "province": "mazowieckie",
+    },
+    "plot": {
+        "area": 1000, "type": "building", "locationType": "suburban",
+        "hasElectricity": 1, "hasWater": 1, "hasGas": 0, "hasSewerage": 1,
+        "isHardAccess": 0, "hasFence": 1,
+        "city": "poznan", "province": "wielkopolskie",
+    },
+}
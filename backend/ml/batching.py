@@ -0,0 +1,129 @@
+import os
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+def score_rows(pipeline, encoder, rows: List[Dict[str, Any]]) -> np.ndarray:
+    """Jedno wywołanie predict dla wielu wierszy po adaptacji wejścia (z koderem cech albo przez DataFrame)."""
+    if encoder is None:
+        return pipeline.predict(pd.DataFrame(rows))
+    return pipeline.named_steps["model"].predict(encoder.encode_rows(rows))
+
+
+class PredictionBatcher:
+    """
+    Zbiera równoległe predykcje pojedynczych wierszy i wycenia je jednym wywołaniem predict.
+
+    Wątek obsługi żądania wstawia wiersz do kolejki i czeka na Future. Wątek dyspozytora bierze pierwszy
+    wiersz, dobiera kolejne przez max_wait_ms albo do max_batch_size wierszy, grupuje je po modelu
+    (różne typy i wersje modeli nie trafiają do jednego wsadu) i rozsyła wyniki. Przy braku ruchu
+    pojedynczy wiersz idzie od razu, bez czekania.
+    """
+
+    def __init__(self, enabled: bool = False, max_batch_size: int = 32, max_wait_ms: float = 3.0, window: int = 10000):
+        self.enabled = enabled
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._last_size = 0
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.batches = 0
+        self.rows = 0
+        self.errors = 0
+        self._sizes: Counter = Counter()
+        # opóźnienie dodane przez kolejkę (od wstawienia wiersza do startu predict), ostatnie `window` próbek
+        self._delays_ms: deque = deque(maxlen=window)
+
+    def predict(self, pipeline, encoder, row: Dict[str, Any], timeout: Optional[float] = None) -> float:
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put((pipeline, encoder, row, future, time.perf_counter()))
+        return future.result(timeout)
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="predict-batcher", daemon=True)
+                self._thread.start()
+
+    def _collect(self) -> List[tuple]:
+        items = [self._queue.get()]
+        # bez ruchu (poprzedni wsad miał jeden wiersz, kolejka pusta) nie ma na co czekać - pojedyncze
+        # żądanie nie płaci max_wait_ms; pod obciążeniem wiersze i tak zbierają się w trakcie predict
+        if self._last_size <= 1 and self._queue.empty():
+            self._last_size = 1
+            return items
+        deadline = time.perf_counter() + self.max_wait_ms / 1000
+        while len(items) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                items.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        self._last_size = len(items)
+        return items
+
+    def _loop(self):
+        while True:
+            groups: Dict[int, List[tuple]] = {}
+            for item in self._collect():
+                groups.setdefault(id(item[0]), []).append(item)
+            for items in groups.values():
+                self._run(items)
+
+    def _run(self, items: List[tuple]):
+        started = time.perf_counter()
+        pipeline, encoder = items[0][0], items[0][1]
+        try:
+            predictions = score_rows(pipeline, encoder, [item[2] for item in items])
+        except Exception as e:
+            with self._stats_lock:
+                self.errors += 1
+            for item in items:
+                item[3].set_exception(e)
+            return
+
+        for item, prediction in zip(items, predictions):
+            item[3].set_result(float(prediction))
+        with self._stats_lock:
+            self.batches += 1
+            self.rows += len(items)
+            self._sizes[len(items)] += 1
+            self._delays_ms.extend((started - item[4]) * 1000 for item in items)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            delays = np.array(self._delays_ms) if self._delays_ms else np.zeros(1)
+            return {
+                "enabled": self.enabled,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait_ms,
+                "batches": self.batches,
+                "rows": self.rows,
+                "errors": self.errors,
+                "avg_batch_size": round(self.rows / self.batches, 2) if self.batches else 0.0,
+                "batch_sizes": dict(sorted(self._sizes.items())),
+                "queue_delay_ms": {
+                    "p50": round(float(np.percentile(delays, 50)), 3),
+                    "p99": round(float(np.percentile(delays, 99)), 3),
+                    "max": round(float(delays.max()), 3),
+                },
+            }
+
+
+prediction_batcher = PredictionBatcher(
+    enabled=os.getenv("PREDICT_BATCHING", "0") == "1",
+    max_batch_size=int(os.getenv("PREDICT_BATCH_MAX_SIZE", "32")),
+    max_wait_ms=float(os.getenv("PREDICT_BATCH_MAX_WAIT_MS", "3")),
+)
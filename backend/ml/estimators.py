@@ -0,0 +1,118 @@
+"""
+Wybór estymatora dla skryptów treningowych i pomiary serwowania zapisywane do raportów.
+
+Estymator wybiera się zmienną MODEL_ESTIMATOR_<TYP> (np. MODEL_ESTIMATOR_FLAT=hist_gradient_boosting),
+a domyślnie MODEL_ESTIMATOR dla wszystkich typów; bez ustawień zostaje las losowy.
+"""
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
+from sklearn.impute import SimpleImputer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder
+
+DEFAULT_ESTIMATOR = "random_forest"
+
+
+def _random_forest():
+    return RandomForestRegressor(
+        n_estimators=400,
+        max_depth=30,
+        random_state=42,
+        # TRAIN_N_JOBS ustawia ml.retraining, gdy trzy skrypty uczą się równolegle
+        n_jobs=int(os.getenv("TRAIN_N_JOBS", "-1"))
+    )
+
+
+def _hist_gradient_boosting():
+    return HistGradientBoostingRegressor(
+        max_iter=500,
+        learning_rate=0.05,
+        max_leaf_nodes=63,
+        l2_regularization=1.0,
+        early_stopping=True,
+        random_state=42
+    )
+
+
+ESTIMATORS = {
+    "random_forest": _random_forest,
+    "hist_gradient_boosting": _hist_gradient_boosting,
+}
+
+# estymatory, które nie przyjmują macierzy rzadkich z OneHotEncodera
+DENSE_INPUT = {"hist_gradient_boosting"}
+
+
+def estimator_choice(kind: str) -> str:
+    name = os.getenv(f"MODEL_ESTIMATOR_{kind.upper()}") or os.getenv("MODEL_ESTIMATOR") or DEFAULT_ESTIMATOR
+    if name not in ESTIMATORS:
+        raise ValueError(f"Nieznany estymator: {name} (dostępne: {', '.join(ESTIMATORS)})")
+    return name
+
+
+def make_estimator(name: str):
+    return ESTIMATORS[name]()
+
+
+def make_preprocessor(numerical, categorical, estimator_name: str = DEFAULT_ESTIMATOR) -> ColumnTransformer:
+    numeric_transformer = Pipeline([
+        ("imputer", SimpleImputer(strategy="median"))
+    ])
+
+    categorical_transformer = Pipeline([
+        ("imputer", SimpleImputer(strategy="most_frequent")),
+        ("onehot", OneHotEncoder(handle_unknown="ignore", sparse_output=estimator_name not in DENSE_INPUT))
+    ])
+
+    return ColumnTransformer(
+        transformers=[
+            ("num", numeric_transformer, numerical),
+            ("cat", categorical_transformer, categorical)
+        ]
+    )
+
+
+def _percentiles_ms(samples) -> Dict[str, float]:
+    samples = np.asarray(samples) * 1000
+    return {"p50": round(float(np.percentile(samples, 50)), 3), "p99": round(float(np.percentile(samples, 99)), 3)}
+
+
+def serving_metrics(pipe, X_test: pd.DataFrame, model_path, repeats: int = 50) -> Dict[str, Any]:
+    """
+    Koszt serwowania wytrenowanego modelu: opóźnienie predykcji jednego wiersza (tak jak w API),
+    paczki 1000 wierszy (endpointy /batch) i rozmiar zapisanego pliku.
+    """
+    n_jobs = getattr(pipe.named_steps["model"], "n_jobs", None)
+    if n_jobs is not None:
+        # API serwuje z n_jobs=1 (ml.model_loader.prepare_for_serving)
+        pipe.named_steps["model"].n_jobs = 1
+
+    single = X_test.head(1)
+    batch = X_test.sample(1000, replace=len(X_test) < 1000, random_state=0)
+
+    pipe.predict(single)
+    row_times, batch_times = [], []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        pipe.predict(single)
+        row_times.append(time.perf_counter() - start)
+    for _ in range(max(3, repeats // 10)):
+        start = time.perf_counter()
+        pipe.predict(batch)
+        batch_times.append(time.perf_counter() - start)
+
+    if n_jobs is not None:
+        pipe.named_steps["model"].n_jobs = n_jobs
+
+    return {
+        "predict_row_ms": _percentiles_ms(row_times),
+        "predict_1k_ms": _percentiles_ms(batch_times),
+        "artifact_size_mb": round(Path(model_path).stat().st_size / 2 ** 20, 2),
+    }
@@ -0,0 +1,64 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+class ExplanationJobs:
+    """
+    Odroczone wyjaśnienia SHAP: cena wraca od razu, a wyjaśnienie liczy się w tle
+    i jest pobierane później po identyfikatorze.
+    """
+
+    def __init__(self, max_workers: int = 2, ttl_seconds: int = 600, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="explain")
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable[[], Dict[str, Any]]) -> str:
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._evict()
+            self._jobs[job_id] = {
+                "id": job_id,
+                "status": "pending",
+                "result": None,
+                "error": None,
+                "created_at": time.time(),
+            }
+        self._executor.submit(self._run, job_id, fn)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def _run(self, job_id: str, fn: Callable[[], Dict[str, Any]]):
+        try:
+            result, status, error = fn(), "done", None
+        except Exception as e:
+            result, status, error = None, "failed", str(e)
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(status=status, result=result, error=error)
+
+    def _evict(self):
+        now = time.time()
+        expired = [k for k, v in self._jobs.items() if now - v["created_at"] > self.ttl_seconds]
+        for k in expired:
+            del self._jobs[k]
+        # najstarsze wpisy wylatują, gdy magazyn jest pełny (dict zachowuje kolejność wstawiania)
+        while len(self._jobs) >= self.max_entries:
+            del self._jobs[next(iter(self._jobs))]
+
+
+explanation_jobs = ExplanationJobs(
+    max_workers=int(os.getenv("EXPLAIN_WORKERS", "2")),
+    ttl_seconds=int(os.getenv("EXPLAIN_TTL_SECONDS", "600")),
+)
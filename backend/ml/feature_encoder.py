@@ -0,0 +1,147 @@
+"""
+Koder wiersza cech bez pandas (FEATURE_ENCODER=compiled).
+
+Pojedyncza predykcja przez pipeline to pd.DataFrame([wiersz]) i ColumnTransformer z SimpleImputer
+i OneHotEncoder - dziesiątki obiektów pandas i walidacji na jeden wiersz. CompiledEncoder przy ładowaniu
+modeli odczytuje z dopasowanego preprocessora kolejność kolumn, stałe imputacji i słowniki kategorii,
+a w trakcie obsługi żądania zamienia słownik z ml.input_adapter (flat_row, house_row, plot_row)
+prosto na wektor cech NumPy.
+"""
+import math
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.impute import SimpleImputer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder
+
+# "compiled" - CompiledEncoder tam, gdzie preprocessor jest obsługiwany, "pandas" - zawsze pipeline.predict
+FEATURE_ENCODER = os.getenv("FEATURE_ENCODER", "compiled")
+
+
+def is_nan(value) -> bool:
+    return isinstance(value, float) and math.isnan(value)
+
+
+def is_missing_number(value) -> bool:
+    # kolumna liczbowa jest rzutowana na float, więc None staje się NaN i SimpleImputer traktuje go jako brak
+    return value is None or is_nan(value)
+
+
+def _steps(transformer) -> List[Any]:
+    if transformer == "passthrough":
+        return []
+    if isinstance(transformer, Pipeline):
+        return [step for _, step in transformer.steps if step != "passthrough"]
+    return [transformer]
+
+
+class CompiledEncoder:
+    """
+    Kolumny liczbowe: (kolumna, indeks wyjścia, wartość imputacji albo None).
+    Kolumny kategoryczne: (kolumna, {kategoria: indeks wyjścia}, wartość imputacji albo None);
+    nieznana kategoria daje same zera, jak OneHotEncoder(handle_unknown="ignore").
+    """
+
+    def __init__(self, numeric: Sequence[Tuple[str, int, Any]], categorical: Sequence[Tuple[str, Dict[Any, int], Any]],
+                 n_features: int):
+        self.numeric = list(numeric)
+        self.categorical = list(categorical)
+        self.n_features = n_features
+
+    @classmethod
+    def from_preprocessor(cls, preprocessor: ColumnTransformer) -> "CompiledEncoder":
+        if not isinstance(preprocessor, ColumnTransformer) or not hasattr(preprocessor, "transformers_"):
+            raise ValueError("Obsługiwany jest tylko dopasowany ColumnTransformer")
+
+        numeric, categorical, offset = [], [], 0
+        for name, transformer, columns in preprocessor.transformers_:
+            if transformer == "drop" or len(columns) == 0:
+                continue
+            if not all(isinstance(col, str) for col in columns):
+                raise ValueError(f"Transformer {name}: kolumny muszą być wskazane nazwami")
+
+            fill, encoder = None, None
+            for step in _steps(transformer):
+                if isinstance(step, SimpleImputer) and fill is None and encoder is None:
+                    if not (isinstance(step.missing_values, float) and math.isnan(step.missing_values)):
+                        raise ValueError(f"Transformer {name}: obsługiwane są tylko braki NaN")
+                    if step.add_indicator:
+                        raise ValueError(f"Transformer {name}: add_indicator nie jest obsługiwany")
+                    fill = list(step.statistics_)
+                elif isinstance(step, OneHotEncoder) and encoder is None:
+                    if step.handle_unknown != "ignore" or step.drop_idx_ is not None:
+                        raise ValueError(f"Transformer {name}: OneHotEncoder musi mieć handle_unknown='ignore' i drop=None")
+                    encoder = step
+                else:
+                    raise ValueError(f"Transformer {name}: nieobsługiwany krok {type(step).__name__}")
+
+            for i, col in enumerate(columns):
+                col_fill = fill[i] if fill is not None else None
+                if encoder is None:
+                    numeric.append((col, offset, col_fill))
+                    offset += 1
+                else:
+                    categories = encoder.categories_[i]
+                    lookup = {_plain(value): offset + j for j, value in enumerate(categories)}
+                    categorical.append((col, lookup, _plain(col_fill)))
+                    offset += len(categories)
+
+        return cls(numeric, categorical, offset)
+
+    def encode(self, row: Dict[str, Any]) -> np.ndarray:
+        """Macierz (1, n_features) dla jednego wiersza po adaptacji wejścia."""
+        out = np.zeros((1, self.n_features))
+        values = out[0]
+        for col, index, fill in self.numeric:
+            value = row.get(col)
+            if is_missing_number(value):
+                value = np.nan if fill is None else fill
+            values[index] = value
+        for col, lookup, fill in self.categorical:
+            value = row.get(col)
+            # w kolumnie kategorycznej jednowierszowej ramki None zostaje obiektem (dtype object), którego
+            # SimpleImputer nie uznaje za brak - OneHotEncoder daje wtedy same zera, jak dla nieznanej kategorii
+            if fill is not None and is_nan(value):
+                value = fill
+            index = lookup.get(value)
+            if index is not None:
+                values[index] = 1.0
+        return out
+
+    def encode_rows(self, rows: Sequence[Dict[str, Any]]) -> np.ndarray:
+        return np.concatenate([self.encode(row) for row in rows]) if rows else np.zeros((0, self.n_features))
+
+
+def _plain(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def build_encoder(pipeline, check_row: Optional[Dict[str, Any]] = None) -> Optional[CompiledEncoder]:
+    """
+    CompiledEncoder dla kroku "preprocessing" albo None (FEATURE_ENCODER=pandas, brak preprocessora,
+    nieobsługiwany preprocessor albo różnica względem preprocessor.transform na wierszu kontrolnym).
+    """
+    if FEATURE_ENCODER != "compiled" or not hasattr(pipeline, "named_steps"):
+        return None
+    preprocessor = pipeline.named_steps.get("preprocessing")
+    if preprocessor is None:
+        return None
+
+    try:
+        encoder = CompiledEncoder.from_preprocessor(preprocessor)
+    except ValueError as e:
+        print("Koder cech bez pandas niedostępny:", e)
+        return None
+
+    if check_row is not None:
+        expected = preprocessor.transform(pd.DataFrame([check_row]))
+        if hasattr(expected, "toarray"):
+            expected = expected.toarray()
+        if not np.array_equal(encoder.encode(check_row), expected):
+            print("Koder cech bez pandas różni się od preprocessora, zostaje pandas.")
+            return None
+    return encoder
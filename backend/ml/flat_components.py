@@ -0,0 +1,144 @@
+from typing import Any, Dict, List, Tuple
+
+import pandas as pd
+
+
+MATERIAL_PL_NAMES = {
+    "brick": "Cegła",
+    "concrete": "Beton",
+    "silikat": "Silikat",
+    "breezeblock": "Pustak",
+    "concrete_plate": "Wielka Płyta",
+    "other": "Inny"
+}
+
+OPTIMAL_FLOORS = ["1", "2", "3"]
+
+
+def flat_counterfactuals(row: Dict[str, Any]) -> List[Tuple[str, Any, str]]:
+    """
+    Lista wariantów (kolumna, wartość alternatywna, etykieta) dla wiersza mieszkania
+    po adaptacji (ml.input_adapter.flat_row).
+    """
+    variants = []
+
+    def variant(col_name: str, target_val: Any, label_text: str):
+        if col_name in row:
+            variants.append((col_name, target_val, label_text))
+
+    curr_heat = row["heating"]
+    if curr_heat == "urban":
+        variant("heating", "electrical", "Ogrzewanie miejskie")
+    elif curr_heat == "electrical":
+        variant("heating", "urban", "Ogrzewanie elektryczne")
+    else:
+        variant("heating", "urban", "Ogrzewanie")
+
+    curr_market = row["market"]
+    if curr_market == "PRIMARY":
+        variant("market", "SECONDARY", "Rynek pierwotny")
+    else:
+        variant("market", "PRIMARY", "Rynek wtórny")
+
+    curr_fin = row["finishing"]
+    if curr_fin == "ready_to_use":
+        variant("finishing", "to_renovation", "Stan: pod klucz")
+    elif curr_fin == "to_renovation":
+        variant("finishing", "ready_to_use", "Stan: do remontu")
+    else:
+        variant("finishing", "ready_to_use", "Stan deweloperski")
+
+    curr_mat = row["building_material"]
+    label_mat = MATERIAL_PL_NAMES.get(curr_mat, str(curr_mat))
+    if curr_mat == "concrete_plate":
+        variant("building_material", "brick", "Materiał: Wielka Płyta")
+    else:
+        variant("building_material", "concrete_plate", f"Materiał: {label_mat}")
+
+    curr_floor_str = row["floor"]
+    has_elevator = row["elevator"]
+    if curr_floor_str == "0":
+        variant("floor", "3", "Położenie: Parter")
+    elif curr_floor_str in OPTIMAL_FLOORS:
+        variant("floor", "0", f"Piętro {curr_floor_str} (vs Parter)")
+    elif curr_floor_str in [str(i) for i in range(4, 11)]:
+        if has_elevator == 0:
+            variant("floor", "1", f"Piętro {curr_floor_str} bez windy")
+        else:
+            variant("floor", "0", f"Piętro {curr_floor_str} (z widokiem)")
+    elif curr_floor_str == "higher_10":
+        variant("floor", "3", "Apartament na szczycie (>10p)")
+
+    curr_type = row["building_type"]
+    if curr_type == "apartment":
+        variant("building_type", "block", "Typ: Apartamentowiec")
+    elif curr_type == "tenement":
+        variant("building_type", "block", "Typ: Kamienica")
+    elif curr_type == "house":
+        variant("building_type", "block", "Typ: Dom wielorodzinny")
+    elif curr_type == "block":
+        variant("building_type", "apartment", "Typ: Blok (vs Apartament)")
+
+    curr_year = row["year_built"]
+    if curr_year < 1945:
+        era_label = "Kamienica/Przedwojenne"
+    elif 1945 <= curr_year <= 1989:
+        era_label = "Budownictwo PRL"
+    elif 1990 <= curr_year <= 2012:
+        era_label = "Lata 90/2000"
+    else:
+        era_label = "Nowe Budownictwo"
+
+    if curr_year > 2012:
+        variant("year_built", 1980, f"Rok: {int(curr_year)} ({era_label})")
+    else:
+        variant("year_built", 2024, f"Rok: {int(curr_year)} ({era_label})")
+
+    if row["elevator"] == 1:
+        variant("elevator", 0, "Winda")
+    if row["balcony/garden"] == 1:
+        variant("balcony/garden", 0, "Balkon/Taras/Ogród")
+    if row["parking"] == 1:
+        variant("parking", 0, "Miejsce parkingowe")
+
+    return variants
+
+
+def build_counterfactual_frame(input_df: pd.DataFrame, variants: List[Tuple[str, Any, str]]) -> pd.DataFrame:
+    """Jedna ramka z kopią wiersza bazowego na każdy wariant, z podmienioną jedną kolumną."""
+    frame = input_df.iloc[[0] * len(variants)].reset_index(drop=True)
+    for i, (col_name, target_val, _) in enumerate(variants):
+        frame.at[i, col_name] = target_val
+    return frame
+
+
+def compute_flat_components(model, input_df: pd.DataFrame, base_prediction: float) -> List[Dict[str, Any]]:
+    """
+    Wpływ pojedynczych cech na cenę: wszystkie warianty są oceniane jednym wywołaniem predict.
+    Gdy wsad się nie powiedzie, warianty są oceniane pojedynczo i pomijany jest tylko ten, który zawiódł.
+    """
+    variants = flat_counterfactuals(input_df.iloc[0].to_dict())
+    if not variants:
+        return []
+
+    frame = build_counterfactual_frame(input_df, variants)
+    try:
+        new_prices = list(model.predict(frame))
+    except Exception:
+        new_prices = []
+        for i in range(len(variants)):
+            try:
+                new_prices.append(model.predict(frame.iloc[[i]])[0])
+            except Exception:
+                new_prices.append(None)
+
+    components = []
+    for (_, _, label_text), new_price in zip(variants, new_prices):
+        if new_price is None:
+            continue
+        diff = base_prediction - new_price
+        if abs(diff) > 0:
+            components.append({"name": label_text, "value": round(float(diff), 2)})
+
+    components.sort(key=lambda x: abs(x["value"]), reverse=True)
+    return components
@@ -0,0 +1,132 @@
+"""
+Silnik predykcji lasu na skompilowanych tablicach NumPy (MODEL_ENGINE=numpy).
+
+Przy pojedynczym wierszu RandomForestRegressor.predict większość czasu spędza na walidacji wejścia,
+uruchamianiu joblib i wywołaniu predict każdego drzewa z osobna, a nie na samym przejściu po drzewach.
+Tu przy ładowaniu modeli wszystkie drzewa są spłaszczane do ciągłych tablic węzłów, a wiersze schodzą
+przez wszystkie drzewa naraz: jedna operacja NumPy na poziom drzewa, bez względu na liczbę drzew.
+"""
+import os
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from ml.serving_artifact import CompactForest, CompactPipeline, flatten_forest
+
+# "sklearn" - predict estymatora, "numpy" - CompiledForest; MODEL_ENGINE_<TYP> nadpisuje wybór dla typu
+ENGINES = ("sklearn", "numpy")
+MODEL_ENGINE = os.getenv("MODEL_ENGINE", "sklearn")
+# Powyżej tylu wierszy przejście po wszystkich drzewach naraz przegrywa z sklearn (losowe odczyty z dużych
+# macierzy węzłów), więc duże wsady wracają do predict oryginalnego lasu sklearn, jeśli go mamy
+MAX_ROWS = int(os.getenv("FOREST_ENGINE_MAX_ROWS", "256"))
+
+
+def engine_for(kind: str) -> str:
+    engine = os.getenv(f"MODEL_ENGINE_{kind.upper()}", MODEL_ENGINE)
+    if engine not in ENGINES:
+        raise ValueError(f"Nieznany silnik predykcji: {engine} (dostępne: {', '.join(ENGINES)})")
+    return engine
+
+
+def tree_depth(children_left: np.ndarray, children_right: np.ndarray, roots: np.ndarray) -> int:
+    """Największa głębokość w lesie, liczona poziomami od korzeni."""
+    frontier, depth = np.asarray(roots), 0
+    while True:
+        internal = frontier[children_left[frontier] >= 0]
+        if not len(internal):
+            return depth
+        frontier = np.concatenate([children_left[internal], children_right[internal]])
+        depth += 1
+
+
+class CompiledForest:
+    """
+    Las regresyjny przygotowany do szybkiego przejścia:
+    - dzieci w jednej tablicy [prawe, lewe] na węzeł, więc krok to children[2 * węzeł + (x <= próg)],
+    - liście wskazują same na siebie (próg +inf), więc pętla ma stałą liczbę kroków równą głębokości lasu
+      i nie potrzebuje maskowania już zakończonych drzew,
+    - wartości liści podzielone przez liczbę drzew - predykcja to suma po drzewach.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], source=None, max_rows: int = MAX_ROWS):
+        left = np.asarray(arrays["children_left"], dtype=np.int64)
+        right = np.asarray(arrays["children_right"], dtype=np.int64)
+        leaf = left < 0
+        nodes = np.arange(len(left))
+
+        children = np.empty((len(left), 2), dtype=np.int64)
+        children[:, 0] = np.where(leaf, nodes, right)
+        children[:, 1] = np.where(leaf, nodes, left)
+        self.children = children.ravel()
+        self.feature = np.where(leaf, 0, arrays["feature"]).astype(np.int64)
+        self.threshold = np.where(leaf, np.inf, arrays["threshold"]).astype(np.float64)
+        self.roots = np.asarray(arrays["roots"], dtype=np.int64)
+        self.value = np.asarray(arrays["value"], dtype=np.float64) / len(self.roots)
+        self.depth = tree_depth(left, right, self.roots)
+        self.n_features_in_ = int(arrays["n_features"][0])
+        # oryginalny las zostaje dla SHAP (TreeExplainer)
+        self.source = source
+        self.max_rows = max_rows
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    def predict(self, X) -> np.ndarray:
+        if X.shape[0] > self.max_rows and hasattr(self.source, "estimators_"):
+            return self.source.predict(X)
+        if hasattr(X, "toarray"):
+            X = X.toarray()
+        # jak w sklearn: cechy rzutowane na float32, porównanie z progami float64
+        X = np.asarray(X, dtype=np.float32)
+        n_rows = X.shape[0]
+        flat = X.ravel()
+        offsets = (np.arange(n_rows, dtype=np.int64) * X.shape[1])[:, None]
+
+        node = np.broadcast_to(self.roots, (n_rows, len(self.roots)))
+        for _ in range(self.depth):
+            go_left = flat[offsets + self.feature[node]] <= self.threshold[node]
+            node = self.children[2 * node + go_left]
+
+        return self.value[node].sum(axis=1)
+
+    def shap_model(self):
+        if isinstance(self.source, CompactForest):
+            return self.source.shap_model()
+        return self.source
+
+
+def compile_forest(model) -> Optional[CompiledForest]:
+    """CompiledForest z lasu sklearn albo z CompactForest; None, gdy model nie jest lasem drzew regresyjnych."""
+    if isinstance(model, CompiledForest):
+        return model
+    if isinstance(model, CompactForest):
+        arrays = {
+            "children_left": model.children_left,
+            "children_right": model.children_right,
+            "feature": model.feature,
+            "threshold": model.threshold,
+            "value": model.value,
+            "roots": model.roots,
+            "n_features": np.array([model.n_features_in_]),
+        }
+        return CompiledForest(arrays, source=model)
+    if type(model).__name__ not in ("RandomForestRegressor", "ExtraTreesRegressor"):
+        return None
+    return CompiledForest(flatten_forest(model), source=model)
+
+
+def compile_pipeline(pipeline) -> Any:
+    """
+    Podmienia krok "model" na CompiledForest (preprocessor zostaje ten sam).
+    Modele, których nie da się skompilować, wracają bez zmian.
+    Uwaga: kompilacja tworzy prywatne kopie tablic, więc przy MODEL_SHARE_MODE=mmap/shm las nie jest współdzielony.
+    """
+    if not hasattr(pipeline, "named_steps") or "model" not in pipeline.named_steps:
+        return pipeline
+    forest = compile_forest(pipeline.named_steps["model"])
+    if forest is None:
+        print(f"Silnik numpy nie obsługuje {type(pipeline.named_steps['model']).__name__}, zostaje sklearn.")
+        return pipeline
+    metadata = dict(getattr(pipeline, "metadata", {}), engine="numpy", n_trees=forest.n_trees, depth=forest.depth)
+    return CompactPipeline(pipeline.named_steps["preprocessing"], forest, metadata)
@@ -1,32 +1,65 @@
 import pandas as pd
 
 
-def adapt_flat_input(data) -> pd.DataFrame:
-    return pd.DataFrame([{
-        "area": data.area,
-        "rooms": data.rooms,
-        "floor": data.floor,
-        "floors_in_building": data.totalFloors,
-        "year_built": data.year,
+FLAT_RENAME = {
+    "year": "year_built",
+    "totalFloors": "floors_in_building",
+    "buildType": "building_type",
+    "material": "building_material",
+    "constructionStatus": "finishing",
+    "hasLift": "elevator",
+    "hasOutdoor": "balcony/garden",
+    "hasParking": "parking",
+    "province": "region"
+}
 
-        "building_type": data.buildType,
-        "building_material": data.material,
-        "heating": data.heating,
-        "market": data.market,
-        "finishing": data.constructionStatus,
+FLAT_VALUE_TRANSLATION = {
+    "district": "urban",
+    "gas": "gas",
+    "electric": "electrical",
+    "boiler": "boiler_room",
 
-        "elevator": data.hasLift,
-        "balcony/garden": data.hasOutdoor,
-        "parking": data.hasParking,
+    "primary": "PRIMARY",
+    "secondary": "SECONDARY",
 
-        "city": data.city,
-        "district": data.district if data.district else "unknown",
-        "region": data.province,
-    }])
+    "block": "block",
+    "tenement": "tenement",
+    "apartment": "apartment",
+    "house": "house",
 
+    "brick": "brick",
+    "concrete_plate": "concrete_plate",
+    "concrete": "concrete",
+    "silikat": "silikat",
+    "breezeblock": "breezeblock",
 
-def adapt_house_input(data) -> pd.DataFrame:
-    return pd.DataFrame([{
+    "ready_to_use": "ready_to_use",
+    "to_completion": "to_completion",
+    "to_renovation": "to_renovation",
+}
+
+FLAT_TRANSLATED_COLUMNS = ["heating", "market", "building_type", "building_material", "finishing"]
+FLAT_BINARY_COLUMNS = ["elevator", "balcony/garden", "parking"]
+
+
+def flat_row(data) -> dict:
+    """Wiersz cech mieszkania w formacie, na którym trenowany był model."""
+    row = {FLAT_RENAME.get(k, k): v for k, v in data.dict().items()}
+
+    row["city"] = str(row["city"]).strip().lower()
+    row["floor"] = "higher_10" if data.floor > 10 else str(data.floor)
+
+    for col in FLAT_TRANSLATED_COLUMNS:
+        row[col] = FLAT_VALUE_TRANSLATION.get(row[col], row[col])
+
+    for col in FLAT_BINARY_COLUMNS:
+        row[col] = int(row[col])
+
+    return row
+
+
+def house_row(data) -> dict:
+    return {
         "area": data.areaHouse,
         "plot_area": data.areaPlot,
         "rooms": data.rooms,
@@ -42,11 +75,11 @@ def adapt_house_input(data) -> pd.DataFrame:
         "city": data.city,
         "district": "unknown",
         "region": data.province,
-    }])
+    }
 
 
-def adapt_plot_input(data) -> pd.DataFrame:
-    return pd.DataFrame([{
+def plot_row(data) -> dict:
+    return {
         "area": data.area,
         "plot_type": data.type,
         "purpose": data.locationType,
@@ -56,4 +89,28 @@ def adapt_plot_input(data) -> pd.DataFrame:
         "city": data.city,
         "district": "unknown",
         "region": data.province,
-    }])
+    }
+
+
+def adapt_flat_inputs(items) -> pd.DataFrame:
+    return pd.DataFrame([flat_row(data) for data in items])
+
+
+def adapt_house_inputs(items) -> pd.DataFrame:
+    return pd.DataFrame([house_row(data) for data in items])
+
+
+def adapt_plot_inputs(items) -> pd.DataFrame:
+    return pd.DataFrame([plot_row(data) for data in items])
+
+
+def adapt_flat_input(data) -> pd.DataFrame:
+    return adapt_flat_inputs([data])
+
+
+def adapt_house_input(data) -> pd.DataFrame:
+    return adapt_house_inputs([data])
+
+
+def adapt_plot_input(data) -> pd.DataFrame:
+    return adapt_plot_inputs([data])
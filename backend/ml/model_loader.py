@@ -1,41 +1,424 @@
-import joblib
+import fcntl
+import itertools
+import json
+import math
+import os
+import shutil
+import threading
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
 from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import joblib
+import pandas as pd
+
+from ml.feature_encoder import build_encoder
+from ml.forest_engine import compile_pipeline, engine_for
+from ml.serving_artifact import load_serving_artifact, serving_artifact_path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 MODEL_DIR = BASE_DIR / "models"
 
+# "pipeline" - pełne pipeline'y sklearn, "compact" - artefakty *.serving.joblib ładowane przez mmap
+MODEL_FORMAT = os.getenv("MODEL_FORMAT", "pipeline")
+
+# Tryby współdzielenia modeli między workerami (patrz load_models):
+# none - każdy proces trzyma własną kopię, mmap - artefakty mapowane z katalogu models,
+# shm - artefakty kopiowane raz do pamięci współdzielonej (tmpfs) i mapowane stamtąd
+SHARE_MODES = ("none", "mmap", "shm")
+SHM_DIR = Path(os.getenv("MODEL_SHM_DIR", "/dev/shm/properlytics-models"))
+
+# wersja kompletu w katalogu modeli i poprzedni komplet (patrz promote_models)
+GENERATION_FILE = "generation.json"
+PREVIOUS_DIR = "previous"
+
+MODEL_FILES = {
+    "flat": "flat.joblib",
+    "house": "house.joblib",
+    "plot": "plot.joblib",
+}
+
+# Wiersze kontrolne (już po adaptacji wejścia), na których nowy zestaw modeli musi dać sensowną cenę
+VALIDATION_ROWS = {
+    "flat": {
+        "area": 55.0, "rooms": 2, "floor": "3", "floors_in_building": 5, "year_built": 2015,
+        "building_type": "block", "building_material": "brick", "heating": "gas",
+        "market": "SECONDARY", "finishing": "ready_to_use",
+        "elevator": 1, "balcony/garden": 0, "parking": 1,
+        "city": "krakow", "district": "", "region": "malopolskie",
+    },
+    "house": {
+        "area": 120.0, "plot_area": 600.0, "rooms": 4, "floors": 2, "year_built": 2010,
+        "building_type": "detached", "building_material": "brick", "heating": "gas",
+        "finishing": "ready_to_use", "parking": 1,
+        "city": "warszawa", "district": "unknown", "region": "mazowieckie",
+    },
+    "plot": {
+        "area": 1000.0, "plot_type": "building", "purpose": "suburban", "access_road": 0,
+        "utilities": "unknown", "city": "poznan", "district": "unknown", "region": "wielkopolskie",
+    },
+}
+
+_version_counter = itertools.count(1)
+# next() na itertools.count nie jest atomowe w buildzie free-threaded (bez GIL)
+_version_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class ModelSet:
+    """Niezmienny komplet modeli (i ich explainerów) obsługujących predykcje w danej wersji."""
+    version: str
+    models: Dict[str, Any] = field(default_factory=dict)
+    explainers: Dict[str, Any] = field(default_factory=dict)
+    loaded_at: Optional[datetime] = None
+    # explainer budowany przy pierwszym wyjaśnieniu zamiast przy ładowaniu
+    # (SHAP kopiuje drzewa do własnych tablic, więc przy współdzielonych modelach to pamięć per worker)
+    lazy_explainers: bool = False
+    # kodery wiersza cech bez pandas (ml.feature_encoder); brak wpisu = pipeline.predict na DataFrame
+    encoders: Dict[str, Any] = field(default_factory=dict)
+    _explainer_lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def model(self, kind: str):
+        return self.models.get(kind)
+
+    def explainer(self, kind: str):
+        if self.lazy_explainers and kind not in self.explainers:
+            with self._explainer_lock:
+                if kind not in self.explainers:
+                    self.explainers[kind] = build_explainer(self.models.get(kind))
+        return self.explainers.get(kind)
+
+    def encoder(self, kind: str):
+        return self.encoders.get(kind)
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "loaded_at": self.loaded_at.isoformat() if self.loaded_at else None,
+            "models": sorted(k for k, v in self.models.items() if v is not None),
+        }
+
+
 class ModelRegistry:
-    house_model = None
-    flat_model = None
-    plot_model = None
+    """
+    Aktywny zestaw modeli podmieniany atomowo (jedno przypisanie referencji).
+    Obsługa żądania bierze ModelRegistry.current() raz i korzysta z tej migawki do końca.
+    Poprzedni zestaw jest trzymany do natychmiastowego rollbacku.
+
+    Odczyt current() to pojedynczy odczyt atrybutu, bezpieczny także bez GIL; zmiany aktywnego
+    i poprzedniego zestawu idą razem pod blokadą, więc rollback nie widzi połowy podmiany.
+    """
+    _active: ModelSet = ModelSet(version="none")
+    _previous: Optional[ModelSet] = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def current(cls) -> ModelSet:
+        return cls._active
+
+    @classmethod
+    def previous(cls) -> Optional[ModelSet]:
+        return cls._previous
+
+    @classmethod
+    def activate(cls, model_set: ModelSet) -> ModelSet:
+        with cls._lock:
+            cls._previous = cls._active if cls._active.models else None
+            cls._active = model_set
+        return model_set
+
+    @classmethod
+    def rollback(cls) -> ModelSet:
+        with cls._lock:
+            if cls._previous is None:
+                raise RuntimeError("Brak poprzedniej wersji modeli do przywrócenia")
+            cls._active, cls._previous = cls._previous, cls._active
+            return cls._active
+
+
+class LockedExplainer:
+    """
+    TreeExplainer za blokadą. shap_values przy każdym wywołaniu przypisuje explainerowi expected_value,
+    a rozszerzenie C SHAP nie deklaruje pracy bez GIL - w buildzie free-threaded wyjaśnienia tego samego
+    modelu liczą się więc po kolei, a same predykcje dalej równolegle. Przy GIL blokada nic nie zmienia.
+    """
+
+    def __init__(self, explainer):
+        self.explainer = explainer
+        self._lock = threading.Lock()
+
+    def shap_values(self, X, **kwargs):
+        with self._lock:
+            return self.explainer.shap_values(X, **kwargs)
+
+    def __getattr__(self, name):
+        # przez __dict__, żeby copy.copy (instancja jeszcze bez atrybutów) nie wpadło w rekurencję
+        explainer = self.__dict__.get("explainer")
+        if explainer is None:
+            raise AttributeError(name)
+        return getattr(explainer, name)
+
+
+def build_explainer(pipeline):
+    """
+    Zwraca shap.TreeExplainer dla kroku "model" pipeline'u albo None, jeśli SHAP nie ma zastosowania.
+    """
+    if not hasattr(pipeline, "named_steps"):
+        return None
+
+    model = pipeline.named_steps.get("model")
+    if model is None:
+        return None
+
+    if hasattr(model, "shap_model"):
+        # kompaktowy las (ml.serving_artifact) przekazujemy do SHAP w formacie słownikowym
+        shap_input = model.shap_model()
+    elif (hasattr(model, "estimators_") or hasattr(model, "tree_") or hasattr(model, "get_booster")
+          or hasattr(model, "_predictors")):
+        # _predictors: HistGradientBoostingRegressor
+        shap_input = model
+    else:
+        # SHAP ma sens głównie dla modeli drzewiastych
+        return None
 
-def load_models():
-    print(f"Szukam modeli w folderze: {MODEL_DIR}")
     try:
-        ModelRegistry.house_model = joblib.load(MODEL_DIR / "house.joblib")
-        ModelRegistry.flat_model = joblib.load(MODEL_DIR / "flat.joblib")
-        ModelRegistry.plot_model = joblib.load(MODEL_DIR / "plot.joblib")
-
-        # 1. Mieszkanie
-        flat_path = MODEL_DIR / "flat.joblib"
-        if flat_path.exists():
-            ModelRegistry.flat_model = joblib.load(flat_path)
-            print("Model FLAT załadowany.")
+        import shap
+        return LockedExplainer(shap.TreeExplainer(shap_input))
+    except Exception as e:
+        print("Nie udało się zbudować TreeExplainera:", e)
+        return None
+
+
+def prepare_for_serving(pipeline):
+    """Predykcje w API idą po jednym wierszu, więc równoległość lasu tylko dokłada narzutu."""
+    if hasattr(pipeline, "named_steps") and "model" in pipeline.named_steps:
+        inner = pipeline.named_steps["model"]
+        if hasattr(inner, "n_jobs"):
+            inner.n_jobs = 1
+    return pipeline
+
+
+def make_model_set(models: Dict[str, Any], version: Optional[str] = None, lazy_explainers: bool = False) -> ModelSet:
+    loaded_at = datetime.now(timezone.utc)
+    if version is None:
+        with _version_lock:
+            number = next(_version_counter)
+        version = f"v{number}-{loaded_at:%Y%m%d%H%M%S}"
+    explainers = {} if lazy_explainers else {kind: build_explainer(model) for kind, model in models.items()}
+    encoders = {kind: build_encoder(model, VALIDATION_ROWS.get(kind)) for kind, model in models.items()}
+    return ModelSet(
+        version=version,
+        models=dict(models),
+        explainers=explainers,
+        loaded_at=loaded_at,
+        lazy_explainers=lazy_explainers,
+        encoders={kind: encoder for kind, encoder in encoders.items() if encoder is not None},
+    )
+
+
+def validate_model_set(model_set: ModelSet):
+    for kind, model in model_set.models.items():
+        if model is None or kind not in VALIDATION_ROWS:
+            continue
+        prediction = model.predict(pd.DataFrame([VALIDATION_ROWS[kind]]))
+        if len(prediction) != 1 or not math.isfinite(float(prediction[0])):
+            raise ValueError(f"Model {kind.upper()} zwrócił niepoprawną predykcję: {prediction!r}")
+
+
+def stage_in_shared_memory(path: Path, shm_dir: Optional[Path] = None) -> Path:
+    """
+    Kopiuje artefakt do tmpfs (domyślnie /dev/shm) pod nazwą zależną od rozmiaru i czasu modyfikacji.
+    Pierwszy worker robi kopię, kolejne (czekając na blokadę) mapują już gotowy plik.
+
+    Starsze kopie tego samego artefaktu są usuwane przy kopiowaniu nowej. Usunięcie pliku z tmpfs
+    nie rusza istniejących odwzorowań (w tym zestawu trzymanego do rollbacku) - pamięć wraca
+    dopiero po zwolnieniu ostatniego z nich, a /dev/shm nie zapełnia się kopiami po każdym retreningu.
+    """
+    shm_dir = shm_dir or SHM_DIR
+    shm_dir.mkdir(parents=True, exist_ok=True)
+
+    with open(shm_dir / ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        # stat pod blokadą: nazwa kopii musi odpowiadać zawartości, którą właśnie skopiujemy
+        stat = path.stat()
+        target = shm_dir / f"{path.stem}-{stat.st_size}-{int(stat.st_mtime)}{path.suffix}"
+        if not target.exists():
+            tmp = target.with_name(target.name + ".tmp")
+            shutil.copyfile(path, tmp)
+            os.replace(tmp, target)
+        for stale in shm_dir.glob(f"{path.stem}-*"):
+            if stale != target:
+                stale.unlink(missing_ok=True)
+    return target
+
+
+def load_model_file(path: Path, model_format: str = MODEL_FORMAT, share_mode: str = "none", shm_dir: Optional[Path] = None,
+                    engine: str = "sklearn"):
+    if share_mode != "none":
+        # współdzielić da się tylko tablice kompaktowego artefaktu
+        model_format = "compact"
+
+    model = None
+    if model_format == "compact":
+        compact_path = serving_artifact_path(path)
+        if compact_path.exists():
+            if share_mode == "shm":
+                compact_path = stage_in_shared_memory(compact_path, shm_dir)
+            model = load_serving_artifact(compact_path, mmap_mode="r")
         else:
-            print(f"Brak pliku: {flat_path}")
+            print(f"Brak artefaktu {compact_path}, ładuję pełny pipeline.")
+    if model is None:
+        model = prepare_for_serving(joblib.load(path))
+    return compile_pipeline(model) if engine == "numpy" else model
+
+
+def load_model_set(model_dir: Path = MODEL_DIR, model_format: str = MODEL_FORMAT, share_mode: str = "none") -> ModelSet:
+    """Ładuje pełny nowy zestaw modeli obok aktywnego, bez naruszania tego, co obsługuje ruch."""
+    if share_mode not in SHARE_MODES:
+        raise ValueError(f"Nieznany tryb współdzielenia modeli: {share_mode} (dostępne: {', '.join(SHARE_MODES)})")
+
+    models = {}
+    # pliki i numer wersji czytane razem: promote_models/rollback_model_files czekają na koniec ładowania
+    with generation_lock(model_dir, exclusive=False):
+        generation = read_generation(model_dir)
+        for kind, filename in MODEL_FILES.items():
+            path = model_dir / filename
+            if not path.exists():
+                print(f"Brak pliku: {path}")
+                continue
+            engine = engine_for(kind)
+            models[kind] = load_model_file(path, model_format, share_mode, engine=engine)
+            print(f"Model {kind.upper()} załadowany (silnik: {engine}).")
+
+    # wersja z pliku generation.json jest wspólna dla wszystkich workerów czytających ten katalog
+    version = generation["version"] if generation else None
+    model_set = make_model_set(models, version=version, lazy_explainers=share_mode != "none")
+    validate_model_set(model_set)
+    return model_set
+
+
+@contextmanager
+def generation_lock(model_dir: Path, exclusive: bool = True):
+    """Blokada (flock) katalogu modeli wspólna dla wszystkich procesów: podmiana kompletu kontra ładowanie."""
+    model_dir.mkdir(parents=True, exist_ok=True)
+    with open(model_dir / ".generation.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
+
+
+def read_generation(model_dir: Path = MODEL_DIR) -> Optional[Dict[str, Any]]:
+    """
+    Aktywna wersja kompletu w model_dir: {"version", "previous", "action", "updated_at"} albo None,
+    dopóki modele nie zostały ani raz podmienione przez uczenie.
+    """
+    try:
+        with open(model_dir / GENERATION_FILE) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _write_generation(model_dir: Path, version: str, previous: Optional[str], action: str):
+    generation = {
+        "version": version,
+        "previous": previous,
+        "action": action,
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+    }
+    tmp = model_dir / (GENERATION_FILE + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(generation, f, indent=4)
+    os.replace(tmp, model_dir / GENERATION_FILE)
+
+
+def new_generation_version() -> str:
+    return f"g{datetime.now(timezone.utc):%Y%m%d%H%M%S}-{uuid.uuid4().hex[:6]}"
+
+
+def model_file_names() -> List[str]:
+    """Pliki jednego kompletu modeli: pełne pipeline'y i (dla lasów) kompaktowe artefakty."""
+    names = []
+    for filename in MODEL_FILES.values():
+        names += [filename, serving_artifact_path(filename).name]
+    return names
+
+
+def promote_models(staging_dir: Path, model_dir: Path = MODEL_DIR) -> str:
+    """
+    Przenosi komplet wytrenowany w katalogu roboczym do model_dir, plik po pliku przez os.replace
+    (zmapowane i załadowane stare pliki zostają nietknięte). Bez pełnego kompletu nic nie jest przenoszone.
+    Artefakt, którego nie ma w komplecie (estymator inny niż las), znika z model_dir, żeby nie został
+    załadowany zamiast nowego modelu.
 
-        # 2. Dom
-        house_path = MODEL_DIR / "house.joblib"
-        if house_path.exists():
-            ModelRegistry.house_model = joblib.load(house_path)
-            print("Model HOUSE załadowany.")
+    Dotychczasowy komplet zostaje w model_dir/previous (do rollback_model_files), a generation.json
+    dostaje nową wersję - po niej pozostałe workery poznają, że trzeba przeładować modele.
+    """
+    missing = [filename for filename in MODEL_FILES.values() if not (staging_dir / filename).exists()]
+    if missing:
+        raise RuntimeError(f"Niekompletny zestaw modeli w {staging_dir}: brak {', '.join(missing)}")
 
-        # 3. Działka
-        plot_path = MODEL_DIR / "plot.joblib"
-        if plot_path.exists():
-            ModelRegistry.plot_model = joblib.load(plot_path)
-            print("Model PLOT załadowany.")
+    with generation_lock(model_dir):
+        current = read_generation(model_dir)
+        previous_dir = model_dir / PREVIOUS_DIR
+        shutil.rmtree(previous_dir, ignore_errors=True)
+        previous_dir.mkdir()
+        for name in model_file_names():
+            staged, live = staging_dir / name, model_dir / name
+            if live.exists():
+                # twarde dowiązanie: model_dir ani na chwilę nie zostaje bez pliku
+                os.link(live, previous_dir / name)
+            if staged.exists():
+                os.replace(staged, live)
+            else:
+                live.unlink(missing_ok=True)
 
+        version = new_generation_version()
+        # komplet sprzed pierwszego uczenia nie ma wersji w generation.json - dostaje własną
+        previous = current["version"] if current else new_generation_version()
+        _write_generation(model_dir, version, previous, "retrain")
+    return version
+
+
+def rollback_model_files(model_dir: Path = MODEL_DIR) -> str:
+    """
+    Zamienia miejscami komplet w model_dir i w model_dir/previous, a w generation.json wersję aktywną
+    z poprzednią. Zwraca przywróconą wersję; RuntimeError, gdy nie ma poprzedniego kompletu.
+    """
+    with generation_lock(model_dir):
+        current = read_generation(model_dir)
+        previous_dir = model_dir / PREVIOUS_DIR
+        if current is None or not current.get("previous") or not previous_dir.is_dir():
+            raise RuntimeError("Brak poprzedniej wersji modeli do przywrócenia")
+
+        swap_dir = model_dir / (PREVIOUS_DIR + ".swap")
+        shutil.rmtree(swap_dir, ignore_errors=True)
+        swap_dir.mkdir()
+        for name in model_file_names():
+            old, live = previous_dir / name, model_dir / name
+            if live.exists():
+                os.link(live, swap_dir / name)
+            if old.exists():
+                os.replace(old, live)
+            else:
+                live.unlink(missing_ok=True)
+        shutil.rmtree(previous_dir)
+        os.replace(swap_dir, previous_dir)
+
+        _write_generation(model_dir, current["previous"], current["version"], "rollback")
+    return current["previous"]
+
+
+def load_models(share_mode: str = "none") -> ModelSet:
+    print(f"Szukam modeli w folderze: {MODEL_DIR}")
+    try:
+        model_set = load_model_set(MODEL_DIR, share_mode=share_mode)
     except Exception as e:
         print("Błąd ładowania modeli:", e)
         raise e
+
+    ModelRegistry.activate(model_set)
+    print(f"Aktywna wersja modeli: {model_set.version} (współdzielenie: {share_mode})")
+    return model_set
@@ -0,0 +1,88 @@
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Union
+
+import pandas as pd
+
+
+class PredictionCache:
+    """
+    Cache LRU/TTL gotowych odpowiedzi predykcji. Klucz to skrót znormalizowanego
+    wiersza po adaptacji wejścia + wersja modelu + parametry wyjaśnienia,
+    więc przeładowanie modeli automatycznie unieważnia stare wpisy.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: int = 900):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    @staticmethod
+    def make_key(property_type: str, model_version: Any, row: Union[Dict[str, Any], pd.DataFrame], *params: Any) -> str:
+        """row to słownik z ml.input_adapter albo jednowierszowy DataFrame."""
+        if isinstance(row, pd.DataFrame):
+            row = row.iloc[0].to_dict()
+        row = {k: (v.item() if hasattr(v, "item") else v) for k, v in row.items()}
+        canonical = json.dumps(
+            {"type": property_type, "version": model_version, "row": row, "params": params},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl_seconds:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(entry[1])
+
+    def set(self, key: str, value: Dict[str, Any]):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+            }
+
+
+prediction_cache = PredictionCache(
+    max_entries=int(os.getenv("PREDICTION_CACHE_SIZE", "10000")),
+    ttl_seconds=int(os.getenv("PREDICTION_CACHE_TTL", "900")),
+)
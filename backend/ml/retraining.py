@@ -0,0 +1,278 @@
+import fcntl
+import json
+import multiprocessing
+import os
+import runpy
+import shutil
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+TRAINERS = {
+    "flat": "ml/train_flats.py",
+    "house": "ml/train_houses.py",
+    "plot": "ml/train_plots.py",
+}
+
+REPORTS = {
+    "flat": "reports/flats_metrics.json",
+    "house": "reports/houses_metrics.json",
+    "plot": "reports/plots_metrics.json",
+}
+
+
+STAGING_DIR = BASE_DIR / "models" / "staging"
+# stan zadań i blokada procesu prowadzącego, wspólne dla workerów (obok modeli)
+STATE_DIR = BASE_DIR / "models"
+JOBS_FILE = "retrain_jobs.json"
+
+
+def run_trainer(kind: str, output_dir: str) -> Dict[str, Any]:
+    """
+    Uruchamia skrypt treningowy w procesie roboczym i zwraca metryki z jego raportu.
+    Model trafia do output_dir (MODEL_OUTPUT_DIR), a nie do katalogu models obsługującego ruch.
+    """
+    # skrypty zapisują raporty ścieżkami względnymi do katalogu backend
+    os.chdir(BASE_DIR)
+    os.environ["MODEL_OUTPUT_DIR"] = output_dir
+    runpy.run_path(str(BASE_DIR / TRAINERS[kind]), run_name="__main__")
+    with open(BASE_DIR / REPORTS[kind]) as f:
+        return json.load(f)
+
+
+def _limit_trainer_threads(n_jobs: int):
+    # przed importem sklearn/NumPy w procesie roboczym, żeby OpenMP i BLAS też wzięły ten limit
+    os.environ["TRAIN_N_JOBS"] = str(n_jobs)
+    os.environ["OMP_NUM_THREADS"] = str(n_jobs)
+    os.environ["OPENBLAS_NUM_THREADS"] = str(n_jobs)
+
+
+def default_executor():
+    # spawn zamiast fork: proces API ma już wątki (uvicorn, pule), fork z nich nie jest bezpieczny;
+    # rdzenie dzielone po równo między skrypty, zamiast trzech lasów z n_jobs=-1 naraz
+    n_jobs = max(1, (os.cpu_count() or 1) // len(TRAINERS))
+    return ProcessPoolExecutor(
+        max_workers=len(TRAINERS),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_limit_trainer_threads,
+        initargs=(n_jobs,),
+    )
+
+
+class RetrainingJobs:
+    """
+    Kolejka zadań ponownego uczenia. Zadania wykonują się pojedynczo w tle, a w ramach zadania
+    trzy skrypty treningowe działają równolegle w puli procesów, każdy z zapisem do katalogu roboczego
+    zadania. Dopiero gdy uda się cały komplet, on_success(katalog_roboczy) go sprawdza, przenosi
+    do models i przeładowuje modele; wynik to nowa wersja modeli. Po błędzie katalog roboczy jest
+    usuwany, a models zostaje bez zmian.
+
+    Przy kilku workerach (uvicorn --workers N) stan zadań leży w pliku retrain_jobs.json w state_dir,
+    więc każdy worker zleca i odczytuje te same zadania. Uczenie i harmonogram (cron) prowadzi tylko
+    proces trzymający blokadę retrain_leader.lock; gdy ten proces zniknie, blokadę przejmuje
+    pierwszy worker, który wywoła poll(). Pozostałe workery poznają nowe modele po generation.json.
+    """
+
+    def __init__(
+        self,
+        on_success: Callable[[Path], Any],
+        runner: Callable[[str, str], Dict[str, Any]] = run_trainer,
+        executor_factory: Callable[[], Any] = default_executor,
+        history: int = 20,
+        staging_dir: Path = STAGING_DIR,
+        state_dir: Path = STATE_DIR,
+        cron: Optional[str] = None,
+    ):
+        self.on_success = on_success
+        self.runner = runner
+        self.executor_factory = executor_factory
+        self.history = history
+        self.staging_dir = staging_dir
+        self.state_dir = state_dir
+        self.cron = cron
+        self.scheduler = None
+        self._leader_file = None
+        self._running = False
+        self._lock = threading.Lock()
+        self._worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="retrain")
+
+    @contextmanager
+    def _jobs_file(self, write: bool = True):
+        """Zadania z retrain_jobs.json pod blokadą wspólną dla procesów; zmiany zapisywane przy wyjściu."""
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.state_dir / "retrain_jobs.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                with open(self.state_dir / JOBS_FILE) as f:
+                    jobs = json.load(f)
+            except FileNotFoundError:
+                jobs = {}
+            yield jobs
+            if write:
+                tmp = self.state_dir / (JOBS_FILE + ".tmp")
+                with open(tmp, "w") as f:
+                    json.dump(jobs, f)
+                os.replace(tmp, self.state_dir / JOBS_FILE)
+
+    def enqueue(self, trigger: str = "manual") -> Dict[str, Any]:
+        with self._jobs_file() as jobs:
+            # nie dokładamy drugiego uczenia, jeśli jedno już czeka albo trwa (w którymkolwiek workerze)
+            for job in jobs.values():
+                if job["status"] in ("queued", "running"):
+                    return job
+
+            job_id = uuid.uuid4().hex
+            job = {
+                "id": job_id,
+                "status": "queued",
+                "trigger": trigger,
+                "created_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+                "trainers": {kind: {"status": "queued", "metrics": None, "error": None, "duration_s": None} for kind in TRAINERS},
+                "model_version": None,
+                "error": None,
+            }
+            jobs[job_id] = job
+            self._trim(jobs)
+
+        # w procesie prowadzącym zadanie rusza od razu, w pozostałych - przy najbliższym poll() prowadzącego
+        self.poll()
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._jobs_file(write=False) as jobs:
+            return jobs.get(job_id)
+
+    def lead(self) -> bool:
+        """Próbuje (bez czekania) zostać procesem prowadzącym uczenie; True, jeśli ten proces nim jest."""
+        with self._lock:
+            if self._leader_file is not None:
+                return True
+            self.state_dir.mkdir(parents=True, exist_ok=True)
+            leader_file = open(self.state_dir / "retrain_leader.lock", "w")
+            try:
+                fcntl.flock(leader_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                leader_file.close()
+                return False
+            self._leader_file = leader_file
+
+            with self._jobs_file() as jobs:
+                # zadanie "running" bez prowadzącego to zadanie procesu, który padł w trakcie uczenia
+                for job in jobs.values():
+                    if job["status"] == "running":
+                        job.update(status="failed", error="Przerwane: proces prowadzący uczenie zakończył się",
+                                   finished_at=time.time())
+            if self.cron:
+                self.scheduler = start_scheduler(self, self.cron)
+        print(f"Proces {os.getpid()} prowadzi uczenie modeli")
+        return True
+
+    def poll(self):
+        """W procesie prowadzącym uruchamia zadanie czekające w kolejce (zleconie mogło przyjść do innego workera)."""
+        if not self.lead():
+            return
+        with self._lock:
+            if self._running:
+                return
+            with self._jobs_file() as jobs:
+                queued = [job for job in jobs.values() if job["status"] == "queued"]
+                if not queued:
+                    return
+                job = min(queued, key=lambda j: j["created_at"])
+                job.update(status="running", started_at=time.time())
+            self._running = True
+        self._worker.submit(self._run, job["id"])
+
+    def shutdown(self):
+        if self.scheduler is not None:
+            self.scheduler.shutdown(wait=False)
+            self.scheduler = None
+        with self._lock:
+            if self._leader_file is not None:
+                self._leader_file.close()
+                self._leader_file = None
+
+    def _update(self, job_id: str, **fields):
+        with self._jobs_file() as jobs:
+            jobs[job_id].update(fields)
+
+    def _update_trainer(self, job_id: str, kind: str, **fields):
+        with self._jobs_file() as jobs:
+            jobs[job_id]["trainers"][kind].update(fields)
+
+    def _run(self, job_id: str):
+        try:
+            self._train_and_reload(job_id)
+        except Exception as e:
+            # np. pula procesów nie wystartowała - zadanie nie może zostać "running" na zawsze,
+            # bo enqueue() zwracałby je bez końca i żadne kolejne uczenie by nie ruszyło
+            traceback.print_exc()
+            self._update(job_id, status="failed", error=f"Błąd zadania uczenia: {e}")
+        finally:
+            self._update(job_id, finished_at=time.time())
+            with self._lock:
+                self._running = False
+
+    def _train_and_reload(self, job_id: str):
+        output_dir = self.staging_dir / job_id
+        output_dir.mkdir(parents=True, exist_ok=True)
+        try:
+            self._train_and_promote(job_id, output_dir)
+        finally:
+            shutil.rmtree(output_dir, ignore_errors=True)
+
+    def _train_and_promote(self, job_id: str, output_dir: Path):
+        failed = []
+
+        with self.executor_factory() as executor:
+            started = time.time()
+            futures = {}
+            for kind in TRAINERS:
+                futures[executor.submit(self.runner, kind, str(output_dir))] = kind
+                self._update_trainer(job_id, kind, status="running")
+
+            for future in as_completed(futures):
+                kind = futures[future]
+                duration = round(time.time() - started, 2)
+                try:
+                    self._update_trainer(job_id, kind, status="succeeded", metrics=future.result(), duration_s=duration)
+                except Exception as e:
+                    failed.append(kind)
+                    self._update_trainer(job_id, kind, status="failed", error=str(e), duration_s=duration)
+
+        if failed:
+            self._update(job_id, status="failed", error=f"Nie udało się wytrenować: {', '.join(failed)}")
+            return
+
+        try:
+            model_set = self.on_success(output_dir)
+            self._update(job_id, status="succeeded", model_version=getattr(model_set, "version", None))
+        except Exception as e:
+            traceback.print_exc()
+            self._update(job_id, status="failed", error=f"Błąd ładowania nowych modeli: {e}")
+
+    def _trim(self, jobs: Dict[str, Dict[str, Any]]):
+        finished = [k for k, v in jobs.items() if v["status"] in ("succeeded", "failed")]
+        for k in finished[:max(0, len(jobs) - self.history)]:
+            del jobs[k]
+
+
+def start_scheduler(jobs: RetrainingJobs, cron: str):
+    """Cykliczne uczenie modeli wg wyrażenia cron (np. "0 3 * * *")."""
+    from apscheduler.schedulers.background import BackgroundScheduler
+    from apscheduler.triggers.cron import CronTrigger
+
+    scheduler = BackgroundScheduler(daemon=True)
+    scheduler.add_job(lambda: jobs.enqueue(trigger="scheduled"), CronTrigger.from_crontab(cron), id="retrain")
+    scheduler.start()
+    print(f"Harmonogram uczenia modeli: {cron}")
+    return scheduler
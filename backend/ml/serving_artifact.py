@@ -0,0 +1,184 @@
+"""
+Kompaktowy artefakt do serwowania modeli: preprocessor + las spłaszczony do kilku tablic NumPy.
+
+Tablice zapisujemy bez kompresji, więc joblib.load(..., mmap_mode="r") mapuje je z pliku
+zamiast kopiować do pamięci procesu. Pełny Pipeline sklearn tego nie umożliwia, bo drzewa
+sklearn przy odczycie i tak kopiują węzły do własnych buforów.
+"""
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import joblib
+import numpy as np
+
+ARTIFACT_FORMAT = "properlytics-compact-forest"
+ARTIFACT_VERSION = 1
+
+
+def flatten_forest(forest, max_trees: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """
+    Skleja węzły wszystkich drzew w ciągłe tablice. Indeksy dzieci są globalne (-1 = liść),
+    roots wskazuje korzeń każdego drzewa. max_trees przycina las do pierwszych N drzew.
+    """
+    estimators = forest.estimators_[:max_trees] if max_trees else forest.estimators_
+
+    children_left, children_right, feature, threshold, value, weight, roots = [], [], [], [], [], [], []
+    offset = 0
+    for est in estimators:
+        tree = est.tree_
+        left = tree.children_left.astype(np.int32)
+        right = tree.children_right.astype(np.int32)
+        children_left.append(np.where(left >= 0, left + offset, -1))
+        children_right.append(np.where(right >= 0, right + offset, -1))
+        feature.append(tree.feature.astype(np.int32))
+        threshold.append(tree.threshold.astype(np.float64))
+        value.append(tree.value[:, 0, 0].astype(np.float64))
+        weight.append(tree.weighted_n_node_samples.astype(np.float64))
+        roots.append(offset)
+        offset += tree.node_count
+
+    return {
+        "children_left": np.concatenate(children_left).astype(np.int32),
+        "children_right": np.concatenate(children_right).astype(np.int32),
+        "feature": np.concatenate(feature).astype(np.int32),
+        "threshold": np.concatenate(threshold),
+        "value": np.concatenate(value),
+        "node_sample_weight": np.concatenate(weight),
+        "roots": np.array(roots, dtype=np.int32),
+        "n_features": np.array([forest.n_features_in_], dtype=np.int32),
+    }
+
+
+class CompactForest:
+    """Regresyjny las na spłaszczonych tablicach; predykcja = średnia z liści wszystkich drzew."""
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.children_left = arrays["children_left"]
+        self.children_right = arrays["children_right"]
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.value = arrays["value"]
+        self.node_sample_weight = arrays["node_sample_weight"]
+        self.roots = arrays["roots"]
+        self.n_features_in_ = int(arrays["n_features"][0])
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    def predict(self, X) -> np.ndarray:
+        if hasattr(X, "toarray"):
+            X = X.toarray()
+        # sklearn porównuje cechy rzutowane na float32 z progami float64 - robimy tak samo
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(X.shape[0])[:, None]
+
+        # wszystkie drzewa naraz: macierz (wiersze x drzewa) bieżących węzłów, schodzimy poziom po poziomie
+        node = np.repeat(self.roots[None, :], X.shape[0], axis=0)
+        while True:
+            left = self.children_left[node]
+            internal = left >= 0
+            if not internal.any():
+                break
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(internal, np.where(go_left, left, self.children_right[node]), node)
+
+        return self.value[node].mean(axis=1)
+
+    def shap_model(self) -> Dict[str, Any]:
+        """Opis lasu w słownikowym formacie shap.TreeExplainer (indeksy lokalne w każdym drzewie)."""
+        bounds = list(self.roots) + [len(self.children_left)]
+        trees = []
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            left = np.asarray(self.children_left[start:end])
+            right = np.asarray(self.children_right[start:end])
+            left = np.where(left >= 0, left - start, -1)
+            right = np.where(right >= 0, right - start, -1)
+            trees.append({
+                "children_left": left,
+                "children_right": right,
+                "children_default": left,
+                "features": np.asarray(self.feature[start:end]),
+                "thresholds": np.asarray(self.threshold[start:end]),
+                "values": np.asarray(self.value[start:end]).reshape(-1, 1) / self.n_trees,
+                "node_sample_weight": np.asarray(self.node_sample_weight[start:end]),
+            })
+        return {
+            "trees": trees,
+            "input_dtype": np.float32,
+            "internal_dtype": np.float64,
+            "tree_output": "raw_value",
+            "objective": "squared_error",
+        }
+
+
+class CompactPipeline:
+    """Zamiennik Pipeline(preprocessing, model) zbudowany z kompaktowego artefaktu."""
+
+    def __init__(self, preprocessor, forest: CompactForest, metadata: Optional[Dict[str, Any]] = None):
+        self.named_steps = {"preprocessing": preprocessor, "model": forest}
+        self.metadata = metadata or {}
+
+    def predict(self, X) -> np.ndarray:
+        return self.named_steps["model"].predict(self.named_steps["preprocessing"].transform(X))
+
+
+def dump_atomic(obj, path, compress: int = 0):
+    """
+    joblib.dump przez plik tymczasowy w tym samym katalogu i os.replace. Działające workery mogą mieć
+    stary plik zmapowany (mmap_mode="r"): podmiana wskazuje nowy i-węzeł, stary zostaje nietknięty
+    do ostatniego odwzorowania, a przerwany zapis nie zostawia uciętego modelu.
+    """
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            joblib.dump(obj, f, compress=compress)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def export_serving_artifact(pipeline, path, max_trees: Optional[int] = None, compress: int = 0) -> Dict[str, Any]:
+    """
+    Zapisuje kompaktowy artefakt obok pełnego pipeline'u. compress > 0 zmniejsza plik,
+    ale wyklucza ładowanie przez mmap.
+    """
+    forest = pipeline.named_steps["model"]
+    if not hasattr(forest, "estimators_") or not hasattr(forest.estimators_[0], "tree_"):
+        raise ValueError("Kompaktowy artefakt obsługuje tylko lasy drzew regresyjnych")
+
+    arrays = flatten_forest(forest, max_trees=max_trees)
+    metadata = {
+        "n_trees": int(len(arrays["roots"])),
+        "n_nodes": int(len(arrays["children_left"])),
+        "source_estimator": type(forest).__name__,
+        "exported_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    artifact = {
+        "format": ARTIFACT_FORMAT,
+        "version": ARTIFACT_VERSION,
+        "preprocessor": pipeline.named_steps["preprocessing"],
+        "forest": arrays,
+        "metadata": metadata,
+    }
+    dump_atomic(artifact, path, compress=compress)
+    return metadata
+
+
+def serving_artifact_path(model_path) -> Path:
+    model_path = Path(model_path)
+    return model_path.with_name(model_path.stem + ".serving.joblib")
+
+
+def load_serving_artifact(path, mmap_mode: Optional[str] = "r") -> CompactPipeline:
+    artifact = joblib.load(path, mmap_mode=mmap_mode)
+    if not isinstance(artifact, dict) or artifact.get("format") != ARTIFACT_FORMAT:
+        raise ValueError(f"{path} nie jest kompaktowym artefaktem modelu")
+    return CompactPipeline(artifact["preprocessor"], CompactForest(artifact["forest"]), artifact["metadata"])
@@ -1,29 +1,37 @@
 import pandas as pd
 import numpy as np
 import os
+import sys
 import json
-import joblib
+import time
+from pathlib import Path
 
 from sqlalchemy import create_engine
 
 from sklearn.model_selection import train_test_split
-from sklearn.impute import SimpleImputer
-from sklearn.preprocessing import OneHotEncoder
-from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
-from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from ml.estimators import estimator_choice, make_estimator, make_preprocessor, serving_metrics
+from ml.serving_artifact import dump_atomic, export_serving_artifact, serving_artifact_path
+
 
 DATA_PATH = "/data/clean_domy.csv"
-MODEL_PATH = "models/house.joblib"
+# MODEL_OUTPUT_DIR ustawia ml.retraining: modele trafiają do katalogu roboczego zadania,
+# a do models/ przenoszone są dopiero, gdy uda się cały komplet
+MODEL_OUTPUT_DIR = os.getenv("MODEL_OUTPUT_DIR", "models")
+MODEL_PATH = os.path.join(MODEL_OUTPUT_DIR, "house.joblib")
 REPORT_PATH = "reports/houses_metrics.json"
 
-os.makedirs("models", exist_ok=True)
+os.makedirs(MODEL_OUTPUT_DIR, exist_ok=True)
 os.makedirs("reports", exist_ok=True)
 
 DB_URL = os.getenv("DATABASE_URL")
 
+# random_forest / hist_gradient_boosting, patrz ml/estimators.py
+ESTIMATOR = estimator_choice("house")
+
 
 ALLOWED_COLUMNS = [
     "area",
@@ -84,48 +92,43 @@ X_train, X_test, y_train, y_test = train_test_split(
 categorical = X.select_dtypes(include=["object", "string"]).columns
 numerical = X.select_dtypes(exclude=["object", "string"]).columns
 
-numeric_transformer = Pipeline([
-    ("imputer", SimpleImputer(strategy="median"))
-])
-
-categorical_transformer = Pipeline([
-    ("imputer", SimpleImputer(strategy="most_frequent")),
-    ("onehot", OneHotEncoder(handle_unknown="ignore"))
-])
-
-preprocessor = ColumnTransformer(
-    transformers=[
-        ("num", numeric_transformer, numerical),
-        ("cat", categorical_transformer, categorical)
-    ]
-)
-
-model = RandomForestRegressor(
-    n_estimators=400,
-    max_depth=30,
-    random_state=42,
-    n_jobs=-1
-)
+preprocessor = make_preprocessor(numerical, categorical, ESTIMATOR)
+model = make_estimator(ESTIMATOR)
 
 pipe = Pipeline([
     ("preprocessing", preprocessor),
     ("model", model)
 ])
 
+fit_start = time.perf_counter()
 pipe.fit(X_train, y_train)
+fit_time = time.perf_counter() - fit_start
 
 y_pred = pipe.predict(X_test)
 
 metrics = {
     "MAE": float(mean_absolute_error(y_test, y_pred)),
     "RMSE": float(np.sqrt(mean_squared_error(y_test, y_pred))),
-    "R2": float(r2_score(y_test, y_pred))
+    "R2": float(r2_score(y_test, y_pred)),
+    "estimator": ESTIMATOR,
+    "fit_time_s": round(fit_time, 2),
 }
 
+dump_atomic(pipe, MODEL_PATH)
+metrics.update(serving_metrics(pipe, X_test, MODEL_PATH))
+
 with open(REPORT_PATH, "w") as f:
     json.dump(metrics, f, indent=4)
 
-joblib.dump(pipe, MODEL_PATH)
+# kompaktowy artefakt do serwowania (MODEL_FORMAT=compact), opcjonalnie przycięty do SERVING_MAX_TREES drzew;
+# tylko dla lasów - przy innym estymatorze MODEL_FORMAT=compact wraca do pełnego pipeline'u
+if hasattr(model, "estimators_"):
+    serving_max_trees = int(os.getenv("SERVING_MAX_TREES", "0")) or None
+    serving_info = export_serving_artifact(pipe, serving_artifact_path(MODEL_PATH), max_trees=serving_max_trees)
+    print("Serving artifact:", serving_info)
+else:
+    # nieaktualny artefakt lasu z poprzedniego uczenia nie może zostać załadowany zamiast nowego modelu
+    serving_artifact_path(MODEL_PATH).unlink(missing_ok=True)
 
 print("HOUSE model trained and saved.")
 print(metrics)
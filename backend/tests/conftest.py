@@ -1,19 +1,50 @@
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.db import get_async_session, get_session
 from app.main import app
-from ml.model_loader import ModelRegistry
+from ml.model_loader import ModelRegistry, make_model_set
 import numpy as np
 
 class DummyModel:
     def predict(self, X):
-        return np.array([123456.78])
+        return np.full(len(X), 123456.78)
 
 @pytest.fixture(scope="session", autouse=True)
 def mock_models():
-    ModelRegistry.house_model = DummyModel()
-    ModelRegistry.flat_model = DummyModel()
-    ModelRegistry.plot_model = DummyModel()
+    ModelRegistry.activate(make_model_set({
+        "house": DummyModel(),
+        "flat": DummyModel(),
+        "plot": DummyModel(),
+    }))
 
 @pytest.fixture(scope="session")
 def client():
     return TestClient(app)
+
+@pytest.fixture
+def db_engine(tmp_path):
+    """Plikowa baza SQLite podstawiona pod get_session i get_async_session na czas testu."""
+    url = f"sqlite:///{tmp_path / 'test.db'}"
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(engine)
+    # TestClient bez bloku with uruchamia każde żądanie w nowej pętli zdarzeń - połączeń nie trzymamy w puli
+    async_engine = create_async_engine(url.replace("sqlite://", "sqlite+aiosqlite://"), poolclass=NullPool)
+
+    def override():
+        with Session(engine) as session:
+            yield session
+
+    async def async_override():
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = override
+    app.dependency_overrides[get_async_session] = async_override
+    yield engine
+    app.dependency_overrides.pop(get_session, None)
+    app.dependency_overrides.pop(get_async_session, None)
+    engine.dispose()
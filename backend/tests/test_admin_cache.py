@@ -0,0 +1,30 @@
+from datetime import datetime, timezone
+
+from sqlmodel import Session, select
+
+from app.admin_cache import admin_cache
+from app.auth import create_access_token
+from app.models.admin import AdminUser
+
+
+def test_admin_lookup_cached_and_invalidated(client, db_engine):
+    with Session(db_engine) as session:
+        session.add(AdminUser(username="anna", hashed_password="x", created_at=datetime.now(timezone.utc)))
+        session.commit()
+    admin_cache.clear()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'anna'})}"}
+    before = admin_cache.stats()
+
+    assert client.get("/auth/me", headers=headers).json()["role"] == "admin"
+    assert client.get("/auth/me", headers=headers).status_code == 200
+    stats = admin_cache.stats()
+    assert (stats["misses"] - before["misses"], stats["db_round_trips_saved"] - before["hits"]) == (1, 1)
+
+    with Session(db_engine) as session:
+        admin = session.exec(select(AdminUser).where(AdminUser.username == "anna")).one()
+        admin.is_active = False
+        session.add(admin)
+        session.commit()
+
+    assert client.get("/auth/me", headers=headers).status_code == 403
+    assert client.get("/api/v1/metrics").json()["admin_principal_cache"]["invalidations"] > before["invalidations"]
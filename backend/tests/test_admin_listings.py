@@ -0,0 +1,165 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta, timezone
+
+import asyncio
+
+import pytest
+
+from app.auth import require_admin
+from app.main import app
+from app.models.admin import AdminUser
+from app.models.listing_flat import FlatListing
+from app.models.listing_house import HouseListing
+from app.models.listing_plot import PlotListing
+from app.routers.listing_import import iter_lines
+
+COMMON = dict(description="", phone_number="", photos_url="", district="", province="malopolskie", area=50.0)
+ROWS = {
+    FlatListing: dict(
+        rooms=2, floor=1, totalFloors=4, year=2010, buildType="block", material="brick", heating="gas",
+        market="secondary", constructionStatus="ready_to_use", hasLift=1, hasOutdoor=0, hasParking=0,
+    ),
+    HouseListing: dict(
+        plot_area=600.0, rooms=4, floors=2, year=2010, buildType="detached", material="brick", heating="gas",
+        market="secondary", constructionStatus="ready_to_use", hasGarage=1, hasGarden=1,
+    ),
+    PlotListing: dict(plot_type="building"),
+}
+
+
+@pytest.fixture
+def admin_db(db_engine):
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    with db_engine.begin() as conn:
+        for n, (model, extra) in enumerate(ROWS.items()):
+            conn.execute(model.__table__.insert(), [
+                {**COMMON, **extra, "title": f"{model.__name__} {i}", "price_offer": 100000 * (i + 1) + n,
+                 "city": "Kraków" if i % 2 else "Gdańsk", "created_at": start + timedelta(minutes=10 * i + n),
+                 "is_active": i != 3, "is_verified": i == 0}
+                for i in range(4)
+            ])
+
+    app.dependency_overrides[require_admin] = lambda: AdminUser(username="test", hashed_password="x")
+    yield db_engine
+    app.dependency_overrides.pop(require_admin, None)
+
+
+def test_overview_union_sort_and_pagination(client, admin_db):
+    res = client.get("/admin/listings", params={"sort": "price", "order": "asc", "limit": 5, "offset": 1})
+    assert res.status_code == 200
+    rows = res.json()
+
+    assert [r["price"] for r in rows] == [100001, 100002, 200000, 200001, 200002]
+    assert {r["type"] for r in rows} == {"flat", "house", "plot"}
+    assert set(rows[0]) == {"id", "type", "title", "price", "city", "is_verified", "is_active", "created_at"}
+
+
+def test_overview_filters(client, admin_db):
+    rows = client.get("/admin/listings", params={
+        "type": "house", "status": "active", "city": "Kraków", "price_min": 150000
+    }).json()
+    assert [r["title"] for r in rows] == ["HouseListing 1"]
+
+    assert client.get("/admin/listings", params={"sort": "phone_number"}).status_code == 400
+    assert client.get("/admin/listings", params={"type": "castle"}).status_code == 400
+
+
+def test_overview_streams(client, admin_db):
+    res = client.get("/admin/listings", params={"format": "ndjson", "is_verified": True})
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in res.text.splitlines()]
+    assert sorted(r["type"] for r in lines) == ["flat", "house", "plot"]
+
+    res = client.get("/admin/listings", params={"format": "csv"})
+    assert res.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(res.text)))
+    assert len(rows) == 12
+    assert rows[0]["title"] == "PlotListing 3"
+
+
+def test_import_ndjson_and_csv(client, admin_db):
+    body = "\n".join([
+        json.dumps({"title": "Nowa działka", "price_offer": 250000, "city": "Poznań", "province": "wielkopolskie",
+                    "area": 900, "plot_type": "building", "has_water": 1}),
+        json.dumps({"title": "Bez ceny", "city": "Poznań", "province": "wielkopolskie", "area": 900, "plot_type": "building"}),
+        "{nie json",
+    ])
+    res = client.post("/admin/listings/plot/import", params={"format": "ndjson"}, content=body)
+    assert res.status_code == 200
+    report = res.json()
+    assert report["inserted"] == 1
+    assert [e["line"] for e in report["errors"]] == [2, 3]
+    assert report["errors"][0]["errors"][0]["loc"] == ["price_offer"]
+
+    csv_body = "title,price_offer,city,province,area,plot_type,access_road\nA,100000,Łódź,lodzkie,500,building,\nB,abc,Łódź,lodzkie,500,building,asphalt\n"
+    report = client.post("/admin/listings/plot/import", params={"format": "csv"}, content=csv_body).json()
+    assert (report["inserted"], report["errors_count"], report["errors"][0]["line"]) == (1, 1, 3)
+
+    titles = [r["title"] for r in client.get("/admin/listings", params={"type": "plot", "city": "Łódź"}).json()]
+    assert titles == ["A"]
+
+
+def test_iter_lines_skips_oversized_lines():
+    async def chunks():
+        for part in (b"ok\nxxxx", b"xxxxxx", b"xx\ntail1\nlong", b"longlong\nend"):
+            yield part
+
+    async def collect():
+        return [line async for line in iter_lines(chunks(), max_line_bytes=8)]
+
+    assert asyncio.run(collect()) == [b"ok", None, b"tail1", None, b"end"]
+
+
+def test_import_reports_oversized_line(client, admin_db):
+    good = json.dumps({"title": "Działka", "price_offer": 250000, "city": "Poznań", "province": "wielkopolskie",
+                       "area": 900, "plot_type": "building"}).encode()
+    body = b"\n".join([good, b'{"title": "' + b"x" * (2 * 1024 * 1024) + b'"}', good])
+
+    report = client.post("/admin/listings/plot/import", params={"format": "ndjson"}, content=body).json()
+
+    assert report["inserted"] == 2
+    assert [(e["line"], e["errors"][0]["type"]) for e in report["errors"]] == [(2, "line_too_long")]
+
+
+def test_import_reports_invalid_utf8_line(client, admin_db):
+    good = json.dumps({"title": "Działka", "price_offer": 250000, "city": "Poznań", "province": "wielkopolskie",
+                       "area": 900, "plot_type": "building"}, ensure_ascii=False).encode()
+    body = b"\n".join([good, b'{"title": "\xff\xfe"}', good])
+
+    res = client.post("/admin/listings/plot/import", params={"format": "ndjson"}, content=body)
+
+    assert res.status_code == 200
+    report = res.json()
+    assert report["inserted"] == 2
+    assert [e["line"] for e in report["errors"]] == [2]
+    assert report["errors"][0]["errors"][0]["type"] == "parse_error"
+
+
+def test_bulk_actions(client, admin_db):
+    res = client.post("/admin/listings/flat/bulk/verify", json={"ids": [2, 3]})
+    assert res.json() == {"status": "ok", "updated": 2, "is_verified": True}
+
+    res = client.post("/admin/listings/flat/bulk/deactivate", json={"city": "Gdańsk"})
+    assert res.json()["updated"] == 2
+
+    res = client.post("/admin/listings/flat/bulk/delete", json={"status": "inactive"})
+    assert res.json()["deleted"] == 3
+
+    rows = client.get("/admin/listings", params={"type": "flat"}).json()
+    assert sorted((r["title"], r["is_verified"]) for r in rows) == [("FlatListing 1", True)]
+
+    assert client.post("/admin/listings/flat/bulk/delete", json={}).status_code == 400
+
+
+def test_bulk_ids_in_chunks(client, admin_db, monkeypatch):
+    from app.routers import admin_listings
+
+    monkeypatch.setattr(admin_listings, "BULK_ID_CHUNK", 2)
+    res = client.post("/admin/listings/flat/bulk/verify", json={"ids": [2, 3, 4, 3, 99]})
+    assert res.json()["updated"] == 3
+
+    res = client.post("/admin/listings/flat/bulk/delete", json={"ids": [1, 2, 3], "is_verified": True})
+    assert res.json()["deleted"] == 3
+    assert [r["title"] for r in client.get("/admin/listings", params={"type": "flat"}).json()] == ["FlatListing 3"]
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.pipeline import Pipeline
+
+from app.main import compute_row_prediction
+from app.models.flat import FlatInput
+from ml.estimators import make_preprocessor
+from ml.feature_encoder import CompiledEncoder
+from ml.input_adapter import flat_row
+from ml.model_loader import make_model_set
+
+NUMERICAL = ["area", "rooms", "floors_in_building", "year_built", "elevator", "balcony/garden", "parking"]
+CATEGORICAL = ["floor", "building_type", "building_material", "heating", "market", "finishing", "city", "district", "region"]
+
+
+def training_frame(n: int = 300) -> pd.DataFrame:
+    rng = np.random.default_rng(2)
+    X = pd.DataFrame({
+        "area": rng.uniform(20, 150, n),
+        "rooms": rng.integers(1, 6, n).astype(float),
+        "floors_in_building": rng.integers(1, 12, n).astype(float),
+        "year_built": rng.integers(1950, 2024, n).astype(float),
+        "elevator": rng.integers(0, 2, n),
+        "balcony/garden": rng.integers(0, 2, n),
+        "parking": rng.integers(0, 2, n),
+        "floor": rng.choice(["0", "1", "2", "3", "higher_10"], n),
+        "building_type": rng.choice(["block", "tenement", "apartment"], n),
+        "building_material": rng.choice(["brick", "concrete_plate"], n),
+        "heating": rng.choice(["urban", "gas", "electrical"], n),
+        "market": rng.choice(["PRIMARY", "SECONDARY"], n),
+        "finishing": rng.choice(["ready_to_use", "to_renovation"], n),
+        "city": rng.choice(["krakow", "warszawa", "poznan"], n),
+        "district": rng.choice(["", "stare miasto", "mokotow"], n),
+        "region": rng.choice(["malopolskie", "mazowieckie"], n),
+    })
+    # braki, które uzupełniają imputery
+    X.loc[::17, "year_built"] = np.nan
+    X.loc[::23, "heating"] = None
+    return X
+
+
+def flat_input(**overrides) -> FlatInput:
+    payload = {
+        "area": 55, "rooms": 2, "floor": 3, "totalFloors": 5, "year": 2015,
+        "buildType": "block", "material": "brick", "heating": "gas",
+        "market": "secondary", "constructionStatus": "ready_to_use",
+        "hasLift": 1, "hasOutdoor": 0, "hasParking": 1,
+        "city": "Krakow ", "district": "", "province": "malopolskie",
+    }
+    payload.update(overrides)
+    return FlatInput(**payload)
+
+
+def test_encoder_matches_preprocessor():
+    X = training_frame()
+    rows = [
+        flat_row(flat_input()),
+        flat_row(flat_input(floor=12, heating="district", market="primary", city="Gdansk")),
+        flat_row(flat_input(material="silikat", buildType="house", district="nowa huta")),
+    ]
+    rows.append({**rows[0], "year_built": None, "heating": None})
+    rows.append({**rows[1], "area": float("nan"), "heating": float("nan")})
+
+    for estimator in ("random_forest", "hist_gradient_boosting"):
+        preprocessor = make_preprocessor(NUMERICAL, CATEGORICAL, estimator).fit(X)
+        encoder = CompiledEncoder.from_preprocessor(preprocessor)
+
+        # wzorzec to ścieżka pandas jednej predykcji: każdy wiersz osobno w pd.DataFrame([wiersz]);
+        # w ramce wielowierszowej pandas uzgadnia typ kolumny z innymi wierszami i None może stać się NaN
+        for row in rows:
+            expected = preprocessor.transform(pd.DataFrame([row]))
+            if hasattr(expected, "toarray"):
+                expected = expected.toarray()
+            np.testing.assert_array_equal(encoder.encode(row), expected)
+
+
+def test_model_set_uses_encoder():
+    X = training_frame()
+    y = X["area"] * 9000 + X["rooms"] * 20000
+    pipe = Pipeline([
+        ("preprocessing", make_preprocessor(NUMERICAL, CATEGORICAL)),
+        ("model", RandomForestRegressor(n_estimators=10, random_state=0)),
+    ]).fit(X, y)
+
+    model_set = make_model_set({"flat": pipe})
+    encoder = model_set.encoder("flat")
+
+    assert encoder is not None
+    row = flat_row(flat_input())
+    assert compute_row_prediction(pipe, row, encoder) == round(float(pipe.predict(pd.DataFrame([row]))[0]), 2)
@@ -0,0 +1,66 @@
+import numpy as np
+
+from app.models.flat import FlatInput
+from ml.flat_components import compute_flat_components
+from ml.input_adapter import adapt_flat_input
+
+
+class CountingModel:
+    def __init__(self):
+        self.calls = 0
+
+    def predict(self, X):
+        self.calls += 1
+        return np.array([
+            100000 + 10000 * row["elevator"] + 5000 * row["parking"] + 100 * (row["year_built"] - 2000)
+            for _, row in X.iterrows()
+        ], dtype=float)
+
+
+class FailingVariantModel(CountingModel):
+    """Wywala się na wierszu bez windy - jak model na wartości spoza słownika."""
+
+    def predict(self, X):
+        if (X["elevator"] == 0).any():
+            raise ValueError("unknown category")
+        return super().predict(X)
+
+
+def flat_input_df():
+    data = FlatInput(
+        area=55, rooms=2, floor=3, totalFloors=5, year=2015,
+        buildType="block", material="brick", heating="gas",
+        market="secondary", constructionStatus="ready_to_use",
+        hasLift=1, hasOutdoor=0, hasParking=1,
+        city="krakow", district="", province="malopolskie"
+    )
+    return adapt_flat_input(data)
+
+
+def test_components_single_predict_call():
+    input_df = flat_input_df()
+    model = CountingModel()
+    base_prediction = float(model.predict(input_df)[0])
+    model.calls = 0
+
+    components = compute_flat_components(model, input_df, base_prediction)
+
+    assert model.calls == 1
+    assert components == [
+        {"name": "Winda", "value": 10000.0},
+        {"name": "Miejsce parkingowe", "value": 5000.0},
+        {"name": "Rok: 2015 (Nowe Budownictwo)", "value": 3500.0},
+    ]
+
+
+def test_failing_variant_skips_only_itself():
+    input_df = flat_input_df()
+    model = FailingVariantModel()
+    base_prediction = float(model.predict(input_df)[0])
+
+    components = compute_flat_components(model, input_df, base_prediction)
+
+    assert components == [
+        {"name": "Miejsce parkingowe", "value": 5000.0},
+        {"name": "Rok: 2015 (Nowe Budownictwo)", "value": 3500.0},
+    ]
@@ -0,0 +1,69 @@
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder
+
+from app.main import compute_prediction_and_shap
+from ml.forest_engine import CompiledForest, compile_pipeline, engine_for
+from ml.model_loader import build_explainer, load_model_file
+from ml.serving_artifact import export_serving_artifact
+
+
+def make_pipeline():
+    rng = np.random.default_rng(1)
+    X = pd.DataFrame({
+        "area": rng.uniform(20, 150, 400),
+        "rooms": rng.integers(1, 6, 400),
+        "city": rng.choice(["krakow", "warszawa", "poznan", "gdansk"], 400),
+    })
+    y = X["area"] * 9000 + X["rooms"] * 20000 + (X["city"] == "warszawa") * 150000 + rng.normal(0, 5000, 400)
+    pipe = Pipeline([
+        ("preprocessing", ColumnTransformer([
+            ("num", "passthrough", ["area", "rooms"]),
+            ("cat", OneHotEncoder(handle_unknown="ignore"), ["city"]),
+        ])),
+        ("model", RandomForestRegressor(n_estimators=30, random_state=0)),
+    ])
+    return pipe.fit(X, y), X
+
+
+def test_compiled_forest_parity():
+    pipe, X = make_pipeline()
+    compiled = compile_pipeline(pipe)
+
+    assert isinstance(compiled.named_steps["model"], CompiledForest)
+    for rows in (X.head(1), X.head(10), X):
+        np.testing.assert_allclose(compiled.predict(rows), pipe.predict(rows), rtol=1e-9)
+    # duże wsady idą do sklearn, ale przejście po tablicach musi dawać to samo
+    compiled.named_steps["model"].max_rows = len(X)
+    np.testing.assert_allclose(compiled.predict(X), pipe.predict(X), rtol=1e-9)
+
+    row = X.head(1)
+    expected = compute_prediction_and_shap(pipe, row, build_explainer(pipe))
+    assert compute_prediction_and_shap(compiled, row, build_explainer(compiled)) == expected
+
+
+def test_compiled_from_compact_artifact(tmp_path):
+    pipe, X = make_pipeline()
+    joblib.dump(pipe, tmp_path / "flat.joblib")
+    export_serving_artifact(pipe, tmp_path / "flat.serving.joblib")
+
+    compiled = load_model_file(tmp_path / "flat.joblib", model_format="compact", engine="numpy")
+
+    assert isinstance(compiled.named_steps["model"], CompiledForest)
+    np.testing.assert_allclose(compiled.predict(X), pipe.predict(X), rtol=1e-9)
+    assert build_explainer(compiled) is not None
+
+
+def test_engine_selection(monkeypatch):
+    monkeypatch.setenv("MODEL_ENGINE_PLOT", "numpy")
+    assert engine_for("plot") == "numpy"
+    assert engine_for("flat") == "sklearn"
+
+    monkeypatch.setenv("MODEL_ENGINE_HOUSE", "cython")
+    with pytest.raises(ValueError):
+        engine_for("house")
@@ -0,0 +1,102 @@
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app.inference import InferencePool
+from app.main import predict_job
+from ml.model_loader import ModelRegistry, make_model_set
+from tests.conftest import DummyModel
+
+PLOT_PAYLOAD = {
+    "area": 1000, "type": "building", "locationType": "suburban",
+    "hasElectricity": 1, "hasWater": 1, "hasGas": 0, "hasSewerage": 1,
+    "isHardAccess": 0, "hasFence": 1,
+    "city": "poznan", "province": "wielkopolskie",
+}
+
+
+def worker_pid(models):
+    return os.getpid()
+
+
+def slow_job(models, seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+@pytest.fixture
+def pool():
+    model_set = make_model_set({"plot": DummyModel()}, version="pool-test")
+    pool = InferencePool(mode="process", workers=2, max_pending=2, timeout_s=1.0)
+    pool.start(model_set)
+    yield pool
+    pool.shutdown()
+
+
+def test_jobs_run_in_worker_processes(pool):
+    pids = {asyncio.run(pool.run(worker_pid, None)) for _ in range(6)}
+    assert os.getpid() not in pids
+
+    cena, explanation, version = asyncio.run(pool.run(predict_job, None, "plot", {"area": 1000.0}, "none", None))
+    assert (cena, explanation, version) == (123456.78, {}, "pool-test")
+
+
+def wait_idle(pool, seconds=10):
+    deadline = time.monotonic() + seconds
+    while pool.stats()["in_flight"] and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return pool.stats()["in_flight"]
+
+
+def test_timeout_and_bounded_queue(pool):
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(pool.run(slow_job, None, 3))
+    assert exc.value.status_code == 504
+    # przerwane czekanie nie zwalnia miejsca - zadanie dalej zajmuje proces roboczy
+    assert pool.stats()["in_flight"] == 1
+    assert wait_idle(pool) == 0
+
+    async def burst():
+        return await asyncio.gather(*(pool.run(slow_job, None, 0.2) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(burst())
+    rejected = [r for r in results if isinstance(r, HTTPException)]
+    assert len(rejected) == 1 and rejected[0].status_code == 503
+    assert pool.stats()["timeouts"] == 1 and pool.stats()["rejected"] == 1
+
+
+def test_endpoint_uses_pool(client, pool, monkeypatch):
+    from app import main
+
+    monkeypatch.setattr(main, "inference_pool", pool)
+    previous = ModelRegistry.current()
+    ModelRegistry.activate(make_model_set({"plot": DummyModel()}, version="api"))
+    try:
+        response = client.post("/predict/plot", params={"explain": "none"}, json=PLOT_PAYLOAD)
+    finally:
+        ModelRegistry.activate(previous)
+
+    assert response.status_code == 200
+    # odpowiedź podaje wersję modeli procesu roboczego, który ją policzył
+    assert response.json()["model_version"] == "pool-test"
+
+    pool.restart(make_model_set({"plot": DummyModel()}, version="pool-test-2"))
+    assert asyncio.run(pool.run(predict_job, None, "plot", {"area": 1.0}, "none", None))[2] == "pool-test-2"
+
+
+def test_restart_uses_forkserver_with_threads_running(pool):
+    busy = threading.Event()
+    thread = threading.Thread(target=busy.wait)
+    thread.start()
+    try:
+        pool.restart(make_model_set({"plot": DummyModel()}, version="forkserver"))
+    finally:
+        busy.set()
+        thread.join()
+
+    assert pool._executor._mp_context.get_start_method() == "forkserver"
+    assert asyncio.run(pool.run(predict_job, None, "plot", {"area": 1.0}, "none", None)) == (123456.78, {}, "forkserver")
@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlmodel import Session
+
+from app.models.listing_flat import FlatListing
+
+
+def make_flat(i: int, **overrides) -> FlatListing:
+    data = dict(
+        title=f"Mieszkanie {i}", price_offer=300000 + i * 50000, area=40 + i * 5, rooms=1 + i % 4,
+        floor=1, totalFloors=4, year=2010, buildType="block", material="brick", heating="gas",
+        market="secondary", constructionStatus="ready_to_use", hasLift=1, hasOutdoor=0, hasParking=0,
+        city="Kraków" if i % 2 else "Warszawa", province="malopolskie" if i % 2 else "mazowieckie",
+        is_verified=i % 3 == 0, created_at=datetime(2025, 1, 1, tzinfo=timezone.utc) + timedelta(hours=i % 5),
+    )
+    data.update(overrides)
+    return FlatListing(**data)
+
+
+@pytest.fixture
+def listings_db(db_engine):
+    with Session(db_engine) as session:
+        session.add_all([make_flat(i) for i in range(12)] + [make_flat(99, is_active=False)])
+        session.commit()
+    return db_engine
+
+
+def test_keyset_pages_cover_all_active(client, listings_db):
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 5, **({"cursor": cursor} if cursor else {})}
+        res = client.get("/api/listings/flats", params=params)
+        assert res.status_code == 200
+        seen.extend(res.json())
+        cursor = res.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    # id rośnie razem z i, więc i rozstrzyga remisy tak jak id w zapytaniu
+    expected = sorted(range(12), key=lambda i: (make_flat(i).is_verified, make_flat(i).created_at, i), reverse=True)
+    assert [l["title"] for l in seen] == [f"Mieszkanie {i}" for i in expected]
+
+
+def test_listing_filters(client, listings_db):
+    res = client.get("/api/listings/flats", params={"city": "Kraków", "price_min": 400000, "rooms_max": 2})
+    assert res.status_code == 200
+    rows = res.json()
+    assert rows
+    assert all(r["city"] == "Kraków" and r["price_offer"] >= 400000 and r["rooms"] <= 2 for r in rows)
+    assert "X-Next-Cursor" not in res.headers
+
+
+def test_invalid_cursor(client, listings_db):
+    assert client.get("/api/listings/flats", params={"cursor": "nie-kursor"}).status_code == 400
@@ -0,0 +1,25 @@
+from datetime import datetime, timezone
+
+from sqlmodel import Session
+
+from app.models.admin import AdminUser
+from app.passwords import PasswordHasher, password_hasher
+
+
+def test_login_verifies_in_password_pool(client, db_engine, monkeypatch):
+    with Session(db_engine) as session:
+        session.add(AdminUser(
+            username="ola", hashed_password=PasswordHasher(rounds=4).hash_sync("tajne"),
+            created_at=datetime.now(timezone.utc),
+        ))
+        session.commit()
+    completed = password_hasher.stats()["completed"]
+
+    res = client.post("/auth/login", json={"username": "ola", "password": "tajne"})
+    assert res.status_code == 200 and res.json()["access_token"]
+    assert client.post("/auth/login", json={"username": "ola", "password": "zle"}).status_code == 401
+    assert password_hasher.stats()["completed"] == completed + 2
+
+    monkeypatch.setattr(password_hasher, "max_pending", 0)
+    res = client.post("/auth/login", json={"username": "ola", "password": "tajne"})
+    assert res.status_code == 503 and res.headers["retry-after"] == "1"
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder
+
+from app.main import compute_prediction_and_shap
+from ml.estimators import make_estimator, make_preprocessor
+from ml.model_loader import build_explainer
+
+
+def make_pipeline():
+    X = pd.DataFrame({
+        "area": [30.0, 45.0, 60.0, 75.0, 90.0, 120.0],
+        "city": ["a", "b", "a", "b", "a", "b"],
+    })
+    y = np.array([300, 420, 610, 700, 880, 1250], dtype=float)
+    pipe = Pipeline([
+        ("preprocessing", ColumnTransformer([
+            ("num", "passthrough", ["area"]),
+            ("cat", OneHotEncoder(handle_unknown="ignore"), ["city"]),
+        ])),
+        ("model", RandomForestRegressor(n_estimators=5, random_state=0)),
+    ])
+    return pipe.fit(X, y), X
+
+
+def test_cached_explainer_matches_fresh():
+    pipe, X = make_pipeline()
+    explainer = build_explainer(pipe)
+
+    assert explainer is not None
+    assert compute_prediction_and_shap(pipe, X.head(1), explainer) == compute_prediction_and_shap(pipe, X.head(1))
+
+
+def test_hist_gradient_boosting_explained():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame({"area": rng.uniform(20, 150, 200), "city": rng.choice(["a", "b"], 200)})
+    y = X["area"] * 9000 + (X["city"] == "b") * 100000
+    pipe = Pipeline([
+        ("preprocessing", make_preprocessor(["area"], ["city"], "hist_gradient_boosting")),
+        ("model", make_estimator("hist_gradient_boosting")),
+    ]).fit(X, y)
+
+    price, shap_values = compute_prediction_and_shap(pipe, X.head(1), build_explainer(pipe))
+
+    assert set(shap_values) == {"area", "city a", "city b"}
+    assert price == round(float(pipe.predict(X.head(1))[0]), 2)
+
+
+def test_build_explainer_skips_non_pipeline():
+    assert build_explainer(object()) is None
+
+
+def test_registry_swap_and_rollback(tmp_path, monkeypatch):
+    import joblib
+    import pytest
+    from ml import model_loader
+    from ml.model_loader import ModelRegistry, load_models
+
+    pipe, _ = make_pipeline()
+    joblib.dump(pipe, tmp_path / "plot.joblib")
+    monkeypatch.setattr(model_loader, "MODEL_DIR", tmp_path)
+    monkeypatch.setattr(model_loader, "VALIDATION_ROWS", {"plot": {"area": 50.0, "city": "a"}})
+
+    original = ModelRegistry.current()
+    try:
+        new_set = load_models()
+        assert ModelRegistry.current() is new_set
+        assert ModelRegistry.previous() is original
+        assert new_set.explainer("plot") is not None
+
+        # zestaw, który nie przechodzi walidacji, nie zastępuje aktywnego
+        monkeypatch.setattr(model_loader, "VALIDATION_ROWS", {"plot": {"area": "x", "city": "a"}})
+        with pytest.raises(Exception):
+            load_models()
+        assert ModelRegistry.current() is new_set
+
+        assert ModelRegistry.rollback() is original
+        assert ModelRegistry.current() is original
+    finally:
+        ModelRegistry.activate(original)
@@ -0,0 +1,63 @@
+def test_predict_plot_batch_mixed(client):
+    valid = {
+        "area": 1000,
+
+        "type": "building",
+        "locationType": "suburban",
+
+        "hasElectricity": 1,
+        "hasWater": 1,
+        "hasGas": 0,
+        "hasSewerage": 1,
+        "isHardAccess": 0,
+        "hasFence": 1,
+
+        "city": "poznan",
+        "province": "wielkopolskie"
+    }
+    invalid = {**valid, "area": -5}
+
+    response = client.post("/predict/plot/batch", json=[valid, invalid, valid])
+
+    assert response.status_code == 200
+    body = response.json()
+
+    assert body["type"] == "plot"
+    assert body["count"] == 3
+    assert body["errors_count"] == 1
+    assert [r["index"] for r in body["results"]] == [0, 1, 2]
+    assert body["results"][0]["cena"] == 123456.78
+    assert "errors" in body["results"][1]
+    assert "cena" in body["results"][2]
+
+
+def test_predict_flat_batch_success(client):
+    payload = {
+        "area": 55,
+        "rooms": 2,
+        "floor": 12,
+        "totalFloors": 15,
+        "year": 2015,
+
+        "buildType": "block",
+        "material": "brick",
+        "heating": "district",
+        "market": "secondary",
+        "constructionStatus": "ready_to_use",
+
+        "hasLift": 1,
+        "hasOutdoor": 0,
+        "hasParking": 1,
+
+        "city": "Krakow ",
+        "district": "",
+        "province": "malopolskie"
+    }
+
+    response = client.post("/predict/flat/batch", json=[payload, payload])
+
+    assert response.status_code == 200
+    body = response.json()
+
+    assert body["errors_count"] == 0
+    assert len(body["results"]) == 2
@@ -0,0 +1,52 @@
+import time
+
+PAYLOAD = {
+    "area": 1000,
+
+    "type": "building",
+    "locationType": "suburban",
+
+    "hasElectricity": 1,
+    "hasWater": 1,
+    "hasGas": 0,
+    "hasSewerage": 1,
+    "isHardAccess": 0,
+    "hasFence": 1,
+
+    "city": "poznan",
+    "province": "wielkopolskie"
+}
+
+
+def test_predict_plot_price_only(client):
+    response = client.post("/predict/plot?explain=none", json=PAYLOAD)
+
+    assert response.status_code == 200
+    body = response.json()
+
+    assert body["cena"] == 123456.78
+    assert body["shap_values"] == {}
+    assert "explanation_id" not in body
+
+
+def test_predict_plot_deferred_explanation(client):
+    response = client.post("/predict/plot?deferred=true", json=PAYLOAD)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["explanation_status"] == "pending"
+
+    for _ in range(50):
+        explanation = client.get(f"/predict/explanations/{body['explanation_id']}").json()
+        if explanation["explanation_status"] != "pending":
+            break
+        time.sleep(0.05)
+
+    assert explanation["explanation_status"] == "done"
+    assert explanation["shap_values"] == {}
+
+
+def test_unknown_explanation(client):
+    response = client.get("/predict/explanations/missing")
+
+    assert response.status_code == 404
@@ -0,0 +1,92 @@
+import threading
+
+import pytest
+
+from app.main import predict_price
+from ml.batching import PredictionBatcher
+from ml.model_loader import ModelRegistry
+
+
+class RecordingModel:
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, X):
+        self.calls.append(len(X))
+        return X["area"].to_numpy() * 1000.0
+
+
+def run_concurrently(batcher, model, areas):
+    results = {}
+    barrier = threading.Barrier(len(areas))
+
+    def worker(area):
+        barrier.wait()
+        results[area] = batcher.predict(model, None, {"area": area})
+
+    threads = [threading.Thread(target=worker, args=(area,)) for area in areas]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_concurrent_rows_share_batches():
+    model = RecordingModel()
+    batcher = PredictionBatcher(enabled=True, max_batch_size=8, max_wait_ms=50)
+
+    areas = [float(a) for a in range(20, 40)]
+    results = run_concurrently(batcher, model, areas)
+
+    assert results == {area: area * 1000.0 for area in areas}
+    assert sum(model.calls) == len(areas)
+    assert max(model.calls) <= 8
+    assert len(model.calls) < len(areas)
+
+    stats = batcher.stats()
+    assert stats["rows"] == len(areas)
+    assert stats["batches"] == len(model.calls)
+    assert stats["queue_delay_ms"]["max"] >= 0
+
+
+def test_batches_split_by_model():
+    first, second = RecordingModel(), RecordingModel()
+    batcher = PredictionBatcher(enabled=True, max_batch_size=16, max_wait_ms=50)
+    barrier = threading.Barrier(4)
+    results = []
+
+    def worker(model, area):
+        barrier.wait()
+        results.append(batcher.predict(model, None, {"area": area}))
+
+    threads = [threading.Thread(target=worker, args=(m, a)) for m, a in
+               [(first, 1.0), (first, 2.0), (second, 3.0), (second, 4.0)]]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(results) == [1000.0, 2000.0, 3000.0, 4000.0]
+    assert sum(first.calls) == 2 and sum(second.calls) == 2
+
+
+def test_errors_reach_every_caller():
+    class Broken:
+        def predict(self, X):
+            raise RuntimeError("model padł")
+
+    batcher = PredictionBatcher(enabled=True, max_wait_ms=1)
+    with pytest.raises(RuntimeError):
+        batcher.predict(Broken(), None, {"area": 1.0}, timeout=5)
+    assert batcher.stats()["errors"] == 1
+
+
+def test_endpoint_uses_batcher(monkeypatch):
+    from app import main
+
+    batcher = PredictionBatcher(enabled=True, max_wait_ms=1)
+    monkeypatch.setattr(main, "prediction_batcher", batcher)
+
+    assert predict_price(ModelRegistry.current(), "plot", {"area": 1000}) == 123456.78
+    assert batcher.stats()["rows"] == 1
@@ -0,0 +1,80 @@
+import numpy as np
+
+from ml.model_loader import ModelRegistry, make_model_set
+
+PAYLOAD = {
+    "area": 777,
+
+    "type": "recreational",
+    "locationType": "country",
+
+    "hasElectricity": 0,
+    "hasWater": 0,
+    "hasGas": 0,
+    "hasSewerage": 0,
+    "isHardAccess": 1,
+    "hasFence": 0,
+
+    "city": "olsztyn",
+    "province": "warminsko-mazurskie"
+}
+
+
+class CountingModel:
+    def __init__(self):
+        self.calls = 0
+
+    def predict(self, X):
+        self.calls += 1
+        return np.full(len(X), 1000.0 + self.calls)
+
+
+def test_repeated_payload_served_from_cache(client):
+    previous = ModelRegistry.current()
+    model = CountingModel()
+    ModelRegistry.activate(make_model_set({**previous.models, "plot": model}))
+    try:
+        first = client.post("/predict/plot", json=PAYLOAD).json()
+        second = client.post("/predict/plot", json=PAYLOAD).json()
+        assert model.calls == 1
+        assert first == second
+
+        # nowa wersja modeli unieważnia wpis
+        ModelRegistry.activate(make_model_set({**previous.models, "plot": model}))
+        third = client.post("/predict/plot", json=PAYLOAD).json()
+        assert model.calls == 2
+        assert third["cena"] != first["cena"]
+        assert third["model_version"] != first["model_version"]
+    finally:
+        ModelRegistry.activate(previous)
+
+    stats = client.get("/api/v1/metrics").json()["prediction_cache"]
+    assert stats["hits"] >= 1
+
+
+class StaleWorkerPool:
+    """Pula, której proces roboczy liczy jeszcze poprzednim zestawem modeli."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def run(self, fn, models, *args):
+        self.calls += 1
+        return 1000.0, {}, "stale-version"
+
+
+def test_stale_worker_result_not_cached(client, monkeypatch):
+    from app import main
+
+    pool = StaleWorkerPool()
+    monkeypatch.setattr(main, "inference_pool", pool)
+    previous = ModelRegistry.current()
+    ModelRegistry.activate(make_model_set({**previous.models, "plot": CountingModel()}))
+    try:
+        first = client.post("/predict/plot", params={"explain": "none"}, json=PAYLOAD).json()
+        client.post("/predict/plot", params={"explain": "none"}, json=PAYLOAD)
+    finally:
+        ModelRegistry.activate(previous)
+
+    assert first["model_version"] == "stale-version"
+    assert pool.calls == 2
@@ -0,0 +1,175 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from ml.model_loader import MODEL_FILES, promote_models, read_generation, rollback_model_files
+from ml.retraining import RetrainingJobs
+
+
+class FakeModelSet:
+    version = "v-test"
+
+
+def wait_for(jobs, job_id):
+    for _ in range(100):
+        job = jobs.get(job_id)
+        if job["status"] in ("succeeded", "failed"):
+            return job
+        time.sleep(0.02)
+    raise AssertionError("Zadanie nie zakończyło się na czas")
+
+
+def test_retraining_job_runs_trainers_and_reloads(tmp_path):
+    reloaded = []
+    jobs = RetrainingJobs(
+        on_success=lambda staging: reloaded.append(True) or FakeModelSet(),
+        runner=lambda kind, output_dir: {"MAE": 1.0, "kind": kind},
+        executor_factory=lambda: ThreadPoolExecutor(max_workers=3),
+        staging_dir=tmp_path / "staging",
+        state_dir=tmp_path,
+    )
+
+    job = wait_for(jobs, jobs.enqueue()["id"])
+
+    assert job["status"] == "succeeded"
+    assert job["model_version"] == "v-test"
+    assert {k: v["metrics"]["kind"] for k, v in job["trainers"].items()} == {"flat": "flat", "house": "house", "plot": "plot"}
+    assert reloaded == [True]
+
+
+def test_failed_trainer_skips_reload(tmp_path):
+    reloaded = []
+
+    def runner(kind, output_dir):
+        if kind == "plot":
+            raise RuntimeError("brak danych")
+        (Path(output_dir) / MODEL_FILES[kind]).write_text("nowy")
+        return {"MAE": 1.0}
+
+    jobs = RetrainingJobs(
+        on_success=lambda staging: reloaded.append(True),
+        runner=runner,
+        executor_factory=lambda: ThreadPoolExecutor(max_workers=3),
+        staging_dir=tmp_path / "staging",
+        state_dir=tmp_path,
+    )
+
+    job = wait_for(jobs, jobs.enqueue()["id"])
+
+    assert job["status"] == "failed"
+    assert job["trainers"]["plot"]["error"] == "brak danych"
+    assert reloaded == []
+    # modele udanych skryptów nie zostają w katalogu roboczym ani nie trafiają do models
+    assert list((tmp_path / "staging").iterdir()) == []
+
+
+def test_broken_executor_fails_job_and_allows_next(tmp_path):
+    def broken_executor():
+        raise OSError("nie można uruchomić procesu")
+
+    jobs = RetrainingJobs(on_success=lambda staging: FakeModelSet(), runner=lambda kind, output_dir: {},
+                          executor_factory=broken_executor, staging_dir=tmp_path / "staging", state_dir=tmp_path)
+
+    first = wait_for(jobs, jobs.enqueue()["id"])
+    assert first["status"] == "failed" and first["finished_at"] is not None
+    assert "nie można uruchomić procesu" in first["error"]
+
+    jobs.executor_factory = lambda: ThreadPoolExecutor(max_workers=3)
+    second = wait_for(jobs, jobs.enqueue()["id"])
+    assert second["id"] != first["id"] and second["status"] == "succeeded"
+
+
+def test_promote_models_moves_complete_set_only(tmp_path):
+    staging, live = tmp_path / "staging", tmp_path / "models"
+    staging.mkdir()
+    live.mkdir()
+    for filename in MODEL_FILES.values():
+        (live / filename).write_text("stary")
+    (live / "flat.serving.joblib").write_text("stary las")
+    (staging / "flat.joblib").write_text("nowy")
+
+    with pytest.raises(RuntimeError):
+        promote_models(staging, live)
+    assert {f.name: f.read_text() for f in live.iterdir()}["flat.joblib"] == "stary"
+
+    for filename in MODEL_FILES.values():
+        (staging / filename).write_text("nowy")
+    (staging / "plot.serving.joblib").write_text("nowy las")
+    version = promote_models(staging, live)
+
+    assert model_files(live) == {
+        "flat.joblib": "nowy", "house.joblib": "nowy", "plot.joblib": "nowy", "plot.serving.joblib": "nowy las",
+    }
+    assert model_files(live / "previous") == {
+        "flat.joblib": "stary", "house.joblib": "stary", "plot.joblib": "stary", "flat.serving.joblib": "stary las",
+    }
+    generation = read_generation(live)
+    assert generation["version"] == version and generation["previous"]
+
+    # rollback zamienia komplety miejscami, drugi wraca do stanu po uczeniu
+    assert rollback_model_files(live) == generation["previous"]
+    assert model_files(live)["flat.serving.joblib"] == "stary las" and "plot.serving.joblib" not in model_files(live)
+    assert rollback_model_files(live) == version
+    assert model_files(live)["plot.serving.joblib"] == "nowy las"
+
+
+def model_files(directory):
+    return {f.name: f.read_text() for f in directory.iterdir() if f.suffix == ".joblib"}
+
+
+def test_jobs_shared_between_workers(tmp_path):
+    def make_worker():
+        return RetrainingJobs(
+            on_success=lambda staging: FakeModelSet(),
+            runner=lambda kind, output_dir: {"MAE": 1.0},
+            executor_factory=lambda: ThreadPoolExecutor(max_workers=3),
+            staging_dir=tmp_path / "staging",
+            state_dir=tmp_path,
+        )
+
+    leader, other = make_worker(), make_worker()
+    assert leader.lead() and not other.lead()
+
+    # zlecenie przyjęte przez workera bez blokady uruchamia dopiero poll() prowadzącego
+    job_id = other.enqueue()["id"]
+    assert other.get(job_id)["status"] == "queued"
+    assert other.enqueue()["id"] == job_id
+    leader.poll()
+    assert wait_for(other, job_id)["status"] == "succeeded"
+
+    # zadanie porzucone przez prowadzącego, który padł, kończy się błędem po przejęciu blokady
+    leader._update(job_id, status="running")
+    leader.shutdown()
+    assert other.lead()
+    job = other.get(job_id)
+    assert job["status"] == "failed" and job["finished_at"] is not None
+    other.shutdown()
+
+
+def test_sync_models_follows_generation(monkeypatch):
+    from app import main
+    from ml.model_loader import ModelRegistry, make_model_set
+    from tests.conftest import DummyModel
+
+    previous = ModelRegistry.current()
+    older = make_model_set({"plot": DummyModel()}, version="g-older")
+    newer = make_model_set({"plot": DummyModel()}, version="g-newer")
+    ModelRegistry.activate(older)
+    ModelRegistry.activate(newer)
+    reloads = []
+    monkeypatch.setattr(main, "reload_models", lambda: reloads.append(True) or newer)
+    try:
+        monkeypatch.setattr(main, "read_generation", lambda: {"version": "g-newer"})
+        assert main.sync_models() is newer
+
+        # rollback zlecony w innym workerze: zestaw z pamięci, bez ładowania z dysku
+        monkeypatch.setattr(main, "read_generation", lambda: {"version": "g-older"})
+        assert main.sync_models() is older and reloads == []
+
+        monkeypatch.setattr(main, "read_generation", lambda: {"version": "g-retrained"})
+        main.sync_models()
+        assert reloads == [True]
+    finally:
+        ModelRegistry.activate(previous)
@@ -0,0 +1,116 @@
+import os
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder
+
+from app.main import compute_prediction_and_shap
+from ml.model_loader import build_explainer, load_model_file, make_model_set
+from ml.serving_artifact import export_serving_artifact, load_serving_artifact
+
+
+def make_pipeline():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame({
+        "area": rng.uniform(20, 150, 300),
+        "rooms": rng.integers(1, 6, 300),
+        "city": rng.choice(["krakow", "warszawa", "poznan"], 300),
+    })
+    y = X["area"] * 9000 + X["rooms"] * 20000 + (X["city"] == "warszawa") * 150000 + rng.normal(0, 5000, 300)
+    pipe = Pipeline([
+        ("preprocessing", ColumnTransformer([
+            ("num", "passthrough", ["area", "rooms"]),
+            ("cat", OneHotEncoder(handle_unknown="ignore"), ["city"]),
+        ])),
+        ("model", RandomForestRegressor(n_estimators=20, max_depth=8, random_state=0)),
+    ])
+    return pipe.fit(X, y), X
+
+
+def test_compact_artifact_parity(tmp_path):
+    pipe, X = make_pipeline()
+    path = tmp_path / "flat.serving.joblib"
+    export_serving_artifact(pipe, path)
+
+    compact = load_serving_artifact(path, mmap_mode="r")
+
+    assert isinstance(compact.named_steps["model"].threshold, np.memmap)
+    np.testing.assert_allclose(compact.predict(X), pipe.predict(X), rtol=1e-9)
+
+    row = X.head(1)
+    expected = compute_prediction_and_shap(pipe, row, build_explainer(pipe))
+    assert compute_prediction_and_shap(compact, row, build_explainer(compact)) == expected
+
+
+def test_compact_artifact_pruned(tmp_path):
+    pipe, X = make_pipeline()
+    path = tmp_path / "flat.serving.joblib"
+
+    metadata = export_serving_artifact(pipe, path, max_trees=5)
+    compact = load_serving_artifact(path)
+
+    assert metadata["n_trees"] == 5
+    expected = np.mean([est.predict(X.pipe(pipe.named_steps["preprocessing"].transform)) for est in pipe.named_steps["model"].estimators_[:5]], axis=0)
+    np.testing.assert_allclose(compact.predict(X), expected, rtol=1e-9)
+
+
+def test_reexport_keeps_mapped_model_intact(tmp_path):
+    pipe, X = make_pipeline()
+    path = tmp_path / "flat.serving.joblib"
+    export_serving_artifact(pipe, path)
+    live = load_serving_artifact(path, mmap_mode="r")
+    expected = live.predict(X)
+
+    # ponowny eksport (jak po retreningu) podmienia plik, a nie nadpisuje zmapowanych tablic
+    export_serving_artifact(pipe, path, max_trees=3)
+
+    np.testing.assert_allclose(live.predict(X), expected, rtol=1e-12)
+    assert load_serving_artifact(path).metadata["n_trees"] == 3
+    assert [f.name for f in tmp_path.iterdir()] == ["flat.serving.joblib"]
+
+
+def test_shared_memory_loading(tmp_path):
+    pipe, X = make_pipeline()
+    joblib.dump(pipe, tmp_path / "flat.joblib")
+    export_serving_artifact(pipe, tmp_path / "flat.serving.joblib")
+    shm_dir = tmp_path / "shm"
+
+    first = load_model_file(tmp_path / "flat.joblib", share_mode="shm", shm_dir=shm_dir)
+    second = load_model_file(tmp_path / "flat.joblib", share_mode="shm", shm_dir=shm_dir)
+
+    staged = [f for f in shm_dir.iterdir() if f.suffix == ".joblib"]
+    assert len(staged) == 1
+    assert first.named_steps["model"].threshold.filename == str(staged[0])
+    np.testing.assert_allclose(second.predict(X), pipe.predict(X), rtol=1e-9)
+
+
+def test_shared_memory_prunes_previous_copy(tmp_path):
+    pipe, X = make_pipeline()
+    joblib.dump(pipe, tmp_path / "flat.joblib")
+    export_serving_artifact(pipe, tmp_path / "flat.serving.joblib")
+    shm_dir = tmp_path / "shm"
+    old = load_model_file(tmp_path / "flat.joblib", share_mode="shm", shm_dir=shm_dir)
+
+    export_serving_artifact(pipe, tmp_path / "flat.serving.joblib", max_trees=3)
+    os.utime(tmp_path / "flat.serving.joblib", (1, 1))
+    new = load_model_file(tmp_path / "flat.joblib", share_mode="shm", shm_dir=shm_dir)
+
+    staged = [f for f in shm_dir.iterdir() if f.suffix == ".joblib"]
+    assert staged == [Path(new.named_steps["model"].threshold.filename)]
+    # stara kopia zniknęła z katalogu, ale zmapowany model (np. do rollbacku) dalej działa
+    np.testing.assert_allclose(old.predict(X), pipe.predict(X), rtol=1e-9)
+
+
+def test_lazy_explainers():
+    pipe, _ = make_pipeline()
+    model_set = make_model_set({"flat": pipe}, lazy_explainers=True)
+
+    assert model_set.explainers == {}
+    explainer = model_set.explainer("flat")
+    assert explainer is not None
+    assert model_set.explainer("flat") is explainer
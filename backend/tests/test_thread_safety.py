@@ -0,0 +1,49 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from app.main import compute_prediction_and_shap
+from ml.model_loader import LockedExplainer, ModelRegistry, build_explainer, make_model_set
+from tests.conftest import DummyModel
+from tests.test_forest_engine import make_pipeline
+
+
+def test_concurrent_predictions_match_sequential():
+    pipe, X = make_pipeline()
+    explainer = build_explainer(pipe)
+    assert isinstance(explainer, LockedExplainer)
+    rows = [X.iloc[[i]] for i in range(40)]
+
+    expected = [compute_prediction_and_shap(pipe, row, explainer, None) for row in rows]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda row: compute_prediction_and_shap(pipe, row, explainer, None), rows * 4))
+
+    assert results == expected * 4
+
+
+def test_registry_swaps_under_concurrent_reads():
+    previous = ModelRegistry.current()
+    sets = [make_model_set({"plot": DummyModel()}, version=f"v{i}") for i in range(2)]
+    versions = {"v0", "v1"}
+    ModelRegistry.activate(sets[0])
+    ModelRegistry.activate(sets[1])
+    seen, stop = set(), threading.Event()
+
+    def reader():
+        while not stop.is_set():
+            seen.add(ModelRegistry.current().version)
+
+    readers = [threading.Thread(target=reader) for _ in range(4)]
+    for thread in readers:
+        thread.start()
+    try:
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            list(pool.map(lambda _: ModelRegistry.rollback(), range(400)))
+        # parzysta liczba rollbacków wraca do stanu wyjściowego, a para zestawów się nie rozjeżdża
+        assert ModelRegistry.current() is sets[1] and ModelRegistry.previous() is sets[0]
+    finally:
+        stop.set()
+        for thread in readers:
+            thread.join()
+        ModelRegistry.activate(previous)
+
+    assert seen <= versions
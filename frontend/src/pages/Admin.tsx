@@ -25,15 +25,24 @@ export default function Admin() {
   const handleRetrain = async () => {
     setLoading(true);
     setError("");
+    const headers = { Authorization: `Bearer ${token}` };
     try {
-      await api.post(
-        "/admin/retrain",
-        {},
-        {
-          headers: { Authorization: `Bearer ${token}` },
+      const res = await api.post("/admin/retrain", {}, { headers });
+      const jobId = res.data.job_id;
+
+      // uczenie działa w tle - odpytujemy status zadania
+      while (true) {
+        await new Promise((resolve) => setTimeout(resolve, 3000));
+        const job = await api.get(`/admin/retrain/${jobId}`, { headers });
+        if (job.data.status === "succeeded") {
+          alert(`Modele zostały ponownie wytrenowane (wersja ${job.data.model_version})`);
+          break;
+        }
+        if (job.data.status === "failed") {
+          setError(job.data.error || "Błąd podczas uczenia modeli");
+          break;
         }
-      );
-      alert("Modele zostały ponownie wytrenowane");
+      }
     } catch (err: any) {
       setError(err.response?.data?.detail || "Błąd podczas uczenia modeli");
     } finally {
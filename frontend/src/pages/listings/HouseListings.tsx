@@ -1,19 +1,21 @@
 import { useEffect, useState } from "react";
-import api from "../../api";
 import ListingCard from "./ListingCard";
-import { LISTING_ENDPOINTS } from "./listingUtils";
+import { LISTING_ENDPOINTS, fetchListingsPage } from "./listingUtils";
 
 export default function HouseListings() {
   const [items, setItems] = useState<any[]>([]);
   const [loading, setLoading] = useState(true);
   const [err, setErr] = useState("");
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   const loadListings = async () => {
     try {
       setLoading(true);
       setErr("");
-      const res = await api.get(LISTING_ENDPOINTS.houses);
-      setItems(Array.isArray(res.data) ? res.data : []);
+      const page = await fetchListingsPage(LISTING_ENDPOINTS.houses);
+      setItems(page.items);
+      setNextCursor(page.nextCursor);
     } catch {
       setErr("Nie udało się pobrać ogłoszeń domów.");
     } finally {
@@ -21,6 +23,20 @@ export default function HouseListings() {
     }
   };
 
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    try {
+      setLoadingMore(true);
+      const page = await fetchListingsPage(LISTING_ENDPOINTS.houses, nextCursor);
+      setItems((prev) => [...prev, ...page.items]);
+      setNextCursor(page.nextCursor);
+    } catch {
+      setErr("Nie udało się pobrać ogłoszeń domów.");
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   useEffect(() => {
     loadListings();
   }, []);
@@ -30,22 +46,36 @@ export default function HouseListings() {
   if (!items.length) return <div className="text-gray-600">Brak ogłoszeń domów.</div>;
 
   return (
-    <div className="grid sm:grid-cols-2 lg:grid-cols-3 gap-4">
-      {items.map((l) => {
-        const area = l.area ? `${l.area} m²` : null;
-        const rooms = l.rooms ? `${l.rooms} pok.` : null;
-        const year = (l.year ?? l.year_built) ? `rok ${l.year ?? l.year_built}` : null;
-
-        return (
-          <ListingCard
-            key={l.id}
-            listing={l}
-            to={`/ogloszenia/domy/${l.id}`}
-            subtitleLines={[area, rooms, year].filter(Boolean) as string[]}
-            onRefresh={loadListings}
-          />
-        );
-      })}
+    <div>
+      <div className="grid sm:grid-cols-2 lg:grid-cols-3 gap-4">
+        {items.map((l) => {
+          const area = l.area ? `${l.area} m²` : null;
+          const rooms = l.rooms ? `${l.rooms} pok.` : null;
+          const year = (l.year ?? l.year_built) ? `rok ${l.year ?? l.year_built}` : null;
+
+          return (
+            <ListingCard
+              key={l.id}
+              listing={l}
+              to={`/ogloszenia/domy/${l.id}`}
+              subtitleLines={[area, rooms, year].filter(Boolean) as string[]}
+              onRefresh={loadListings}
+            />
+          );
+        })}
+      </div>
+
+      {nextCursor && (
+        <div className="flex justify-center mt-6">
+          <button
+            onClick={loadMore}
+            disabled={loadingMore}
+            className="px-4 py-2 rounded-lg bg-gray-200 text-gray-700 hover:bg-gray-300 disabled:opacity-50"
+          >
+            {loadingMore ? "Ładowanie..." : "Załaduj więcej"}
+          </button>
+        </div>
+      )}
     </div>
   );
 }
@@ -1,9 +1,20 @@
+import api from "../../api";
+
 export const LISTING_ENDPOINTS = {
   flats: "/api/listings/flats",
   houses: "/api/listings/houses",
   plots: "/api/listings/plots",
 } as const;
 
+// Lista jest stronicowana kursorem: kolejną stronę wskazuje nagłówek X-Next-Cursor (brak = koniec)
+export async function fetchListingsPage(endpoint: string, cursor?: string | null) {
+  const res = await api.get(endpoint, { params: cursor ? { cursor } : {} });
+  return {
+    items: Array.isArray(res.data) ? res.data : [],
+    nextCursor: (res.headers["x-next-cursor"] as string | undefined) ?? null,
+  };
+}
+
 export function formatPrice(value: unknown) {
   const n = Number(value);
   if (!Number.isFinite(n)) return "";
@@ -0,0 +1,462 @@
+"""
+Wspólny, asynchroniczny silnik scraperów otodom.
+
+Scrapery (ScrapperMieszkania.py, ScrapperDomy.py, ScrapperDzialki.py) dostarczają tylko adres wyników
+i funkcję parse_listing(url, ad) mapującą obiekt ogłoszenia z __NEXT_DATA__ na wiersz CSV.
+Silnik pobiera strony wyników i ogłoszenia równolegle przez jednego klienta httpx z pulą połączeń,
+z limitem zapytań na host (token bucket) i ponawianiem z wykładniczym odczekaniem.
+
+Ustawienia (zmienne środowiskowe):
+    SCRAPER_CONCURRENCY - liczba równoległych pobrań (domyślnie 8)
+    SCRAPER_RATE        - zapytań na sekundę na host (domyślnie 2)
+    SCRAPER_BURST       - ile zapytań może pójść naraz po przerwie (domyślnie 4)
+    SCRAPER_RETRIES     - ponowienia po błędzie sieci, 429 i 5xx (domyślnie 3)
+    SCRAPER_TIMEOUT     - timeout pojedynczego zapytania w sekundach (domyślnie 30)
+    SCRAPER_INDEX       - plik indeksu ogłoszeń (domyślnie <plik_wyjściowy>.index.sqlite)
+    SCRAPER_REFRESH_HOURS - przez ile godzin od ostatniego pobrania znane ogłoszenie pomijamy bez pytania
+                          serwera (domyślnie 0: każde znane jest sprawdzane zapytaniem warunkowym)
+    SCRAPER_PARSE_WORKERS - procesy parsujące pobrane ogłoszenia; 0 (domyślnie) parsuje w pętli zdarzeń
+    SCRAPER_PARSE_QUEUE - pojemność kolejki między pobieraniem a parsowaniem (domyślnie 64)
+    SCRAPER_STATS_INTERVAL - co ile sekund wypisywać przepustowość etapów (domyślnie 10)
+
+Domyślnie przebieg jest przyrostowy: wiersze dopisywane są do CSV na bieżąco, nowe i zmienione ogłoszenia
+trafiają do pliku, niezmienione (304 albo ten sam skrót treści) są pomijane, a przerwany przebieg
+wznawia się od pierwszej nieukończonej strony wyników. `--full` wyłącza indeks i nadpisuje CSV.
+"""
+import asyncio
+import csv
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urljoin, urlsplit
+
+import httpx
+from bs4 import BeautifulSoup
+
+from ScrapperIndex import OfferIndex, content_hash, index_path
+from ScrapperNextData import extract_next_data
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+                  "AppleWebKit/537.36 (KHTML, like Gecko) "
+                  "Chrome/116.0.0.0 Safari/537.36"
+}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+ParseListing = Callable[[str, dict], Optional[dict]]
+
+
+class TokenBucket:
+    """Limit zapytań: rate tokenów na sekundę, najwyżej burst naraz."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def get_val(target: dict, key: str, default=""):
+    val = target.get(key, default)
+    if isinstance(val, list) and len(val) > 0:
+        return val[0]
+    if val is None:
+        return default
+    return val
+
+
+def listing_price(ad: dict) -> Optional[float]:
+    """Cena z ogłoszenia, a gdy jej brak - powierzchnia razy cena za m2."""
+    target = ad.get("target", {})
+    price = ad.get("Price")
+    if not price:
+        price = target.get("Price")
+    if not price:
+        area = target.get("Area")
+        price_per_m = target.get("Price_per_m")
+        if area and price_per_m:
+            try:
+                price = float(area) * float(price_per_m)
+            except (TypeError, ValueError):
+                price = None
+    return price or None
+
+
+def extract_ad(content: bytes) -> Optional[dict]:
+    data_json = extract_next_data(content)
+    if not data_json:
+        return None
+    return data_json['props']['pageProps']['ad']
+
+
+def offer_links(content: bytes, base_url: str) -> List[str]:
+    soup = BeautifulSoup(content, "html.parser")
+    links = {a['href'] for a in soup.select("a[href*='/oferta/']")}
+    return [urljoin(base_url, link) for link in links]
+
+
+def parse_offer(parse_listing: ParseListing, url: str, content: bytes, known_hash: Optional[str] = None) -> dict:
+    """
+    Etap CPU: JSON z __NEXT_DATA__, skrót treści i mapowanie na wiersz. Funkcja modułowa bez stanu silnika,
+    więc można ją wykonać w puli procesów (parse_listing musi być funkcją z poziomu modułu).
+    """
+    try:
+        ad = extract_ad(content)
+        if not ad:
+            return {"status": "missing"}
+        digest = content_hash(ad)
+        if known_hash == digest:
+            return {"status": "unchanged"}
+        return {"status": "ok", "row": parse_listing(url, ad), "digest": digest, "offer_id": ad.get("id")}
+    except Exception as e:
+        return {"status": "error", "error": f"{type(e).__name__}: {e}"}
+
+
+class ScraperEngine:
+    def __init__(
+        self,
+        base_url: str,
+        parse_listing: ParseListing,
+        concurrency: int = 8,
+        rate: float = 2.0,
+        burst: int = 4,
+        retries: int = 3,
+        backoff: float = 0.5,
+        timeout: float = 30.0,
+        headers: Optional[Dict[str, str]] = None,
+        index: Optional[OfferIndex] = None,
+        sink: Optional["CsvSink"] = None,
+        refresh_after: float = 0.0,
+        parse_workers: int = 0,
+        parse_queue_size: int = 64,
+        stats_interval: float = 10.0,
+    ):
+        self.base_url = base_url
+        self.parse_listing = parse_listing
+        self.concurrency = concurrency
+        self.rate = rate
+        self.burst = burst
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.headers = headers or HEADERS
+        self.index = index
+        self.sink = sink
+        self.refresh_after = refresh_after
+        self.parse_workers = parse_workers
+        self.parse_queue_size = parse_queue_size
+        self.stats_interval = stats_interval
+        self.stats = {
+            "requests": 0, "retries": 0, "failed": 0, "pages": 0, "offers": 0, "downloaded": 0, "processed": 0,
+            "parsed": 0, "skipped": 0, "not_modified": 0, "unchanged": 0, "queue_max": 0,
+        }
+        self.results: List[dict] = []
+        self._started = time.monotonic()
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    @classmethod
+    def from_env(cls, base_url: str, parse_listing: ParseListing, **overrides) -> "ScraperEngine":
+        settings = dict(
+            concurrency=int(os.getenv("SCRAPER_CONCURRENCY", "8")),
+            rate=float(os.getenv("SCRAPER_RATE", "2")),
+            burst=int(os.getenv("SCRAPER_BURST", "4")),
+            retries=int(os.getenv("SCRAPER_RETRIES", "3")),
+            timeout=float(os.getenv("SCRAPER_TIMEOUT", "30")),
+            refresh_after=float(os.getenv("SCRAPER_REFRESH_HOURS", "0")) * 3600,
+            parse_workers=int(os.getenv("SCRAPER_PARSE_WORKERS", "0")),
+            parse_queue_size=int(os.getenv("SCRAPER_PARSE_QUEUE", "64")),
+            stats_interval=float(os.getenv("SCRAPER_STATS_INTERVAL", "10")),
+        )
+        return cls(base_url, parse_listing, **{**settings, **overrides})
+
+    def bucket(self, url: str) -> TokenBucket:
+        host = urlsplit(url).netloc
+        if host not in self._buckets:
+            self._buckets[host] = TokenBucket(self.rate, self.burst)
+        return self._buckets[host]
+
+    def retry_delay(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        if response is not None and response.headers.get("Retry-After", "").isdigit():
+            return float(response.headers["Retry-After"])
+        # wykładniczo z losowym rozrzutem, żeby ponowienia nie szły falą
+        return self.backoff * 2 ** attempt * (0.5 + random.random())
+
+    async def fetch(
+        self, client: httpx.AsyncClient, url: str, params: Optional[dict] = None, headers: Optional[dict] = None
+    ) -> Optional[httpx.Response]:
+        """Odpowiedź 200 (albo 304 na zapytanie warunkowe) lub None, gdy ponowienia się wyczerpią."""
+        for attempt in range(self.retries + 1):
+            await self.bucket(url).acquire()
+            response = None
+            self.stats["requests"] += 1
+            try:
+                response = await client.get(url, params=params, headers=headers)
+                if response.status_code in (200, 304):
+                    return response
+                if response.status_code not in RETRY_STATUSES:
+                    print(f"Błąd pobierania {url}: {response.status_code}")
+                    break
+            except httpx.TransportError as e:
+                print(f"Błąd połączenia {url}: {e}")
+
+            if attempt < self.retries:
+                self.stats["retries"] += 1
+                await asyncio.sleep(self.retry_delay(attempt, response))
+        self.stats["failed"] += 1
+        return None
+
+    async def get_listing_urls(self, client: httpx.AsyncClient, page: int) -> Optional[List[str]]:
+        response = await self.fetch(client, self.base_url, params={"page": page})
+        if response is None:
+            print(f"Błąd pobierania strony {page}")
+            return None
+        urls = offer_links(response.content, self.base_url)
+        if self.index:
+            self.index.seen(urls)
+        print(f"Znaleziono {len(urls)} ogłoszeń na stronie {page}")
+        return urls
+
+    async def download_offer(self, client: httpx.AsyncClient, url: str):
+        """Etap sieciowy: (odpowiedź, wpis z indeksu) albo None, gdy nie ma czego parsować."""
+        known = self.index.get(url) if self.index else None
+        if known is not None and self.index.is_fresh(known, self.refresh_after):
+            self.stats["skipped"] += 1
+            return None
+
+        headers = {}
+        if known is not None and known["content_hash"]:
+            if known["etag"]:
+                headers["If-None-Match"] = known["etag"]
+            if known["last_modified"]:
+                headers["If-Modified-Since"] = known["last_modified"]
+
+        response = await self.fetch(client, url, headers=headers)
+        if response is None:
+            return None
+        if response.status_code == 304:
+            self.stats["not_modified"] += 1
+            self.index.checked(url)
+            return None
+        self.stats["downloaded"] += 1
+        return response, known
+
+    def store_offer(self, url: str, response: httpx.Response, result: dict) -> Optional[dict]:
+        """Zapis wyniku parsowania (zawsze w procesie głównym): statystyki, CSV i indeks."""
+        self.stats["processed"] += 1
+        status = result["status"]
+        if status == "error":
+            print(f"Nie udało się sparsować {url}: {result['error']}")
+            return None
+        if status == "unchanged":
+            self.stats["unchanged"] += 1
+            self.index.checked(url)
+            return None
+        if status == "missing":
+            return None
+
+        row = result["row"]
+        # najpierw wiersz w pliku, potem indeks - po awarii między nimi ogłoszenie zostanie pobrane ponownie
+        if row:
+            self.stats["parsed"] += 1
+            self.results.append(row)
+            if self.sink:
+                self.sink.write(row)
+        if self.index:
+            self.index.record(
+                url, result["offer_id"], result["digest"],
+                response.headers.get("ETag"), response.headers.get("Last-Modified"),
+            )
+        return row
+
+    async def scrape_offer(self, client: httpx.AsyncClient, url: str) -> Optional[dict]:
+        downloaded = await self.download_offer(client, url)
+        if downloaded is None:
+            return None
+        response, known = downloaded
+        result = parse_offer(self.parse_listing, url, response.content, known["content_hash"] if known else None)
+        return self.store_offer(url, response, result)
+
+    def progress(self, parse_queue: Optional[asyncio.Queue] = None) -> str:
+        elapsed = max(time.monotonic() - self._started, 1e-9)
+        line = (f"[strony] {self.stats['pages'] / elapsed:.2f}/s | "
+                f"[pobieranie] {self.stats['downloaded'] / elapsed:.1f} ofert/s | "
+                f"[parsowanie] {self.stats['processed'] / elapsed:.1f} ofert/s")
+        if parse_queue is not None:
+            line += f" | kolejka {parse_queue.qsize()}/{parse_queue.maxsize} (max {self.stats['queue_max']})"
+        return line
+
+    async def report_progress(self, parse_queue: Optional[asyncio.Queue]):
+        while True:
+            await asyncio.sleep(self.stats_interval)
+            print(self.progress(parse_queue))
+
+    async def run(self, pages: int = 50) -> List[dict]:
+        """
+        Strony wyników i ogłoszenia idą przez wspólną kolejkę; wynik w kolejności pobrania.
+        Z indeksem strona wyników jest ukończona, gdy przetworzono wszystkie jej nowe w tym przebiegu ogłoszenia.
+
+        Z parse_workers > 0 pobrane strony ogłoszeń trafiają do ograniczonej kolejki (parse_queue_size),
+        z której zadania parsujące wysyłają je do puli procesów. Pełna kolejka wstrzymuje pobieranie.
+        """
+        self.results = []
+        self._started = time.monotonic()
+        seen = set()
+        pending: Dict[int, int] = {}
+        done_pages = set()
+        if self.index:
+            if self.index.start_run(self.base_url, pages):
+                done_pages = self.index.done_pages()
+                print(f"Wznawiam przerwany przebieg, ukończone strony: {len(done_pages)}")
+
+        queue: asyncio.Queue = asyncio.Queue()
+        parse_queue = asyncio.Queue(maxsize=self.parse_queue_size) if self.parse_workers else None
+        pool = ProcessPoolExecutor(max_workers=self.parse_workers) if self.parse_workers else None
+        loop = asyncio.get_running_loop()
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+
+        def offer_done(page: int):
+            pending[page] -= 1
+            if pending[page] == 0 and self.index:
+                self.index.mark_page_done(page)
+
+        async with httpx.AsyncClient(
+            headers=self.headers, limits=limits, timeout=self.timeout, follow_redirects=True
+        ) as client:
+            async def worker():
+                while True:
+                    kind, value, page = await queue.get()
+                    handed_off = False
+                    try:
+                        if kind == "page":
+                            found = await self.get_listing_urls(client, page)
+                            if found is None:
+                                continue  # strona nieukończona - przy wznowieniu zostanie pobrana ponownie
+                            self.stats["pages"] += 1
+                            urls = [url for url in found if url not in seen]
+                            seen.update(urls)
+                            pending[page] = len(urls) + 1
+                            for url in urls:
+                                queue.put_nowait(("offer", url, page))
+                        elif parse_queue is None:
+                            self.stats["offers"] += 1
+                            await self.scrape_offer(client, value)
+                        else:
+                            self.stats["offers"] += 1
+                            downloaded = await self.download_offer(client, value)
+                            if downloaded is not None:
+                                await parse_queue.put((value, page, *downloaded))
+                                self.stats["queue_max"] = max(self.stats["queue_max"], parse_queue.qsize())
+                                handed_off = True
+                    except Exception as e:
+                        # pojedynczy błąd nie może zatrzymać workera, bo queue.join() czekałby w nieskończoność
+                        print(f"Nie udało się przetworzyć {kind} {value}: {e}")
+                    finally:
+                        if page in pending and not handed_off:
+                            offer_done(page)
+                        queue.task_done()
+
+            async def parser():
+                while True:
+                    url, page, response, known = await parse_queue.get()
+                    try:
+                        known_hash = known["content_hash"] if known else None
+                        result = await loop.run_in_executor(
+                            pool, parse_offer, self.parse_listing, url, response.content, known_hash
+                        )
+                        self.store_offer(url, response, result)
+                    except Exception as e:
+                        print(f"Nie udało się przetworzyć offer {url}: {e}")
+                    finally:
+                        offer_done(page)
+                        parse_queue.task_done()
+
+            for page in range(1, pages + 1):
+                if page not in done_pages:
+                    queue.put_nowait(("page", None, page))
+            tasks = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+            if parse_queue is not None:
+                # dwa zadania na proces: jedno czeka na wynik, drugie ma już kolejną stronę w drodze
+                tasks += [asyncio.create_task(parser()) for _ in range(2 * self.parse_workers)]
+            tasks.append(asyncio.create_task(self.report_progress(parse_queue)))
+            try:
+                await queue.join()
+                if parse_queue is not None:
+                    await parse_queue.join()
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                if pool is not None:
+                    pool.shutdown()
+
+        if self.index:
+            self.index.finish_run()
+        print(self.progress(parse_queue))
+        print(f"Pobrano {self.stats['parsed']}/{self.stats['offers']} ogłoszeń "
+              f"({self.stats['requests']} zapytań, {self.stats['retries']} ponowień, {self.stats['failed']} nieudanych, "
+              f"{self.stats['skipped']} pominiętych, {self.stats['not_modified'] + self.stats['unchanged']} bez zmian)")
+        return self.results
+
+
+class CsvSink:
+    """Dopisuje wiersze do CSV od razu po pobraniu; nagłówek bierze z istniejącego pliku albo z pierwszego wiersza."""
+
+    def __init__(self, filename: str, truncate: bool = False):
+        self.filename = Path(filename)
+        self.written = 0
+        self._file = None
+        self._writer = None
+        if truncate and self.filename.exists():
+            self.filename.unlink()
+
+    def write(self, row: dict):
+        if self._writer is None:
+            fieldnames = list(row.keys())
+            if self.filename.exists() and self.filename.stat().st_size > 0:
+                with open(self.filename, newline="", encoding="utf-8") as f:
+                    fieldnames = next(csv.reader(f))
+                self._file = open(self.filename, "a", newline="", encoding="utf-8")
+                self._writer = csv.DictWriter(self._file, fieldnames, extrasaction="ignore")
+            else:
+                self._file = open(self.filename, "w", newline="", encoding="utf-8")
+                self._writer = csv.DictWriter(self._file, fieldnames, extrasaction="ignore")
+                self._writer.writeheader()
+        self._writer.writerow(row)
+        self._file.flush()
+        self.written += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._writer = None
+
+
+def run_scraper(base_url: str, parse_listing: ParseListing, output_file: str, pages: int = 50, full: bool = False):
+    """Przebieg przyrostowy z indeksem i dopisywaniem do CSV, a z full=True - pełny, od zera."""
+    index = None if full else OfferIndex(os.getenv("SCRAPER_INDEX") or index_path(output_file))
+    sink = CsvSink(output_file, truncate=full)
+    engine = ScraperEngine.from_env(base_url, parse_listing, index=index, sink=sink)
+    try:
+        data = asyncio.run(engine.run(pages))
+    finally:
+        sink.close()
+        if index:
+            index.close()
+    print(f"Dopisano {sink.written} ogłoszeń do {output_file}")
+    return data
@@ -0,0 +1,134 @@
+"""
+Trwały indeks zeskrapowanych ogłoszeń (SQLite) dla przyrostowych i wznawialnych przebiegów.
+
+Dla każdego adresu ogłoszenia trzymamy id z otodom, skrót treści obiektu ogłoszenia, ETag / Last-Modified
+z odpowiedzi oraz czasy: pierwszego i ostatniego zobaczenia na liście wyników, ostatniego pobrania
+i ostatniej zmiany. Przebiegi (runs) zapisują ukończone strony wyników, więc przerwany przebieg
+można wznowić od miejsca awarii.
+"""
+import hashlib
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Iterable, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS offers (
+    url TEXT PRIMARY KEY,
+    offer_id TEXT,
+    content_hash TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    last_checked REAL,
+    last_changed REAL
+);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    base_url TEXT NOT NULL,
+    pages INTEGER NOT NULL,
+    started_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE TABLE IF NOT EXISTS run_pages (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    page INTEGER NOT NULL,
+    PRIMARY KEY (run_id, page)
+);
+"""
+
+
+def content_hash(ad: dict) -> str:
+    """Skrót samego obiektu ogłoszenia - reszta strony (skrypty, reklamy) zmienia się przy każdym pobraniu."""
+    canonical = json.dumps(ad, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def index_path(output_file: str) -> Path:
+    return Path(output_file).with_suffix(".index.sqlite")
+
+
+class OfferIndex:
+    def __init__(self, path):
+        self.path = Path(path)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.run_id: Optional[int] = None
+        self.run_started: Optional[float] = None
+
+    def close(self):
+        self.conn.close()
+
+    def start_run(self, base_url: str, pages: int) -> bool:
+        """Zaczyna przebieg albo wznawia ostatni nieukończony dla tego adresu. Zwraca True przy wznowieniu."""
+        row = self.conn.execute(
+            "SELECT id, started_at FROM runs WHERE base_url = ? AND finished_at IS NULL ORDER BY id DESC LIMIT 1",
+            (base_url,),
+        ).fetchone()
+        if row is not None:
+            self.run_id, self.run_started = row["id"], row["started_at"]
+            with self.conn:
+                self.conn.execute("UPDATE runs SET pages = MAX(pages, ?) WHERE id = ?", (pages, self.run_id))
+            return True
+
+        self.run_started = time.time()
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO runs (base_url, pages, started_at) VALUES (?, ?, ?)", (base_url, pages, self.run_started)
+            )
+        self.run_id = cursor.lastrowid
+        return False
+
+    def finish_run(self):
+        with self.conn:
+            self.conn.execute("UPDATE runs SET finished_at = ? WHERE id = ?", (time.time(), self.run_id))
+
+    def done_pages(self) -> set:
+        rows = self.conn.execute("SELECT page FROM run_pages WHERE run_id = ?", (self.run_id,))
+        return {row["page"] for row in rows}
+
+    def mark_page_done(self, page: int):
+        with self.conn:
+            self.conn.execute("INSERT OR IGNORE INTO run_pages (run_id, page) VALUES (?, ?)", (self.run_id, page))
+
+    def get(self, url: str) -> Optional[sqlite3.Row]:
+        return self.conn.execute("SELECT * FROM offers WHERE url = ?", (url,)).fetchone()
+
+    def is_fresh(self, offer: sqlite3.Row, refresh_after: float) -> bool:
+        """Czy ogłoszenie można pominąć: sprawdzone w tym (wznawianym) przebiegu albo w oknie odświeżania."""
+        if offer["last_checked"] is None:
+            return False
+        threshold = min(self.run_started or time.time(), time.time() - refresh_after)
+        return offer["last_checked"] >= threshold
+
+    def seen(self, urls: Iterable[str]):
+        """Adresy z listy wyników: nowe dopisuje, znanym przesuwa last_seen."""
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO offers (url, first_seen, last_seen) VALUES (?, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET last_seen = excluded.last_seen",
+                [(url, now, now) for url in urls],
+            )
+
+    def checked(self, url: str):
+        """Pobrane (albo 304) bez zmian treści."""
+        with self.conn:
+            self.conn.execute("UPDATE offers SET last_checked = ? WHERE url = ?", (time.time(), url))
+
+    def record(self, url: str, offer_id, digest: str, etag: Optional[str], last_modified: Optional[str]):
+        now = time.time()
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO offers (url, offer_id, content_hash, etag, last_modified, first_seen, last_seen, "
+                "last_checked, last_changed) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET offer_id = excluded.offer_id, content_hash = excluded.content_hash, "
+                "etag = excluded.etag, last_modified = excluded.last_modified, "
+                "last_checked = excluded.last_checked, last_changed = excluded.last_changed",
+                (url, None if offer_id is None else str(offer_id), digest, etag, last_modified, now, now, now, now),
+            )
@@ -0,0 +1,57 @@
+"""
+Wyciąganie JSON-a z <script id="__NEXT_DATA__"> bez parsowania całej strony.
+
+Szybka ścieżka szuka znacznika w surowych bajtach i dekoduje tylko jego zawartość (Next.js escapuje "<"
+w tym JSON-ie, więc pierwsze "</script>" po znaczniku kończy dane). Gdy układ strony się zmieni
+i szybka ścieżka nic nie znajdzie albo JSON się nie zdekoduje, używamy parsera HTML:
+lxml, jeśli jest zainstalowany, a w przeciwnym razie BeautifulSoup z html.parser.
+"""
+import json
+import re
+from typing import Optional
+
+from bs4 import BeautifulSoup
+
+try:
+    from lxml import html as lxml_html
+except ImportError:
+    lxml_html = None
+
+NEXT_DATA_TAG = re.compile(rb"<script\b[^>]*\bid\s*=\s*[\"']?__NEXT_DATA__[\"']?[^>]*>", re.IGNORECASE)
+SCRIPT_END = re.compile(rb"</script\s*>", re.IGNORECASE)
+
+stats = {"fast": 0, "fallback": 0, "missing": 0}
+
+
+def scan_next_data(content: bytes) -> Optional[dict]:
+    match = NEXT_DATA_TAG.search(content)
+    if match is None:
+        return None
+    end = SCRIPT_END.search(content, match.end())
+    if end is None:
+        return None
+    try:
+        return json.loads(content[match.end():end.start()])
+    except ValueError:
+        return None
+
+
+def parse_next_data(content: bytes) -> Optional[dict]:
+    """Wolna ścieżka przez parser HTML."""
+    if lxml_html is not None:
+        nodes = lxml_html.fromstring(content).xpath('//script[@id="__NEXT_DATA__"]')
+        text = nodes[0].text if nodes else None
+    else:
+        script_tag = BeautifulSoup(content, "html.parser").find("script", id="__NEXT_DATA__")
+        text = script_tag.string if script_tag else None
+    return json.loads(text) if text else None
+
+
+def extract_next_data(content: bytes) -> Optional[dict]:
+    data = scan_next_data(content)
+    if data is not None:
+        stats["fast"] += 1
+        return data
+    data = parse_next_data(content)
+    stats["fallback" if data is not None else "missing"] += 1
+    return data
@@ -0,0 +1,86 @@
+"""
+Czas wyciągania __NEXT_DATA__ na ogłoszenie: dawny BeautifulSoup(html.parser) na całej stronie
+kontra skanowanie bajtów z ScrapperNextData (oraz lxml, jeśli jest zainstalowany).
+
+    python bench_next_data.py [katalog_z_zapisanymi_stronami]
+
+Bez argumentu używa stron z tests/fixtures powiększonych do rozmiaru typowej strony ogłoszenia otodom
+(~400 KB: rozbudowany DOM, skrypty i style przed danymi, dłuższy opis i lista zdjęć w JSON-ie).
+"""
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+import ScrapperNextData
+from ScrapperNextData import parse_next_data, scan_next_data
+
+FIXTURES = Path(__file__).resolve().parent / "tests" / "fixtures"
+
+
+def old_extract(content: bytes):
+    soup = BeautifulSoup(content, "html.parser")
+    script_tag = soup.find("script", id="__NEXT_DATA__", type="application/json")
+    return json.loads(script_tag.string) if script_tag else None
+
+
+def inflate(content: bytes) -> bytes:
+    head, tail = content.split(b'<script id="__NEXT_DATA__"', 1)
+    data_start = tail.index(b">") + 1
+    data_end = tail.index(b"</script>")
+    data = json.loads(tail[data_start:data_end])
+    ad = data["props"]["pageProps"]["ad"]
+    ad["description"] = "<p>" + "Przestronne, jasne mieszkanie w spokojnej okolicy. " * 120 + "</p>"
+    ad["images"] = [{"small": f"https://img.otodom.pl/{i}/s.webp", "large": f"https://img.otodom.pl/{i}/l.webp"}
+                    for i in range(40)]
+    data["props"]["pageProps"]["translations"] = {f"key_{i}": f"Tłumaczenie {i}" for i in range(2500)}
+    blob = json.dumps(data, ensure_ascii=False).replace("<", "\\u003c").encode("utf-8")
+
+    dom = b"".join(
+        b'<div class="css-1x%d"><span data-cy="item">Element %d</span><a href="/pl/oferta/inne-%d">link</a></div>'
+        % (i, i, i) for i in range(2500)
+    )
+    scripts = b"".join(b"<script>self.__next_f.push([1,\"%s\"])</script>" % (b"x" * 2000) for _ in range(20))
+    styles = b"<style>" + b".css-a{display:flex;margin:0 auto}" * 1000 + b"</style>"
+    return (head.replace(b"</head>", styles + b"</head>") + dom + scripts
+            + b'<script id="__NEXT_DATA__" type="application/json">' + blob + b"</script></body></html>")
+
+
+def load_pages(directory=None):
+    if directory:
+        return [path.read_bytes() for path in sorted(Path(directory).glob("*.html"))]
+    return [inflate(path.read_bytes()) for path in sorted(FIXTURES.glob("oferta-*.html"))]
+
+
+def per_page_ms(fn, pages, repeats: int) -> dict:
+    times = []
+    for _ in range(repeats):
+        for content in pages:
+            start = time.perf_counter()
+            fn(content)
+            times.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": round(statistics.median(times), 3), "mean_ms": round(statistics.fmean(times), 3)}
+
+
+def main(directory=None):
+    pages = load_pages(directory)
+    for content in pages:
+        assert scan_next_data(content) == old_extract(content)
+
+    report = {
+        "pages": len(pages),
+        "avg_page_kb": round(sum(len(p) for p in pages) / len(pages) / 1024, 1),
+        "bs4_html_parser": per_page_ms(old_extract, pages, repeats=5),
+        "byte_scan": per_page_ms(scan_next_data, pages, repeats=50),
+    }
+    if ScrapperNextData.lxml_html is not None:
+        report["lxml"] = per_page_ms(parse_next_data, pages, repeats=20)
+    report["speedup"] = round(report["bs4_html_parser"]["median_ms"] / report["byte_scan"]["median_ms"], 1)
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,79 @@
+import hashlib
+import sys
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+SCRAPERS_DIR = Path(__file__).resolve().parent.parent
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+sys.path.insert(0, str(SCRAPERS_DIR))
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Strony z fixtures/: /pl/wyniki?page=1|2 -> wyniki.html, /pl/oferta/<nazwa> -> oferta-<nazwa>.html.
+    Strona 3 zawsze zwraca 500, a "niestabilna" oferta pierwszy raz odpowiada 503.
+    Odpowiedzi mają ETag (304 na If-None-Match), chyba że etags = False; replace podmienia plik dla ścieżki.
+    """
+    hits: Counter
+    etags: bool
+    replace: dict
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        self.hits[parts.path] += 1
+        page = parse_qs(parts.query).get("page", ["1"])[0]
+
+        if parts.path == "/pl/wyniki" and page in ("1", "2"):
+            return self.send_file(FIXTURES / "wyniki.html")
+        if parts.path == "/pl/wyniki":
+            return self.send_status(500)
+        if parts.path == "/pl/oferta/niestabilna":
+            if self.hits[parts.path] == 1:
+                return self.send_status(503, {"Retry-After": "0"})
+            return self.send_file(FIXTURES / "oferta-mieszkanie.html")
+        path = FIXTURES / self.replace.get(parts.path, f"oferta-{parts.path.rsplit('/', 1)[-1]}.html")
+        if parts.path.startswith("/pl/oferta/") and path.exists():
+            return self.send_file(path)
+        self.send_status(404)
+
+    def send_file(self, path: Path):
+        body = path.read_bytes()
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        if self.etags and self.headers.get("If-None-Match") == etag:
+            return self.send_status(304)
+        self.send_response(200)
+        if self.etags:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_status(self, status: int, headers=None):
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    handler = type("Handler", (StubHandler,), {"hits": Counter(), "etags": True, "replace": {}})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.base_url = f"http://127.0.0.1:{server.server_port}"
+    server.hits = handler.hits
+    server.handler = handler
+    yield server
+    server.shutdown()
+    server.server_close()
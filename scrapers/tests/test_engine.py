@@ -0,0 +1,60 @@
+import asyncio
+import time
+
+import ScrapperDomy
+import ScrapperDzialki
+import ScrapperMieszkania
+from ScrapperEngine import ScraperEngine, TokenBucket
+
+
+def scrape(stub_server, module, pages=2, **settings):
+    engine = ScraperEngine(f"{stub_server.base_url}/pl/wyniki", module.parse_listing, rate=200, backoff=0.01, **settings)
+    rows = asyncio.run(engine.run(pages))
+    return engine, {row["link"].rsplit("/", 1)[-1]: row for row in rows}
+
+
+def test_flat_scraper_against_stub_server(stub_server):
+    engine, rows = scrape(stub_server, ScrapperMieszkania, pages=3, retries=2)
+
+    # oferta bez ceny odpada, "niestabilna" przechodzi po ponowieniu, duplikaty z 2. strony pobierane raz
+    assert set(rows) == {"mieszkanie", "dom", "dzialka", "niestabilna"}
+    flat = rows["mieszkanie"]
+    assert (flat["Cena"], flat["Piętro"], flat["Dzielnica"], flat["Winda"], flat["Miejsce parkingowe"]) == \
+        (650000, "3", "Krowodrza", 1, 1)
+    assert stub_server.hits["/pl/oferta/mieszkanie"] == 1
+    assert stub_server.hits["/pl/oferta/niestabilna"] == 2
+    assert stub_server.hits["/pl/wyniki"] == 2 + 3  # strona 3: pierwsza próba + 2 ponowienia
+    assert engine.stats["failed"] == 1
+
+
+def test_house_and_plot_mappings(stub_server):
+    _, houses = scrape(stub_server, ScrapperDomy)
+    house = houses["dom"]
+    assert house["Cena"] == 140 * 5000.0
+    assert (house["Garaż"], house["Piwnica"], house["Dojazd utwardzony"], house["Rodzaj ogrzewania"]) == (1, 1, 1, "gas")
+
+    _, plots = scrape(stub_server, ScrapperDzialki)
+    plot = plots["dzialka"]
+    assert (plot["Typ działki"], plot["Prąd"], plot["Woda"], plot["Ogrodzenie"], plot["Dojazd utwardzony"]) == \
+        ("building", 1, 1, 1, 1)
+
+
+def test_token_bucket_limits_rate():
+    async def take(n):
+        bucket = TokenBucket(rate=50, burst=5)
+        start = time.monotonic()
+        await asyncio.gather(*(bucket.acquire() for _ in range(n)))
+        return time.monotonic() - start
+
+    # 5 od razu z zapasu, kolejne 10 po 1/50 s
+    assert asyncio.run(take(15)) >= 10 / 50 * 0.9
+
+
+def test_process_pool_pipeline_matches_inline(stub_server):
+    _, inline = scrape(stub_server, ScrapperMieszkania)
+    engine, pooled = scrape(stub_server, ScrapperMieszkania, parse_workers=2, parse_queue_size=1)
+
+    assert pooled == inline
+    assert engine.stats["processed"] == engine.stats["downloaded"] == 5
+    assert engine.stats["queue_max"] <= 1
+    assert "kolejka 0/1" in engine.progress(asyncio.Queue(maxsize=1))
@@ -0,0 +1,54 @@
+import asyncio
+import csv
+
+import ScrapperMieszkania
+from ScrapperEngine import CsvSink, ScraperEngine
+from ScrapperIndex import OfferIndex
+
+
+def incremental_run(stub_server, tmp_path, pages=2):
+    index = OfferIndex(tmp_path / "index.sqlite")
+    sink = CsvSink(tmp_path / "out.csv")
+    engine = ScraperEngine(
+        f"{stub_server.base_url}/pl/wyniki", ScrapperMieszkania.parse_listing,
+        rate=200, backoff=0.01, index=index, sink=sink,
+    )
+    asyncio.run(engine.run(pages))
+    sink.close()
+    index.close()
+    return engine.stats
+
+
+def csv_links(tmp_path):
+    with open(tmp_path / "out.csv", newline="", encoding="utf-8") as f:
+        return [row["link"].rsplit("/", 1)[-1] for row in csv.DictReader(f)]
+
+
+def test_refresh_writes_only_new_or_changed(stub_server, tmp_path):
+    incremental_run(stub_server, tmp_path)
+    assert sorted(csv_links(tmp_path)) == ["dom", "dzialka", "mieszkanie", "niestabilna"]
+
+    stats = incremental_run(stub_server, tmp_path)
+    assert (stats["parsed"], stats["not_modified"]) == (0, 5)
+    assert len(csv_links(tmp_path)) == 4
+
+    # bez ETagów decyduje skrót treści ogłoszenia; zmienione "dom" jest dopisywane jeszcze raz
+    stub_server.handler.etags = False
+    stub_server.handler.replace["/pl/oferta/dom"] = "oferta-dzialka.html"
+    stats = incremental_run(stub_server, tmp_path)
+    assert (stats["parsed"], stats["unchanged"]) == (1, 4)
+    assert csv_links(tmp_path)[-1] == "dom"
+
+
+def test_interrupted_run_resumes_from_checkpoint(stub_server, tmp_path):
+    index = OfferIndex(tmp_path / "index.sqlite")
+    index.start_run(f"{stub_server.base_url}/pl/wyniki", 2)
+    index.mark_page_done(1)
+    index.close()
+
+    incremental_run(stub_server, tmp_path)
+    assert stub_server.hits["/pl/wyniki"] == 1  # tylko strona 2
+
+    stats = incremental_run(stub_server, tmp_path)
+    assert stub_server.hits["/pl/wyniki"] == 3  # nowy przebieg od strony 1
+    assert stats["not_modified"] == 5
@@ -0,0 +1,26 @@
+import ScrapperNextData
+from ScrapperNextData import extract_next_data, parse_next_data, scan_next_data
+
+from conftest import FIXTURES
+
+
+def test_fast_scan_matches_html_parser():
+    for path in FIXTURES.glob("oferta-*.html"):
+        content = path.read_bytes()
+        assert scan_next_data(content) == parse_next_data(content)
+        assert scan_next_data(content)["props"]["pageProps"]["ad"]
+
+
+def test_attribute_order_and_missing_tag():
+    page = b"<html><script type='application/json'\n  ID=__NEXT_DATA__ nonce=x>{\"props\": {\"a\": \"\\u003c/script>\"}}</SCRIPT></html>"
+    assert scan_next_data(page) == {"props": {"a": "</script>"}}
+    assert extract_next_data(b"<html><body>brak danych</body></html>") is None
+
+
+def test_falls_back_to_html_parser(monkeypatch):
+    content = (FIXTURES / "oferta-dom.html").read_bytes()
+    before = dict(ScrapperNextData.stats)
+    monkeypatch.setattr(ScrapperNextData, "scan_next_data", lambda content: None)
+
+    assert extract_next_data(content)["props"]["pageProps"]["ad"]["target"]["City"] == "Wieliczka"
+    assert ScrapperNextData.stats["fallback"] == before["fallback"] + 1